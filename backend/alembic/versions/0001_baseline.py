@@ -0,0 +1,215 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+Databases created before migrations existed (Base.metadata.create_all on
+startup) already have these tables; only the missing ones are created, so
+`alembic upgrade head` works on both fresh and existing databases.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001_baseline"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+attendance_status = sa.Enum("present", "absent", "late", "excused", name="attendancestatus")
+export_job_status = sa.Enum("pending", "running", "done", "failed", name="exportjobstatus")
+
+
+def _create_table(existing: set, name: str, *columns) -> None:
+    if name not in existing:
+        op.create_table(name, *columns)
+
+
+def _create_index(name: str, table: str, columns: list, **kw) -> None:
+    op.create_index(name, table, columns, if_not_exists=True, **kw)
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    _create_table(
+        existing,
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("role", sa.String(16), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("birthday", sa.Date(), nullable=True),
+        sa.Column("nationality", sa.String(100), nullable=True),
+        sa.Column("study_course", sa.String(255), nullable=True),
+        sa.Column("study_group", sa.String(100), nullable=True),
+        sa.Column("phone", sa.String(32), nullable=True),
+        sa.Column("social_links", sa.Text(), nullable=True),
+    )
+    _create_index("ix_users_id", "users", ["id"])
+    _create_index("ix_users_email", "users", ["email"], unique=True)
+    _create_index("ix_users_role", "users", ["role"])
+
+    _create_table(
+        existing,
+        "courses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=True),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("teacher_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    _create_index("ix_courses_id", "courses", ["id"])
+    _create_index("ix_courses_name", "courses", ["name"])
+
+    _create_table(
+        existing,
+        "lessons",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("topic", sa.String(255), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("room", sa.String(100), nullable=True),
+        sa.Column("start_time", sa.Time(), nullable=True),
+        sa.Column("end_time", sa.Time(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    _create_index("ix_lessons_id", "lessons", ["id"])
+    _create_index("ix_lessons_course_id", "lessons", ["course_id"])
+    _create_index("ix_lessons_date", "lessons", ["date"])
+
+    _create_table(
+        existing,
+        "attendance",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("lesson_id", sa.Integer(), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("status", attendance_status, nullable=False),
+        sa.Column("comment", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("lesson_id", "student_id", name="uq_attendance_lesson_student"),
+    )
+    _create_index("ix_attendance_id", "attendance", ["id"])
+    _create_index("ix_attendance_lesson_id", "attendance", ["lesson_id"])
+    _create_index("ix_attendance_student_id", "attendance", ["student_id"])
+
+    _create_table(
+        existing,
+        "feedback",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("lesson_id", sa.Integer(), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("rating", sa.Float(), nullable=False),
+        sa.Column("comment", sa.Text(), nullable=True),
+        sa.Column("is_hidden", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("lesson_id", "student_id", name="uq_feedback_lesson_student"),
+    )
+    _create_index("ix_feedback_id", "feedback", ["id"])
+    _create_index("ix_feedback_lesson_id", "feedback", ["lesson_id"])
+    _create_index("ix_feedback_student_id", "feedback", ["student_id"])
+    _create_index("ix_feedback_created_at_id", "feedback", ["created_at", "id"])
+
+    _create_table(
+        existing,
+        "attendance_daily_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("present", sa.Integer(), nullable=False),
+        sa.Column("late", sa.Integer(), nullable=False),
+        sa.Column("excused", sa.Integer(), nullable=False),
+        sa.Column("absent", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    _create_index("ix_attendance_daily_rollup_id", "attendance_daily_rollup", ["id"])
+    _create_index("ix_attendance_daily_rollup_student_id", "attendance_daily_rollup", ["student_id"])
+    _create_index(
+        "uq_att_rollup_course_date_student", "attendance_daily_rollup", ["course_id", "date", "student_id"], unique=True
+    )
+    _create_index(
+        "uq_att_rollup_course_date_total",
+        "attendance_daily_rollup",
+        ["course_id", "date"],
+        unique=True,
+        sqlite_where=sa.text("student_id IS NULL"),
+        postgresql_where=sa.text("student_id IS NULL"),
+    )
+
+    _create_table(
+        existing,
+        "feedback_rating_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("lesson_id", sa.Integer(), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Float(), nullable=False),
+        sa.Column("r1", sa.Integer(), nullable=False),
+        sa.Column("r2", sa.Integer(), nullable=False),
+        sa.Column("r3", sa.Integer(), nullable=False),
+        sa.Column("r4", sa.Integer(), nullable=False),
+        sa.Column("r5", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    _create_index("ix_feedback_rating_rollup_id", "feedback_rating_rollup", ["id"])
+    _create_index("ix_feedback_rating_rollup_lesson_id", "feedback_rating_rollup", ["lesson_id"])
+    _create_index("uq_fb_rollup_course_lesson", "feedback_rating_rollup", ["course_id", "lesson_id"], unique=True)
+    _create_index(
+        "uq_fb_rollup_course_total",
+        "feedback_rating_rollup",
+        ["course_id"],
+        unique=True,
+        sqlite_where=sa.text("lesson_id IS NULL"),
+        postgresql_where=sa.text("lesson_id IS NULL"),
+    )
+
+    _create_table(
+        existing,
+        "export_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("dataset", sa.String(32), nullable=False),
+        sa.Column("response_format", sa.String(16), nullable=False),
+        sa.Column("params", sa.Text(), nullable=False),
+        sa.Column("status", export_job_status, nullable=False),
+        sa.Column("rows_total", sa.Integer(), nullable=True),
+        sa.Column("rows_written", sa.Integer(), nullable=False),
+        sa.Column("bytes_written", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("file_path", sa.String(512), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    _create_index("ix_export_jobs_owner_id", "export_jobs", ["owner_id"])
+    _create_index("ix_export_jobs_expires_at", "export_jobs", ["expires_at"])
+
+
+def downgrade() -> None:
+    for table in (
+        "export_jobs",
+        "feedback_rating_rollup",
+        "attendance_daily_rollup",
+        "feedback",
+        "attendance",
+        "lessons",
+        "courses",
+        "users",
+    ):
+        op.drop_table(table, if_exists=True)
+    bind = op.get_bind()
+    export_job_status.drop(bind, checkfirst=True)
+    attendance_status.drop(bind, checkfirst=True)
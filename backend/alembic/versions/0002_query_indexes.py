@@ -0,0 +1,44 @@
+"""composite indexes for analytics and list queries
+
+Revision ID: 0002_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:10:00
+
+- lessons (course_id, date): every analytics/export/risk query filters lessons
+  by course and date range.
+- courses (teacher_id): teacher scope of analytics, lists and exports.
+- attendance (lesson_id, status, student_id): covers the attendance side of the
+  risk series load (join by lesson, read status and student) without table lookups.
+- attendance (student_id, lesson_id, status): the same for a single student's
+  series (personal risk).
+- feedback (lesson_id, is_hidden, rating): covers per-lesson rating aggregates
+  over visible feedback.
+
+Check the plans with `python -m benchmarks.query_plans`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002_query_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_lessons_course_id_date", "lessons", ["course_id", "date"]),
+    ("ix_courses_teacher_id", "courses", ["teacher_id"]),
+    ("ix_attendance_lesson_id_status_student_id", "attendance", ["lesson_id", "status", "student_id"]),
+    ("ix_attendance_student_id_lesson_id_status", "attendance", ["student_id", "lesson_id", "status"]),
+    ("ix_feedback_lesson_id_is_hidden_rating", "feedback", ["lesson_id", "is_hidden", "rating"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
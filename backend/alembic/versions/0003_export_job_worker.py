@@ -0,0 +1,34 @@
+"""export job owner process
+
+Revision ID: 0003_export_job_worker
+Revises: 0002_query_indexes
+Create Date: 2026-10-19 09:00:00
+
+- export_jobs.worker: "<host>:<pid>" of the process whose thread pool runs the
+  job, so a restarted worker can tell its own orphaned pending/running jobs
+  from the ones still running in the other workers.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003_export_job_worker"
+down_revision: Union[str, Sequence[str], None] = "0002_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if not _has_column("export_jobs", "worker"):
+        op.add_column("export_jobs", sa.Column("worker", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    if _has_column("export_jobs", "worker"):
+        with op.batch_alter_table("export_jobs") as batch:
+            batch.drop_column("worker")
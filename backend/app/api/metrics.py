@@ -0,0 +1,96 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.core.config import get_settings
+from app.core.db import pool_status
+from app.core.metrics import CONTENT_TYPE, collect, metrics_registry
+from app.core.pool import WAIT_BUCKETS_MS
+from app.services.cache_service import analytics_cache, principal_cache
+from app.services.risk_service import risk_models
+
+router = APIRouter(include_in_schema=False)
+
+settings = get_settings()
+
+_pool_wait = metrics_registry.family(
+    "db_pool_checkout_wait_seconds",
+    "histogram",
+    "Time spent waiting for a pooled DB connection.",
+    labels=("pool",),
+    buckets=tuple(ms / 1000 for ms in WAIT_BUCKETS_MS),
+)
+_pool_timeouts = metrics_registry.family(
+    "db_pool_checkout_timeouts_total", "counter", "Checkouts that hit pool_timeout.", labels=("pool",)
+)
+_pool_connections = metrics_registry.family(
+    "db_pool_connections",
+    "gauge",
+    "Pooled DB connections by state (size is the configured pool_size).",
+    labels=("pool", "state"),
+)
+_cache_lookups = metrics_registry.family(
+    "cache_lookups_total",
+    "counter",
+    "Cache lookups by result (stale: an entry was found but outdated).",
+    labels=("cache", "result"),
+)
+# the sqlite backend is one file shared by all workers
+_cache_entries = metrics_registry.family(
+    "analytics_cache_entries",
+    "gauge",
+    "Cached analytics responses.",
+    aggregate="max" if settings.analytics_cache_backend == "sqlite" else "sum",
+)
+_cache_bytes = metrics_registry.family(
+    "analytics_cache_bytes",
+    "gauge",
+    "Size of the cached analytics responses.",
+    aggregate="max" if settings.analytics_cache_backend == "sqlite" else "sum",
+)
+_principal_entries = metrics_registry.family("principal_cache_entries", "gauge", "Cached authenticated users.")
+_risk_models = metrics_registry.family(
+    "risk_models", "gauge", "Risk models in memory and (re)trainings queued.", labels=("state",)
+)
+
+
+def _collect_state() -> None:
+    # cumulative counters kept by the pool and the caches, copied on every snapshot
+    for pool in pool_status():
+        name = pool["pool"]
+        cumulative = list(pool["wait_ms_buckets"].values())
+        counts = [b - a for a, b in zip([0, *cumulative], cumulative)]
+        _pool_wait.set((name,), [*counts, pool["wait_ms_sum"] / 1000])
+        _pool_timeouts.set((name,), pool["timeouts"])
+        for state in ("size", "checked_out", "checked_in", "overflow"):
+            if state in pool:
+                _pool_connections.set((name, state), pool[state])
+
+    cache = analytics_cache.stats()
+    # the cache counts a stale lookup as a miss too; every lookup gets one result here
+    _cache_lookups.set(("analytics", "hit"), cache["hits"])
+    _cache_lookups.set(("analytics", "miss"), cache["misses"] - cache["stale"])
+    _cache_lookups.set(("analytics", "stale"), cache["stale"])
+    if "entries" in cache:
+        _cache_entries.set((), cache["entries"])
+        _cache_bytes.set((), cache["bytes"])
+    principals = principal_cache.stats()
+    for result, key in (("hit", "hits"), ("miss", "misses")):
+        _cache_lookups.set(("principal", result), principals[key])
+    _principal_entries.set((), principals["entries"])
+
+    for state, value in risk_models.stats().items():
+        _risk_models.set((state,), value)
+
+
+metrics_registry.add_collector(_collect_state)
+
+
+@router.get("/metrics")
+def metrics(request: Request) -> Response:
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(collect(), media_type=CONTENT_TYPE)
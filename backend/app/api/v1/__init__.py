@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from app.core.config import get_settings
 from .auth import router as auth_router
 from .users import router as users_router
 from .courses import router as courses_router
@@ -8,9 +9,16 @@ from .attendance import router as attendance_router
 from .feedback import router as feedback_router
 from .export import router as export_router
 from app.api.v1.analytics import router as analytics_router
+from .system import router as system_router
 
 router = APIRouter()
 
+if get_settings().database_async:
+    # registered first, so these shadow the sync routes for the same paths
+    from .async_reads import router as async_reads_router
+
+    router.include_router(async_reads_router)
+
 router.include_router(auth_router)
 router.include_router(users_router)
 router.include_router(courses_router)
@@ -18,4 +26,5 @@ router.include_router(lessons_router)
 router.include_router(attendance_router)
 router.include_router(feedback_router)
 router.include_router(export_router)
-router.include_router(analytics_router)
\ No newline at end of file
+router.include_router(analytics_router)
+router.include_router(system_router)
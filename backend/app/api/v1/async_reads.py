@@ -0,0 +1,146 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
+from app.core.security import get_current_user_async
+from app.models.user import User
+from app.schemas.analytics import AnalyticsOverview, AnalyticsRiskResponse
+from app.schemas.attendance import AttendanceRead
+from app.schemas.course import CourseRead
+from app.schemas.feedback import FeedbackRead
+from app.schemas.lesson import LessonRead
+from app.schemas.user import UserRead
+from app.services.attendance_service import ATTENDANCE_LIST_KEYS, attendance_list_query
+from app.services.cache_service import RISK_MODELS_VERSION
+from app.services.feedback_service import FEEDBACK_LIST_KEYS, feedback_list_query
+
+from .analytics import ANALYTICS_TABLES, overview_response, risk_response
+from .attendance import ATTENDANCE_TABLES
+from .courses import course_page
+from .feedback import FEEDBACK_TABLES
+from .lessons import lesson_page
+
+# Async versions of the endpoints dashboards poll, mounted in front of the sync
+# routes when DATABASE_ASYNC is on. They await the database instead of holding
+# a threadpool thread per request; the query code is shared with the sync
+# routes and runs on the async session through run_sync. Parameters and
+# responses are identical, so the sync routes stay the documented ones.
+router = APIRouter(include_in_schema=False)
+
+
+@router.get(
+    "/courses/",
+    response_model=List[CourseRead],
+    dependencies=[Depends(conditional_get("courses", auth=get_current_user_async))],
+)
+async def list_courses_async(
+    response: Response,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+) -> List[CourseRead]:
+    return await db.run_sync(course_page, current_user, is_active, page, response)
+
+
+@router.get(
+    "/lessons/",
+    response_model=List[LessonRead],
+    dependencies=[Depends(conditional_get("lessons", "courses", auth=get_current_user_async))],
+)
+async def list_lessons_async(
+    response: Response,
+    course_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+) -> List[LessonRead]:
+    return await db.run_sync(lesson_page, current_user, course_id, from_date, to_date, page, response)
+
+
+@router.get(
+    "/attendance/",
+    response_model=List[AttendanceRead],
+    dependencies=[Depends(conditional_get(*ATTENDANCE_TABLES, auth=get_current_user_async))],
+)
+async def list_attendance_async(
+    response: Response,
+    lesson_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+) -> List[AttendanceRead]:
+    def run(session):
+        query = attendance_list_query(session, current_user, lesson_id, student_id, course_id, from_date, to_date)
+        return paginate(query, ATTENDANCE_LIST_KEYS, page, response)
+
+    return await db.run_sync(run)
+
+
+@router.get(
+    "/feedback/",
+    response_model=List[FeedbackRead],
+    dependencies=[Depends(conditional_get(*FEEDBACK_TABLES, auth=get_current_user_async))],
+)
+async def list_feedback_async(
+    response: Response,
+    lesson_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    include_hidden: bool = False,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+) -> List[FeedbackRead]:
+    def run(session):
+        query = feedback_list_query(session, current_user, lesson_id, course_id, include_hidden)
+        return paginate(query, FEEDBACK_LIST_KEYS, page, response, descending=True)
+
+    return await db.run_sync(run)
+
+
+@router.get(
+    "/users/me",
+    response_model=UserRead,
+    dependencies=[Depends(conditional_get("users", auth=get_current_user_async))],
+)
+async def read_me_async(current_user: User = Depends(get_current_user_async)) -> UserRead:
+    return current_user
+
+
+@router.get("/analytics/overview", response_model=AnalyticsOverview)
+async def analytics_overview_async(
+    course_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    scope: str = "auto",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+    etag: Optional[str] = Depends(conditional_get(*ANALYTICS_TABLES, auth=get_current_user_async)),
+) -> AnalyticsOverview:
+    return await db.run_sync(overview_response, current_user, course_id, from_date, to_date, scope, etag)
+
+
+@router.get("/analytics/risk", response_model=AnalyticsRiskResponse)
+async def analytics_risk_async(
+    course_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    scope: str = "auto",
+    k: int = 5,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+    etag: Optional[str] = Depends(conditional_get(*ANALYTICS_TABLES, keys=[RISK_MODELS_VERSION], auth=get_current_user_async)),
+) -> AnalyticsRiskResponse:
+    return await db.run_sync(risk_response, current_user, course_id, from_date, to_date, scope, k, limit, etag)
@@ -1,59 +1,53 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.db import get_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
 from app.core.security import get_current_user, require_admin, require_admin_or_teacher, check_course_owner, ROLE_ADMIN, ROLE_TEACHER
 from app.models.attendance import Attendance
-from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.user import User
-from app.schemas.attendance import AttendanceCreate, AttendanceRead, AttendanceUpdate
+from app.schemas.attendance import (
+    AttendanceBulkRequest,
+    AttendanceBulkResponse,
+    AttendanceCreate,
+    AttendanceRead,
+    AttendanceUpdate,
+)
+from app.services.attendance_service import (
+    ATTENDANCE_LIST_KEYS,
+    attendance_list_query,
+    record_attendance_change,
+    upsert_lesson_attendance,
+)
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
+# tables the list filters join and the response reads
+ATTENDANCE_TABLES = ("attendance", "lessons", "courses", "users")
 
-@router.get("/", response_model=List[AttendanceRead])
+
+@router.get("/", response_model=List[AttendanceRead], dependencies=[Depends(conditional_get(*ATTENDANCE_TABLES))])
 def list_attendance(
+    response: Response,
     lesson_id: Optional[int] = None,
     student_id: Optional[int] = None,
     course_id: Optional[int] = None,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> List[AttendanceRead]:
-    query = (
-        db.query(Attendance)
-        .options(
-            selectinload(Attendance.student),
-            selectinload(Attendance.lesson).selectinload(Lesson.course),
-        )
-        .join(Lesson, Attendance.lesson_id == Lesson.id)
-        .join(Course, Lesson.course_id == Course.id)
-    )
-
-    if current_user.role == ROLE_TEACHER:
-        query = query.filter(Course.teacher_id == current_user.id)
-
-    if lesson_id is not None:
-        query = query.filter(Attendance.lesson_id == lesson_id)
-    if student_id is not None:
-        query = query.filter(Attendance.student_id == student_id)
-    if course_id is not None:
-        query = query.filter(Lesson.course_id == course_id)
-    if from_date is not None:
-        query = query.filter(Lesson.date >= from_date)
-    if to_date is not None:
-        query = query.filter(Lesson.date <= to_date)
+    query = attendance_list_query(db, current_user, lesson_id, student_id, course_id, from_date, to_date)
+    return paginate(query, ATTENDANCE_LIST_KEYS, page, response)
 
-    records = query.order_by(Attendance.id).all()
-    return records
 
-
-@router.get("/{attendance_id}", response_model=AttendanceRead)
+@router.get("/{attendance_id}", response_model=AttendanceRead, dependencies=[Depends(conditional_get(*ATTENDANCE_TABLES))])
 def get_attendance(
     attendance_id: int,
     db: Session = Depends(get_db),
@@ -110,11 +104,47 @@ def create_attendance(
         comment=attendance_in.comment,
     )
     db.add(record)
+    record_attendance_change(db, lesson.course_id, lesson.date, record.student_id, new_status=record.status)
     db.commit()
     db.refresh(record)
     return record
 
 
+@router.post("/bulk", response_model=AttendanceBulkResponse)
+def bulk_upsert_attendance(
+    bulk_in: AttendanceBulkRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_or_teacher),
+) -> AttendanceBulkResponse:
+    # the attendance of a whole lesson in one request; rows fail individually
+    lesson = db.get(Lesson, bulk_in.lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found",
+        )
+
+    if not check_course_owner(current_user, lesson.course_id, db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to create attendance for this course",
+        )
+
+    results = upsert_lesson_attendance(db, lesson, bulk_in.records)
+    db.commit()
+    counts = {name: 0 for name in ("created", "updated", "unchanged", "error")}
+    for r in results:
+        counts[r.result] += 1
+    return AttendanceBulkResponse(
+        lesson_id=lesson.id,
+        created=counts["created"],
+        updated=counts["updated"],
+        unchanged=counts["unchanged"],
+        errors=counts["error"],
+        results=results,
+    )
+
+
 @router.patch("/{attendance_id}", response_model=AttendanceRead)
 def update_attendance(
     attendance_id: int,
@@ -143,6 +173,9 @@ def update_attendance(
         )
 
     if attendance_in.status is not None:
+        record_attendance_change(
+            db, lesson.course_id, lesson.date, record.student_id, record.status, attendance_in.status
+        )
         record.status = attendance_in.status
     if attendance_in.comment is not None:
         record.comment = attendance_in.comment
@@ -165,5 +198,8 @@ def delete_attendance(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Attendance record not found",
         )
+    lesson = db.get(Lesson, record.lesson_id)
+    if lesson is not None:
+        record_attendance_change(db, lesson.course_id, lesson.date, record.student_id, old_status=record.status)
     db.delete(record)
     db.commit()
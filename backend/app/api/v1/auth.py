@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 from app.core.db import get_db
+from app.core.etag import conditional_get
 from app.core.security import (
     verify_password,
     get_password_hash,
@@ -60,6 +61,6 @@ def login(data: LoginRequest, db: Session = Depends(get_db)) -> Token:
     return Token(access_token=access_token, token_type="bearer")
 
 
-@router.get("/me", response_model=UserRead)
+@router.get("/me", response_model=UserRead, dependencies=[Depends(conditional_get("users"))])
 async def read_current_user(current_user: User = Depends(get_current_user)) -> UserRead:
     return current_user
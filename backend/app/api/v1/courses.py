@@ -1,23 +1,25 @@
+from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
 from app.core.security import get_current_user, require_admin_or_teacher, require_admin, check_course_owner, ROLE_ADMIN, ROLE_TEACHER
 from app.models.course import Course
 from app.models.user import User
 from app.schemas.course import CourseCreate, CourseRead, CourseUpdate
+from app.services.attendance_service import rebuild_attendance_rollup
+from app.services.cache_service import invalidate_analytics
+from app.services.feedback_service import rebuild_feedback_rollup
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
 
-@router.get("/", response_model=List[CourseRead])
-def list_courses(
-    is_active: Optional[bool] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> List[CourseRead]:
+def course_page(db: Session, current_user: User, is_active: Optional[bool], page: PageParams, response: Response) -> list:
     query = db.query(Course)
     if is_active is not None:
         query = query.filter(Course.is_active == is_active)
@@ -25,11 +27,23 @@ def list_courses(
     if current_user.role == ROLE_TEACHER:
         query = query.filter(Course.teacher_id == current_user.id)
 
-    courses = query.order_by(Course.start_date.nulls_last()).all()
-    return courses
+    # undated courses last, as before
+    start_key = func.coalesce(Course.start_date, date.max)
+    return paginate(query, (start_key, Course.id), page, response, cursor_of=lambda c: (c.start_date or date.max, c.id))
+
+
+@router.get("/", response_model=List[CourseRead], dependencies=[Depends(conditional_get("courses"))])
+def list_courses(
+    response: Response,
+    is_active: Optional[bool] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> List[CourseRead]:
+    return course_page(db, current_user, is_active, page, response)
 
 
-@router.get("/{course_id}", response_model=CourseRead)
+@router.get("/{course_id}", response_model=CourseRead, dependencies=[Depends(conditional_get("courses"))])
 def get_course(
     course_id: int,
     db: Session = Depends(get_db),
@@ -62,6 +76,8 @@ def create_course(
         teacher_id=teacher_id,
     )
     db.add(course)
+    # the course list of every analytics scope changes
+    invalidate_analytics(db)
     db.commit()
     db.refresh(course)
     return course
@@ -97,6 +113,7 @@ def update_course(
         course.teacher_id = course_in.teacher_id
 
     db.add(course)
+    invalidate_analytics(db)
     db.commit()
     db.refresh(course)
     return course
@@ -116,4 +133,8 @@ def delete_course(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
 
     db.delete(course)
+    invalidate_analytics(db)
+    db.flush()
+    rebuild_attendance_rollup(db, [course_id])
+    rebuild_feedback_rollup(db, [course_id])
     db.commit()
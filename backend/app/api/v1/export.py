@@ -1,86 +1,175 @@
-from datetime import date
+from datetime import date, datetime
+from typing import List
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import Select
 from sqlalchemy.orm import Session
-import csv
-import io
 
 from app.core.db import get_db
-from app.core.security import get_current_user, ROLE_ADMIN, ROLE_TEACHER
-from app.models.attendance import Attendance
-from app.models.course import Course
-from app.models.lesson import Lesson
+from app.core.security import ROLE_ADMIN, get_current_user
+from app.models.export_job import ExportJob, ExportJobStatus
 from app.models.user import User
+from app.schemas.export import ExportJobCreate, ExportJobRead
+from app.services.export_job_service import export_jobs
+from app.services.export_service import (
+    ATTENDANCE_COLUMNS,
+    EXPORT_FORMAT_PATTERN,
+    EXPORT_FORMATS,
+    FEEDBACK_COLUMNS,
+    ExportColumns,
+    attendance_export_select,
+    attendance_values,
+    feedback_export_select,
+    feedback_values,
+    iter_export_chunks,
+)
 
 router = APIRouter(prefix="/export", tags=["export"])
 
 
+def _check_format(response_format: str):
+    fmt = EXPORT_FORMATS.get(response_format)
+    if fmt is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown format {response_format}")
+    missing = fmt.missing_dependency()
+    if missing is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format {response_format} is not available: {missing} is not installed",
+        )
+    return fmt
+
+
+def _export_response(stmt: Select, values, columns: ExportColumns, response_format: str, name: str):
+    fmt = _check_format(response_format)
+
+    return StreamingResponse(
+        fmt.writer(iter_export_chunks(stmt, values, fmt.chunk_rows), columns),
+        media_type=fmt.media_type,
+        headers={"Content-Disposition": f"attachment; filename={name}.{fmt.extension}"},
+    )
+
+
 @router.get("/attendance")
 def export_attendance(
-    response_format: str = Query(..., regex="^(csv|json)$"),
+    response_format: str = Query(..., regex=EXPORT_FORMAT_PATTERN),
     course_id: int = Query(None),
     student_id: int = Query(None),
     from_date: date = Query(None),
     to_date: date = Query(None),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = (
-        db.query(Attendance)
-        .join(Lesson, Attendance.lesson_id == Lesson.id)
-        .join(Course, Lesson.course_id == Course.id)
-        .join(User, Attendance.student_id == User.id)
+    stmt = attendance_export_select(current_user, course_id, student_id, from_date, to_date)
+    return _export_response(stmt, attendance_values, ATTENDANCE_COLUMNS, response_format, "attendance_export")
+
+
+@router.get("/feedback")
+def export_feedback(
+    response_format: str = Query(..., regex=EXPORT_FORMAT_PATTERN),
+    course_id: int = Query(None),
+    lesson_id: int = Query(None),
+    from_date: date = Query(None),
+    to_date: date = Query(None),
+    include_hidden: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    stmt = feedback_export_select(current_user, course_id, lesson_id, from_date, to_date, include_hidden)
+    return _export_response(stmt, feedback_values, FEEDBACK_COLUMNS, response_format, "feedback_export")
+
+
+def _job_read(job: ExportJob) -> ExportJobRead:
+    rows_written, bytes_written = export_jobs.progress(job)
+    progress = None
+    if job.status == ExportJobStatus.done:
+        progress = 1.0
+    elif job.rows_total:
+        progress = min(1.0, rows_written / job.rows_total)
+    return ExportJobRead(
+        id=job.id,
+        dataset=job.dataset,
+        response_format=job.response_format,
+        status=job.status.value,
+        rows_total=job.rows_total,
+        rows_written=rows_written,
+        bytes_written=bytes_written,
+        progress=progress,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at,
+        download_url=f"/api/v1/export/jobs/{job.id}/download" if job.status == ExportJobStatus.done else None,
     )
 
-    if current_user.role == ROLE_TEACHER:
-        query = query.filter(Course.teacher_id == current_user.id)
-
-    if current_user.role not in (ROLE_ADMIN, ROLE_TEACHER):
-        query = query.filter(Attendance.student_id == current_user.id)
-        student_id = None
-
-    if course_id is not None:
-        query = query.filter(Lesson.course_id == course_id)
-    if student_id is not None:
-        query = query.filter(Attendance.student_id == student_id)
-    if from_date is not None:
-        query = query.filter(Lesson.date >= from_date)
-    if to_date is not None:
-        query = query.filter(Lesson.date <= to_date)
-
-    records = query.all()
-
-    if response_format == "json":
-        out = []
-        for r in records:
-            out.append(
-                {
-                    "ФИО студента": r.student.full_name or r.student.email,
-                    "Курс": r.lesson.course.name if r.lesson and r.lesson.course else "",
-                    "Дата занятия": str(r.lesson.date) if r.lesson else "",
-                    "Статус": r.status.value,
-                }
-            )
-        return out
-
-    stream = io.StringIO()
-    writer = csv.writer(stream)
-    writer.writerow(["ФИО студента", "Курс", "Дата занятия", "Статус"])
-
-    for r in records:
-        writer.writerow(
-            [
-                r.student.full_name or r.student.email,
-                r.lesson.course.name if r.lesson and r.lesson.course else "",
-                r.lesson.date.isoformat() if r.lesson else "",
-                r.status.value,
-            ]
-        )
 
-    stream.seek(0)
-    return StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=attendance_export.csv"},
+def _get_job(db: Session, job_id: str, current_user: User) -> ExportJob:
+    job = (
+        db.query(ExportJob)
+        .filter(ExportJob.id == job_id, ExportJob.expires_at > datetime.utcnow())
+        .first()
     )
+    if job is None or (job.owner_id != current_user.id and current_user.role != ROLE_ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+    return job
+
+
+@router.post("/jobs", response_model=ExportJobRead, status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(
+    job_in: ExportJobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ExportJobRead:
+    _check_format(job_in.response_format)
+    params = job_in.model_dump(exclude={"dataset", "response_format"}, exclude_none=True)
+    job = export_jobs.create(db, current_user, job_in.dataset, job_in.response_format, params)
+    return _job_read(job)
+
+
+@router.get("/jobs", response_model=List[ExportJobRead])
+def list_export_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> List[ExportJobRead]:
+    jobs = (
+        db.query(ExportJob)
+        .filter(ExportJob.owner_id == current_user.id, ExportJob.expires_at > datetime.utcnow())
+        .order_by(ExportJob.created_at.desc())
+        .all()
+    )
+    return [_job_read(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobRead)
+def get_export_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ExportJobRead:
+    return _job_read(_get_job(db, job_id, current_user))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # FileResponse answers Range / If-Range requests and sets ETag and Last-Modified
+    job = _get_job(db, job_id, current_user)
+    if job.status != ExportJobStatus.done or not job.file_path:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Export job is not finished")
+    return FileResponse(
+        job.file_path,
+        media_type=EXPORT_FORMATS[job.response_format].media_type,
+        filename=export_jobs.file_name(job),
+    )
+
+
+@router.delete("/jobs/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_export_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> None:
+    export_jobs.delete(db, _get_job(db, job_id, current_user))
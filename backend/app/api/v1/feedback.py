@@ -1,54 +1,54 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.core.db import get_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
 from app.core.security import get_current_user, require_admin, ROLE_ADMIN, ROLE_TEACHER
-from app.models.course import Course
 from app.models.feedback import Feedback
 from app.models.lesson import Lesson
 from app.models.user import User
-from app.schemas.feedback import FeedbackCreate, FeedbackRead, FeedbackUpdate
+from app.schemas.feedback import (
+    FeedbackCreate,
+    FeedbackImportRequest,
+    FeedbackImportResponse,
+    FeedbackModerationRequest,
+    FeedbackModerationResult,
+    FeedbackRead,
+    FeedbackUpdate,
+)
+from app.services.feedback_service import (
+    FEEDBACK_LIST_KEYS,
+    feedback_list_query,
+    feedback_selection_clauses,
+    import_feedback,
+    moderate_feedback,
+    record_feedback_change,
+)
 
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 
+# tables the list filters join and the response reads
+FEEDBACK_TABLES = ("feedback", "lessons", "courses", "users")
 
-@router.get("/", response_model=List[FeedbackRead])
+
+@router.get("/", response_model=List[FeedbackRead], dependencies=[Depends(conditional_get(*FEEDBACK_TABLES))])
 def list_feedback(
+    response: Response,
     lesson_id: Optional[int] = None,
     course_id: Optional[int] = None,
     include_hidden: bool = False,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> List[FeedbackRead]:
-    query = db.query(Feedback).options(
-        joinedload(Feedback.student),
-        joinedload(Feedback.lesson).joinedload(Lesson.course),
-    )
-
-    if current_user.role == ROLE_TEACHER:
-        query = query.join(Lesson, Feedback.lesson_id == Lesson.id).join(Course, Lesson.course_id == Course.id)
-        query = query.filter(Course.teacher_id == current_user.id)
-
-    if lesson_id is not None:
-        query = query.filter(Feedback.lesson_id == lesson_id)
-
-    if course_id is not None:
-        query = query.join(Lesson, Feedback.lesson_id == Lesson.id)
-        query = query.filter(Lesson.course_id == course_id)
+    query = feedback_list_query(db, current_user, lesson_id, course_id, include_hidden)
+    return paginate(query, FEEDBACK_LIST_KEYS, page, response, descending=True)
 
-    if include_hidden and current_user.role != ROLE_ADMIN:
-        include_hidden = False
 
-    if not include_hidden:
-        query = query.filter(Feedback.is_hidden.is_(False))
-
-    items = query.order_by(Feedback.created_at.desc()).all()
-    return items
-
-
-@router.get("/{feedback_id}", response_model=FeedbackRead)
+@router.get("/{feedback_id}", response_model=FeedbackRead, dependencies=[Depends(conditional_get(*FEEDBACK_TABLES))])
 def get_feedback(
     feedback_id: int,
     db: Session = Depends(get_db),
@@ -109,11 +109,53 @@ def create_feedback(
         is_hidden=feedback_in.is_hidden if current_user.role == ROLE_ADMIN else False,
     )
     db.add(item)
+    if not item.is_hidden:
+        record_feedback_change(db, lesson.course_id, lesson.id, new_rating=item.rating)
     db.commit()
     db.refresh(item)
     return item
 
 
+@router.post("/bulk/moderate", response_model=FeedbackModerationResult)
+def bulk_moderate_feedback(
+    moderation_in: FeedbackModerationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin),
+) -> FeedbackModerationResult:
+    # one set-based UPDATE/DELETE for every feedback row matching the selection
+    clauses = feedback_selection_clauses(moderation_in)
+    if not clauses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one selection criterion is required",
+        )
+    changed = moderate_feedback(db, clauses, moderation_in.action)
+    db.commit()
+    return FeedbackModerationResult(action=moderation_in.action, changed=changed)
+
+
+@router.post("/bulk/import", response_model=FeedbackImportResponse)
+def bulk_import_feedback(
+    import_in: FeedbackImportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin),
+) -> FeedbackImportResponse:
+    # feedback collected offline, in one transaction; rows fail individually
+    results = import_feedback(db, import_in.records, overwrite=import_in.on_conflict == "update")
+    db.commit()
+    counts = {name: 0 for name in ("created", "updated", "unchanged", "skipped", "error")}
+    for r in results:
+        counts[r.result] += 1
+    return FeedbackImportResponse(
+        created=counts["created"],
+        updated=counts["updated"],
+        unchanged=counts["unchanged"],
+        skipped=counts["skipped"],
+        errors=counts["error"],
+        results=results,
+    )
+
+
 @router.patch("/{feedback_id}", response_model=FeedbackRead)
 def update_feedback(
     feedback_id: int,
@@ -142,6 +184,8 @@ def update_feedback(
             detail="You can only edit your own feedback.",
         )
 
+    old_rating = None if item.is_hidden else item.rating
+
     if feedback_in.rating is not None:
         item.rating = feedback_in.rating
     if feedback_in.comment is not None:
@@ -151,6 +195,13 @@ def update_feedback(
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
         item.is_hidden = feedback_in.is_hidden
 
+    record_feedback_change(
+        db,
+        item.lesson.course_id,
+        item.lesson_id,
+        old_rating,
+        None if item.is_hidden else item.rating,
+    )
     db.add(item)
     db.commit()
     db.refresh(item)
@@ -166,5 +217,8 @@ def delete_feedback(
     item = db.get(Feedback, feedback_id)
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Feedback not found")
+    lesson = db.get(Lesson, item.lesson_id)
+    if lesson is not None and not item.is_hidden:
+        record_feedback_change(db, lesson.course_id, lesson.id, old_rating=item.rating)
     db.delete(item)
     db.commit()
@@ -1,27 +1,33 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
 from app.core.security import get_current_user, require_admin_or_teacher, check_course_owner, ROLE_TEACHER
 from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.user import User
 from app.schemas.lesson import LessonCreate, LessonRead, LessonUpdate
+from app.services.attendance_service import rebuild_attendance_rollup
+from app.services.cache_service import invalidate_analytics
+from app.services.feedback_service import rebuild_feedback_rollup
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
 
-@router.get("/", response_model=List[LessonRead])
-def list_lessons(
-    course_id: Optional[int] = None,
-    from_date: Optional[date] = None,
-    to_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> List[LessonRead]:
+def lesson_page(
+    db: Session,
+    current_user: User,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    page: PageParams,
+    response: Response,
+) -> list:
     query = db.query(Lesson)
 
     if current_user.role == ROLE_TEACHER:
@@ -35,11 +41,23 @@ def list_lessons(
     if to_date is not None:
         query = query.filter(Lesson.date <= to_date)
 
-    lessons = query.order_by(Lesson.date).all()
-    return lessons
+    return paginate(query, (Lesson.date, Lesson.id), page, response)
 
 
-@router.get("/{lesson_id}", response_model=LessonRead)
+@router.get("/", response_model=List[LessonRead], dependencies=[Depends(conditional_get("lessons", "courses"))])
+def list_lessons(
+    response: Response,
+    course_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> List[LessonRead]:
+    return lesson_page(db, current_user, course_id, from_date, to_date, page, response)
+
+
+@router.get("/{lesson_id}", response_model=LessonRead, dependencies=[Depends(conditional_get("lessons", "courses"))])
 def get_lesson(
     lesson_id: int,
     db: Session = Depends(get_db),
@@ -78,6 +96,7 @@ def create_lesson(
         end_time=lesson_in.end_time,
     )
     db.add(lesson)
+    invalidate_analytics(db, [lesson.course_id])
     db.commit()
     db.refresh(lesson)
     return lesson
@@ -100,6 +119,8 @@ def update_lesson(
             detail="You don't have permission to edit this lesson",
         )
 
+    date_changed = lesson_in.date is not None and lesson_in.date != lesson.date
+
     if lesson_in.topic is not None:
         lesson.topic = lesson_in.topic
     if lesson_in.date is not None:
@@ -112,6 +133,10 @@ def update_lesson(
         lesson.end_time = lesson_in.end_time
 
     db.add(lesson)
+    invalidate_analytics(db, [lesson.course_id])
+    if date_changed:
+        db.flush()
+        rebuild_attendance_rollup(db, [lesson.course_id])
     db.commit()
     db.refresh(lesson)
     return lesson
@@ -134,4 +159,7 @@ def delete_lesson(
         )
 
     db.delete(lesson)
+    db.flush()
+    rebuild_attendance_rollup(db, [lesson.course_id])
+    rebuild_feedback_rollup(db, [lesson.course_id])
     db.commit()
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.db import pool_status
+from app.core.querystats import query_history
+from app.core.security import require_admin
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/db-pool", dependencies=[Depends(require_admin)])
+def db_pool() -> list:
+    return pool_status()
+
+
+@router.get("/queries", dependencies=[Depends(require_admin)])
+def recent_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    sort: str = Query("recent", regex="^(recent|queries|db_ms)$"),
+    route: Optional[str] = None,
+) -> dict:
+    # SQL count/time of the last QUERY_STATS_HISTORY requests, plus per-route
+    # maxima over that window to spot N+1 patterns
+    entries = query_history.entries()
+    if route is not None:
+        entries = [e for e in entries if e["route"] == route]
+
+    routes = {}
+    for e in entries:
+        r = routes.setdefault(
+            f"{e['method']} {e['route']}", {"requests": 0, "max_queries": 0, "db_ms_total": 0.0, "db_ms_max": 0.0}
+        )
+        r["requests"] += 1
+        r["max_queries"] = max(r["max_queries"], e["queries"])
+        r["db_ms_total"] = round(r["db_ms_total"] + e["db_ms"], 2)
+        r["db_ms_max"] = max(r["db_ms_max"], e["db_ms"])
+
+    if sort == "recent":
+        entries = entries[::-1]
+    else:
+        entries = sorted(entries, key=lambda e: e[sort], reverse=True)
+    return {"routes": routes, "requests": entries[:limit]}
@@ -1,11 +1,13 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
+from app.core.etag import conditional_get
+from app.core.pagination import PageParams, paginate
 from app.core.security import (
     get_current_user,
     get_password_hash,
@@ -17,6 +19,9 @@ from app.core.security import (
 )
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead, UserUpdate
+from app.services.attendance_service import course_ids_for_student, rebuild_attendance_rollup
+from app.services.cache_service import invalidate_analytics
+from app.services.feedback_service import course_ids_for_author, rebuild_feedback_rollup
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -36,7 +41,7 @@ class PasswordChange(BaseModel):
     new_password: str
 
 
-@router.get("/me", response_model=UserRead)
+@router.get("/me", response_model=UserRead, dependencies=[Depends(conditional_get("users"))])
 def read_me(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -52,6 +57,8 @@ def update_me(
 ) -> UserRead:
     if profile_in.full_name is not None:
         current_user.full_name = profile_in.full_name
+        # names are part of cached analytics responses
+        invalidate_analytics(db)
     if profile_in.birthday is not None:
         current_user.birthday = profile_in.birthday
     if profile_in.nationality is not None:
@@ -77,7 +84,9 @@ def change_password_me(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> None:
-    if not verify_password(payload.current_password, current_user.hashed_password):
+    # not the principal as cached: check against the stored hash
+    hashed_password = db.query(User.hashed_password).filter(User.id == current_user.id).scalar()
+    if hashed_password is None or not verify_password(payload.current_password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -87,13 +96,12 @@ def change_password_me(
     db.commit()
 
 
-@router.get("/", response_model=List[UserRead], dependencies=[Depends(require_admin)])
-def list_users(db: Session = Depends(get_db)) -> List[UserRead]:
-    users = db.query(User).order_by(User.id).all()
-    return users
+@router.get("/", response_model=List[UserRead], dependencies=[Depends(require_admin), Depends(conditional_get("users"))])
+def list_users(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)) -> List[UserRead]:
+    return paginate(db.query(User), (User.id,), page, response)
 
 
-@router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(require_admin)])
+@router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(require_admin), Depends(conditional_get("users"))])
 def get_user(user_id: int, db: Session = Depends(get_db)) -> UserRead:
     user = db.get(User, user_id)
     if not user:
@@ -150,6 +158,7 @@ def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db)
 
     if user_in.full_name is not None:
         user.full_name = user_in.full_name
+        invalidate_analytics(db)
     if user_in.is_active is not None:
         user.is_active = user_in.is_active
     if user_in.password is not None:
@@ -191,5 +200,11 @@ def delete_user(user_id: int, db: Session = Depends(get_db)) -> None:
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    taught_course_ids = [c.id for c in user.courses]
+    attendance_course_ids = course_ids_for_student(db, user_id) + taught_course_ids
+    feedback_course_ids = course_ids_for_author(db, user_id) + taught_course_ids
     db.delete(user)
+    db.flush()
+    rebuild_attendance_rollup(db, attendance_course_ids)
+    rebuild_feedback_rollup(db, feedback_course_ids)
     db.commit()
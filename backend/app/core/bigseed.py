@@ -1,8 +1,11 @@
 '''Импорты и параметры демо'''
 from datetime import date, time, timedelta
+import argparse
 import random
+import time as timer
 
 
+from app.core.bulkload import BulkLoader
 from app.core.db import Base, SessionLocal, engine
 from app.core.security import get_password_hash, ROLE_ADMIN, ROLE_TEACHER, ROLE_STUDENT
 from app.models.attendance import Attendance, AttendanceStatus
@@ -10,6 +13,8 @@ from app.models.course import Course
 from app.models.feedback import Feedback
 from app.models.lesson import Lesson
 from app.models.user import User
+from app.services.attendance_service import rebuild_attendance_rollup
+from app.services.feedback_service import rebuild_feedback_rollup
 
 DEMO_COURSES = 25
 LESSONS_PER_COURSE = 10
@@ -23,7 +28,18 @@ FEEDBACK_TARGET = 8000
 FEEDBACK_STUDENTS = 200
 
 
-def run_seed() -> None:
+def _scaled_email(email: str, k: int) -> str:
+    # k-я копия демо-аккаунта для --scale: c@c.com -> c+k@c.com
+    local, domain = email.split("@", 1)
+    return f"{local}+{k}@{domain}"
+
+
+def run_seed(scale: int = 1) -> None:
+    # scale > 1 повторяет студентов и курсы scale раз (копии получают суффиксы),
+    # объём посещаемости и фидбека растёт пропорционально; при scale=1 данные
+    # те же, что и раньше. Генераторы используют те же зерна ГСЧ.
+    if scale < 1:
+        raise ValueError("scale must be >= 1")
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
 
@@ -2658,28 +2674,29 @@ def run_seed() -> None:
 
         ]
 
-        ''' Создание пользователей в БД + алиасы преподавателей '''
+        ''' Пользователи (строки для загрузчика) + алиасы преподавателей '''
+        # таблицы только что созданы, поэтому id назначаются здесь и строки
+        # ссылаются друг на друга без чтения из БД
         users = {}
 
-        for data in admin_data + teacher_data + student_data:
-            u = User(
-                email=data["email"],
-                full_name=data["full_name"],
-                hashed_password=get_password_hash(data["password"]),
-                is_active=True,
-                role=data["role"],
-                birthday=data.get("birthday"),
-                nationality=data.get("nationality"),
-                study_course=data.get("study_course"),
-                study_group=data.get("study_group"),
-                phone=data.get("phone"),
-                social_links=data.get("social_links"),
-            )
-            db.add(u)
-            db.flush()
-            users[u.email] = u
-
-        db.commit()
+        student_copies = [
+            dict(data, email=_scaled_email(data["email"], k)) for k in range(1, scale) for data in student_data
+        ]
+        for data in admin_data + teacher_data + student_data + student_copies:
+            users[data["email"]] = {
+                "id": len(users) + 1,
+                "email": data["email"],
+                "full_name": data["full_name"],
+                "hashed_password": get_password_hash(data["password"]),
+                "is_active": True,
+                "role": data["role"],
+                "birthday": data.get("birthday"),
+                "nationality": data.get("nationality"),
+                "study_course": data.get("study_course"),
+                "study_group": data.get("study_group"),
+                "phone": data.get("phone"),
+                "social_links": data.get("social_links"),
+            }
 
         ''' Курсы: список courses_data + вставка в БД '''
         teacher_b = users["b@b.com"]
@@ -2699,287 +2716,287 @@ def run_seed() -> None:
                 "description": "Регрессия и классификация, регуляризация, кросс-валидация, метрики качества, интерпретируемость моделей. Фокус на корректной постановке задачи и воспроизводимых экспериментах.",
                 "start_date": date(2025, 9, 8),
                 "end_date": date(2025, 12, 1),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Статистический вывод и байесовские методы",
                 "description": "Оценивание параметров, доверительные интервалы, проверка гипотез, байесовский вывод, апостериорные распределения, MCMC-интуиция. Практика на прикладных кейсах.",
                 "start_date": date(2025, 9, 9),
                 "end_date": date(2025, 12, 2),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Инженерия данных и ETL-пайплайны",
                 "description": "Проектирование потоков данных, качество данных, версионирование схем, дедупликация, инкрементальные загрузки, мониторинг пайплайнов. Подготовка датасетов для аналитики и ML.",
                 "start_date": date(2025, 9, 10),
                 "end_date": date(2025, 12, 3),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Распределённые системы и отказоустойчивость",
                 "description": "Консистентность и доступность, репликация, идемпотентность, ретраи. Практика проектирования сервисов под нагрузкой и сбои.",
                 "start_date": date(2025, 9, 11),
                 "end_date": date(2025, 12, 4),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Проектирование API и безопасность (FastAPI)",
                 "description": "REST-дизайн, схемы данных, контроль доступа, аудит действий, обработка ошибок, пагинация и фильтры. Отдельно: модели угроз и практики безопасной разработки.",
                 "start_date": date(2025, 9, 12),
                 "end_date": date(2025, 12, 5),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "AI-агенты: планирование, инструменты и исполнение задач (магистратура)",
                 "description": "Архитектуры агентных систем: декомпозиция задач, планирование, вызовы инструментов (tool-use), управление контекстом и памятью. Разбор типовых провалов (галлюцинации, циклы, деградация контекста) и практики трассировки/логирования для воспроизводимых экспериментов.",
                 "start_date": date(2025, 9, 22),
                 "end_date": date(2025, 12, 2),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "RAG и векторный поиск для LLM-приложений (магистратура)",
                 "description": "Retrieval-Augmented Generation: построение индексов, эмбеддинги, чанкинг, фильтрация, reranking, оценка качества выдачи. Проектирование пайплайна «данные → индекс → ответ», контроль цитирований, борьба с устареванием знаний и конфликтующими источниками.",
                 "start_date": date(2025, 9, 23),
                 "end_date": date(2025, 12, 3),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Оценка LLM и агентных систем: метрики, тесты, red teaming (магистратура)",
                 "description": "Метрики качества для генерации и инструментальных агентов: точность фактов, полнота, стабильность, cost/latency, успешность сценариев. Автотесты, «золотые» наборы, проверка регрессий, отрицательные тесты и red teaming. Практика: сбор датасета проверок под конкретный продукт.",
                 "start_date": date(2025, 9, 24),
                 "end_date": date(2025, 12, 4),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "NLP на трансформерах: от токенизации до instruction-tuning (магистратура)",
                 "description": "Современный NLP-стек: токенизация, архитектуры на self-attention, тонкая настройка под задачу, prompt/instruction-подходы. Разбор ошибок: смещения данных, утечки, некорректная оценка. Практикум на задачах классификации, извлечения сущностей и суммаризации.",
                 "start_date": date(2025, 9, 25),
                 "end_date": date(2025, 12, 5),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Диалоговые системы и память агента (магистратура)",
                 "description": "Проектирование диалогового контура: управление контекстом, краткосрочная/долгосрочная память, профили пользователя, политики хранения данных. Дизайн state machine, обработка ошибок инструментов, кэширование и контроль качества ответов в многотуровом диалоге.",
                 "start_date": date(2025, 9, 26),
                 "end_date": date(2025, 12, 8),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Компьютерное зрение: детекция и сегментация в реальных проектах (магистратура)",
                 "description": "Практический CV: детекция объектов, сегментация, трекинг, метрики (mAP/IoU), ошибки разметки и смещение доменов. Подготовка датасета, аугментации, анализ качества по классам и сценариям. Итог: мини-проект под прикладной кейс.",
                 "start_date": date(2025, 9, 29),
                 "end_date": date(2025, 12, 9),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Segment Anything и promptable-сегментация (магистратура)",
                 "description": "Подходы к «подсказочной» сегментации: интерактивные промпты (точки/боксы), перенос на новые домены, качество масок и устойчивость к шуму. Практика: использование foundation-модели для ускорения разметки и построения пайплайна улучшения данных.",
                 "start_date": date(2025, 9, 30),
                 "end_date": date(2025, 12, 10),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Мультимодальные модели: текст–изображение и VLM-пайплайны (магистратура)",
                 "description": "Vision-Language подходы: объединение признаков текста и изображения, постановка задач VQA, captioning, мультимодальный поиск. Конструирование датасетов, негативные примеры, оценка качества и типовые сбои (доменные артефакты, ложные корреляции).",
                 "start_date": date(2025, 10, 1),
                 "end_date": date(2025, 12, 11),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "MLOps для ML/LLM: деплой, мониторинг, дрейф и A/B (магистратура)",
                 "description": "Промышленный цикл ML/LLM: эксперимент-менеджмент, версии данных/моделей, CI/CD, мониторинг качества и дрейфа, алерты, канареечные релизы, A/B-тестирование. Разбор инцидентов: деградация качества после релиза, невалидные данные, «тихие» ошибки.",
                 "start_date": date(2025, 10, 2),
                 "end_date": date(2025, 12, 12),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Безопасность LLM-систем: prompt injection, RAG-атаки и доступ (магистратура)",
                 "description": "Модели угроз для LLM/агентов: prompt injection, утечки данных из контекста, атаки через внешние источники (RAG), злоупотребление инструментами. Политики доступа, изоляция инструментов, валидация входов/выходов, журналирование и расследование инцидентов.",
                 "start_date": date(2025, 10, 3),
                 "end_date": date(2025, 12, 15),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Информационный поиск и ранжирование для агентных систем (магистратура)",
                 "description": "Поиск как компонент агента: BM25 vs dense retrieval, гибридный поиск, reranking, фильтрация по метаданным, оценка релевантности. Практика: построение «поискового слоя» под RAG и измерение влияния качества retrieval на итоговый ответ.",
                 "start_date": date(2025, 10, 6),
                 "end_date": date(2025, 12, 16),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Эффективное обучение и инференс: квантование, дистилляция, оптимизация (магистратура)",
                 "description": "Оптимизация вычислений: смешанная точность, квантование, дистилляция, профилирование узких мест, батчинг и кэширование. Практика: сравнение компромиссов «скорость/память/качество» на одном и том же наборе задач.",
                 "start_date": date(2025, 10, 7),
                 "end_date": date(2025, 12, 17),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "RLHF и обучение по предпочтениям (магистратура)",
                 "description": "Обучение моделей по предпочтениям: сбор парных сравнений, reward-модели, методы оптимизации политики и альтернативные подходы (DPO и др.). Риски: смещение разметчиков, «перевоспитание» модели, деградация по скрытым метрикам. Практика: мини-пайплайн предпочтений на учебном датасете.",
                 "start_date": date(2025, 10, 8),
                 "end_date": date(2025, 12, 18),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Инженерия данных для ML/LLM: качество, разметка и data contracts (магистратура)",
                 "description": "Качество данных как ядро ML: схемы, валидация, дедупликация, контроль дрейфа, разметка и активное обучение. Практика: создание чек-листов качества, выявление утечек таргета и построение воспроизводимого датасета под NLP/CV-задачу.",
                 "start_date": date(2025, 10, 9),
                 "end_date": date(2025, 12, 19),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "Семинар-практикум: прототипирование агентного продукта (магистратура)",
                 "description": "Командный практикум: от постановки задачи и метрик успеха до прототипа агентного сервиса. Обязательные компоненты: оценка качества, наблюдаемость (tracing), политика доступа, план отката релиза. Защита проекта: демонстрация сценариев и отчёт по экспериментам.",
                 "start_date": date(2025, 10, 10),
                 "end_date": date(2025, 12, 22),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "ReAct-агенты: рассуждение и действие в LLM-пайплайнах (магистратура)",
                 "description": "Шаблон Reason+Act: построение траекторий «наблюдение → мысль → действие → наблюдение». Практика: агенты, которые выбирают инструменты, уточняют данные и корректируют план при ошибках. Отладка: логирование шагов, детект циклов и «ложной уверенности».",
                 "start_date": date(2026, 2, 2),
                 "end_date": date(2026, 5, 18),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Инструментальные LLM: когда и как вызывать API (магистратура)",
                 "description": "Функциональные вызовы и API-оркестрация: схемы аргументов, валидация, обработка исключений, стратегии ретраев/таймаутов. Проектирование безопасного слоя инструментов и контрактов данных. Практикум: калькулятор/поиск/БД как инструменты агента.",
                 "start_date": date(2026, 2, 3),
                 "end_date": date(2026, 5, 19),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Tree-of-Thoughts: поиск по дереву рассуждений (магистратура)",
                 "description": "Планирование с разветвлением: генерация нескольких «веток» мыслей, самопроверка, отсев слабых путей, бэктрекинг. Настройка бюджета вычислений и критериев остановки. Практика: задачные сценарии, где линейный CoT часто проваливается.",
                 "start_date": date(2026, 2, 4),
                 "end_date": date(2026, 5, 20),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Мультиагентные системы: роли, координация и переговоры (магистратура)",
                 "description": "Дизайн многоагентных конфигураций: распределение ролей (planner/executor/critic), протоколы обмена сообщениями, консенсус и арбитраж. Метрики командной эффективности и диагностика деградации (споры, «эхо-камеры», дублирование работы).",
                 "start_date": date(2026, 2, 5),
                 "end_date": date(2026, 5, 21),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Оркестрация агентных workflow: графы, состояния и контроль выполнения (магистратура)",
                 "description": "Агент как управляемый процесс: state machine/граф действий, контроль переходов, чекпойнты, идемпотентность шагов. Практика: построение воспроизводимого пайплайна «сбор данных → анализ → отчёт» с журналированием и откатами.",
                 "start_date": date(2026, 2, 6),
                 "end_date": date(2026, 5, 22),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "Надёжность LLM/агентов: таймауты, ретраи, деградация и SLO (магистратура)",
                 "description": "Инженерия надёжности агентных сервисов: классы сбоев, ретраи с джиттером, дедлайны, фолбэки, деградационные режимы. Наблюдаемость: трассировка шагов, метрики latency/cost/success-rate, инцидент-репорты и регресс-тесты.",
                 "start_date": date(2026, 2, 9),
                 "end_date": date(2026, 5, 25),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "RAG-проекты: от baseline до адаптивного retrieval (магистратура)",
                 "description": "Углублённый RAG: продвинутый чанкинг, фильтрация, reranking, адаптивная глубина поиска, контроль цитирований и конфликтов источников. Оценка: влияние retrieval на итоговый ответ, диагностика провалов «нет в индексе» и «нашли не то».",
                 "start_date": date(2026, 2, 10),
                 "end_date": date(2026, 5, 26),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Знания агента: графы знаний, извлечение фактов и связей (магистратура)",
                 "description": "Извлечение сущностей/отношений, нормализация и дедупликация фактов, построение графа знаний как источника для RAG/агентов. Практика: конвейер «документы → факты → граф → ответы», контроль качества и версионирование.",
                 "start_date": date(2026, 2, 11),
                 "end_date": date(2026, 5, 27),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Синтетические данные для NLP и агентов (магистратура)",
                 "description": "Генерация синтетических примеров: шаблоны, вариативность, негативные примеры, фильтрация качества. Риски: утечка подсказок, «стерильные» данные, переобучение на искусственных паттернах. Практика: улучшение датасета для классификации и диалога.",
                 "start_date": date(2026, 2, 12),
                 "end_date": date(2026, 5, 28),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "PEFT и адаптация моделей: LoRA/адаптеры/промпт-тюнинг (магистратура)",
                 "description": "Параметро-эффективное дообучение: когда достаточно частичной адаптации, как контролировать качество и не «сломать» базовые навыки. Практика: подбор гиперпараметров, сравнение с полным fine-tuning, хранение и версионирование адаптеров.",
                 "start_date": date(2026, 2, 13),
                 "end_date": date(2026, 5, 29),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Vision Transformers в компьютерном зрении (магистратура)",
                 "description": "CV-бекбоны на трансформерах: патчи, позиционные кодировки, предобучение и перенос на прикладные задачи. Практика: fine-tuning под классификацию/детекцию, анализ ошибок и устойчивости к доменному сдвигу.",
                 "start_date": date(2026, 2, 16),
                 "end_date": date(2026, 6, 1),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "CLIP и кросс-модальные эмбеддинги: поиск и zero-shot (магистратура)",
                 "description": "Связка текст–изображение: обучение совместных представлений, zero-shot классификация, мультимодальный поиск, построение витрины «текст → релевантные изображения/видео». Практика: оценка качества retrieval и калибровка порогов.",
                 "start_date": date(2026, 2, 17),
                 "end_date": date(2026, 6, 2),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Генеративное CV: диффузионные модели и управление качеством (магистратура)",
                 "description": "Диффузионные подходы: базовая теория, условная генерация, guidance, контроль качества и артефактов. Практика: генерация данных для обучения/аугментаций, оценка пригодности синтетики для downstream-задач.",
                 "start_date": date(2026, 2, 18),
                 "end_date": date(2026, 6, 3),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Видеоаналитика: сегментация и трекинг с памятью (магистратура)",
                 "description": "Видео как последовательность кадров: трекинг объектов, устойчивость масок, работа с окклюзиями и быстрыми движениями. Практика: «promptable» сегментация и перенос на видео-сценарии, оценка стабильности и скорости.",
                 "start_date": date(2026, 2, 19),
                 "end_date": date(2026, 6, 4),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Document AI: извлечение структуры из PDF и сканов (магистратура)",
                 "description": "Понимание документов: заголовки/таблицы/списки, извлечение сущностей, связывание полей, контроль ошибок. Практика: конвейер «документ → структурированные данные → проверка качества → отчёт» для корпоративных кейсов.",
                 "start_date": date(2026, 2, 20),
                 "end_date": date(2026, 6, 5),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Агентный поиск по документам: тематическая навигация и ответы (магистратура)",
                 "description": "Сочетание NLP и retrieval: тематическое моделирование/классификация, маршрутизация запросов, многошаговый поиск, построение ответов с ссылками на фрагменты. Практика: «вопрос → план поиска → выбор источников → ответ с цитатами».",
                 "start_date": date(2026, 2, 23),
                 "end_date": date(2026, 6, 8),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Безопасная разработка LLM-приложений и агентов (магистратура)",
                 "description": "Угрозы и меры защиты: prompt injection, подмена источников, утечки через контекст, опасные аргументы инструментов. Практика: строгие схемы ввода/вывода, политики доступа, журналирование, изоляция инструментов и безопасные фолбэки.",
                 "start_date": date(2026, 2, 24),
                 "end_date": date(2026, 6, 9),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Этика и качество данных в ML/LLM: приватность, лицензии, bias (магистратура)",
                 "description": "Практические вопросы качества и ответственности: приватность, минимизация данных, правомерность источников, смещения и справедливость метрик. Разбор кейсов: что логировать, что хранить, как обосновывать решения и менять процесс, а не «косметику».",
                 "start_date": date(2026, 2, 25),
                 "end_date": date(2026, 6, 10),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "On-device ML: оптимизация инференса и ограничения ресурсов (магистратура)",
                 "description": "Инференс под ограничениями: квантование, компрессия, кэширование, выбор архитектур под CPU/GPU/NPU. Практика: оценка «качество/скорость/память», профилирование и настройка параметров для edge-сценариев.",
                 "start_date": date(2026, 2, 26),
                 "end_date": date(2026, 6, 11),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Экономика LLM/агентов: cost, latency, маршрутизация и кэширование (магистратура)",
                 "description": "Управление затратами: batching, кеши ответов, семантическое кэширование, роутинг по моделям (cheap vs strong), ограничение контекста. Практика: бюджетирование и SLA, отчётность по стоимости сценариев и оптимизация без потери качества.",
                 "start_date": date(2026, 2, 27),
                 "end_date": date(2026, 6, 12),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Капстоун: агентный ассистент для учебного процесса (магистратура)",
                 "description": "Командный проект: агент, который помогает студенту (поиск материалов, планирование, проверка результата) и преподавателю (аналитика, отчёты, обратная связь). Обязательные артефакты: метрики, тестовый набор, наблюдаемость, безопасность и демо-сценарии.",
                 "start_date": date(2026, 3, 2),
                 "end_date": date(2026, 6, 15),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
 
 
@@ -2989,224 +3006,224 @@ def run_seed() -> None:
                 "description": "Регрессия и классификация, регуляризация, кросс-валидация, метрики качества, интерпретируемость моделей. Фокус на корректной постановке задачи и воспроизводимых экспериментах.",
                 "start_date": date(2025, 9, 8),
                 "end_date": date(2025, 12, 1),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Статистический вывод и байесовские методы",
                 "description": "Оценивание параметров, доверительные интервалы, проверка гипотез, байесовский вывод, апостериорные распределения, MCMC-интуиция. Практика на прикладных кейсах.",
                 "start_date": date(2025, 9, 9),
                 "end_date": date(2025, 12, 2),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Инженерия данных и ETL-пайплайны",
                 "description": "Проектирование потоков данных, качество данных, версионирование схем, дедупликация, инкрементальные загрузки, мониторинг пайплайнов. Подготовка датасетов для аналитики и ML.",
                 "start_date": date(2025, 9, 10),
                 "end_date": date(2025, 12, 3),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Распределённые системы и отказоустойчивость",
                 "description": "Консистентность и доступность, репликация, идемпотентность, ретраи. Практика проектирования сервисов под сбои: таймауты, circuit breaker, очереди, backpressure. Разбор типичных прод-инцидентов.",
                 "start_date": date(2025, 9, 11),
                 "end_date": date(2025, 12, 4),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Проектирование API и безопасность (FastAPI)",
                 "description": "Контракты API, схемы данных, валидация, пагинация, версии, документация. Аутентификация/авторизация, RBAC, защита от типовых уязвимостей, аудит и логирование. Итог: защищённый сервис.",
                 "start_date": date(2025, 9, 12),
                 "end_date": date(2025, 12, 5),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Диалоговые системы и память агента (магистратура)",
                 "description": "Проектирование диалогового контура: управление контекстом, краткосрочная/долгосрочная память, профили пользователя, политики хранения данных. Дизайн state machine, обработка ошибок инструментов, кэширование и контроль качества ответов в многотуровом диалоге.",
                 "start_date": date(2025, 9, 26),
                 "end_date": date(2025, 12, 8),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Компьютерное зрение: детекция и сегментация в реальных проектах (магистратура)",
                 "description": "Практический CV: детекция объектов, сегментация, трекинг, метрики (mAP/IoU), ошибки разметки и смещение доменов. Подготовка датасета, аугментации, анализ качества по классам и сценариям. Итог: мини-проект под прикладной кейс.",
                 "start_date": date(2025, 9, 29),
                 "end_date": date(2025, 12, 9),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Segment Anything и promptable-сегментация (магистратура)",
                 "description": "Подходы к «подсказочной» сегментации: интерактивные промпты (точки/боксы), перенос на новые домены, качество масок и устойчивость к шуму. Практика: использование foundation-модели для ускорения разметки и построения пайплайна улучшения данных.",
                 "start_date": date(2025, 9, 30),
                 "end_date": date(2025, 12, 10),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Мультимодальные модели: текст–изображение и VLM-пайплайны (магистратура)",
                 "description": "Vision-Language подходы: объединение признаков текста и изображения, постановка задач VQA, captioning, мультимодальный поиск. Конструирование датасетов, негативные примеры, оценка качества и типовые сбои (доменные артефакты, ложные корреляции).",
                 "start_date": date(2025, 10, 1),
                 "end_date": date(2025, 12, 11),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "MLOps для ML/LLM: деплой, мониторинг, дрейф и A/B (магистратура)",
                 "description": "Промышленный цикл ML/LLM: эксперимент-менеджмент, версии данных/моделей, CI/CD, мониторинг качества и дрейфа, алерты, канареечные релизы, A/B-тестирование. Разбор инцидентов: деградация качества после релиза, невалидные данные, «тихие» ошибки.",
                 "start_date": date(2025, 10, 2),
                 "end_date": date(2025, 12, 12),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Безопасность LLM-систем: prompt injection, RAG-атаки и доступ (магистратура)",
                 "description": "Модели угроз для LLM/агентов: prompt injection, утечки данных из контекста, атаки через внешние источники (RAG), злоупотребление инструментами. Политики доступа, изоляция инструментов, валидация входов/выходов, журналирование и расследование инцидентов.",
                 "start_date": date(2025, 10, 3),
                 "end_date": date(2025, 12, 15),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Информационный поиск и ранжирование для агентных систем (магистратура)",
                 "description": "Поиск как компонент агента: BM25 vs dense retrieval, гибридный поиск, reranking, фильтрация по метаданным, оценка релевантности. Практика: построение «поискового слоя» под RAG и измерение влияния качества retrieval на итоговый ответ.",
                 "start_date": date(2025, 10, 6),
                 "end_date": date(2025, 12, 16),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Эффективное обучение и инференс: квантование, дистилляция, оптимизация (магистратура)",
                 "description": "Оптимизация вычислений: смешанная точность, квантование, дистилляция, профилирование узких мест, батчинг и кэширование. Подбор параметров под ограниченные ресурсы (GPU/CPU), измерение «качество/скорость/память». Практикум на LLM/CV моделях.",
                 "start_date": date(2025, 10, 7),
                 "end_date": date(2025, 12, 17),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Надёжность данных: качество, контроль и наблюдаемость (магистратура)",
                 "description": "Data Quality в пайплайнах: правила, профилирование, тесты, дедупликация, reconciliation и lineage. Мониторинг источников, алерты, SLO для данных. Практика: построение отчётности и автоматических проверок в ETL.",
                 "start_date": date(2025, 10, 8),
                 "end_date": date(2025, 12, 18),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "LLM в проде: RAG-пайплайны, чанкинг и валидация ответов (магистратура)",
                 "description": "Архитектура RAG: индексирование, стратегии чанкинга, гибридный retrieval, reranking, цитирование источников, контекстные окна. Контроль галлюцинаций: проверка фактов, схемы ответов, structured outputs, fallbacks. Итог: RAG-сервис с метриками.",
                 "start_date": date(2025, 10, 9),
                 "end_date": date(2025, 12, 19),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Нормализация данных и проектирование схем (PostgreSQL)",
                 "description": "Моделирование предметной области: сущности/связи, нормальные формы, ограничения, индексы, транзакции и конкурентный доступ. Практика: схема под учебный админ-панель/аналитику, миграции, оптимизация запросов и профилирование.",
                 "start_date": date(2025, 10, 10),
                 "end_date": date(2025, 12, 22),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Метрики качества моделей и дизайн эксперимента (магистратура)",
                 "description": "Как выбирать метрики под цель (precision/recall/F1/AUC, regression metrics), калибровка вероятностей, confidence intervals и статистическая значимость. Ошибки экспериментов: leakage, смещение выборки, неверная валидация. Итог: протокол эксперимента и отчёт.",
                 "start_date": date(2025, 10, 13),
                 "end_date": date(2025, 12, 23),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "NLP-пайплайны: токенизация, трансформеры, instruction/prompting (магистратура)",
                 "description": "Базовые элементы NLP на трансформерах: токенизация, attention, fine-tuning vs prompting. Подготовка датасетов, негативные примеры, контроль утечек, оценка и абляции. Практикум: мини-модель под задачу классификации/извлечения.",
                 "start_date": date(2025, 10, 14),
                 "end_date": date(2025, 12, 24),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Извлечение информации: NER, RE и структурирование (магистратура)",
                 "description": "Пайплайн «текст → сущности/связи»: NER, relation extraction, нормализация фактов, правила и модельные подходы. Ошибки разметки, согласованность, adjudication. Итог: прототип извлечения в структурированный формат (JSON) с валидацией.",
                 "start_date": date(2025, 10, 15),
                 "end_date": date(2025, 12, 25),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Криптография и безопасность API: токены, подписи, секреты",
                 "description": "Практическая безопасность: хранение секретов, подпись запросов, JWT, refresh-токены, защита от повторов, rate limiting. Моделирование угроз, аудит действий пользователя. Итог: защищённая схема авторизации и чек-лист безопасности для сервиса.",
                 "start_date": date(2025, 10, 16),
                 "end_date": date(2025, 12, 26),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Тестирование backend-сервисов: unit/integration, фикстуры, контрактные тесты",
                 "description": "Стратегия тестирования: пирамиды тестов, фикстуры, мокирование, тестовые БД, контрактные тесты для API. Инструменты CI, статический анализ, покрытие и качество. Итог: тестовый контур для FastAPI-проекта с отчётами.",
                 "start_date": date(2025, 10, 17),
                 "end_date": date(2025, 12, 29),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "ML-пайплайны и feature engineering (магистратура)",
                 "description": "Подготовка признаков: агрегации, временные окна, кодирование категорий, обработка пропусков, утечки в признаках. Feature stores, повторяемость генерации, контроль качества. Итог: воспроизводимый пайплайн признаков и baseline-модель.",
                 "start_date": date(2025, 10, 20),
                 "end_date": date(2025, 12, 30),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "SRE-практики для backend и data-систем (магистратура)",
                 "description": "Надёжность: SLO/SLA, алерты, постмортем, мониторинг метрик (latency/error rate), трассировка и логи. Дизайн для отказов, нагрузочное тестирование, rate limits. Практика: наблюдаемость для сервиса и минимальный runbook.",
                 "start_date": date(2025, 10, 21),
                 "end_date": date(2026, 1, 9),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "LLMOps: оценка качества, red teaming и безопасность релизов (магистратура)",
                 "description": "Как мерить качество LLM: тест-наборы, golden set, сценарии, регрессионные проверки. Red teaming: атакующие промпты, jailbreak, prompt injection, конфликты источников в RAG. Итог: пайплайн оценки/релиза и отчёт о рисках.",
                 "start_date": date(2025, 10, 22),
                 "end_date": date(2026, 1, 12),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Агентные системы: планирование, tool-use и контроль выполнения (магистратура)",
                 "description": "Архитектуры агентов: планирование, вызов инструментов, контроль ошибок, критерии остановки, анти-циклы и fallback. Валидация аргументов инструментов, ретраи, таймауты. Итог: агент с наблюдаемостью и отчётом по качеству.",
                 "start_date": date(2025, 10, 23),
                 "end_date": date(2026, 1, 13),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Аналитика продукта: метрики, когортный анализ и эксперименты",
                 "description": "Продуктовые метрики: активация, удержание, конверсия, LTV, когортный анализ, воронки. Дизайн A/B: гипотезы, мощность, сегменты, риски p-hacking. Практика: отчёт по эксперименту и рекомендации по продукту.",
                 "start_date": date(2025, 10, 24),
                 "end_date": date(2026, 1, 14),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "Документирование и сопровождение ML/DS проектов",
                 "description": "Как делать проект поддерживаемым: README, воспроизводимость, датасеты, версии, протокол экспериментов, модельные карты (model cards), чек-листы релизов. Практика: оформление ML-репозитория и стандарты команды.",
                 "start_date": date(2025, 10, 27),
                 "end_date": date(2026, 1, 15),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Оценка и интерпретация моделей: SHAP, PDP, error analysis (магистратура)",
                 "description": "Интерпретируемость: глобальная/локальная, SHAP, PDP/ICE, анализ ошибок по сегментам, fairness-метрики. Риски неверной интерпретации и утечек. Итог: отчёт по интерпретации и план улучшений модели.",
                 "start_date": date(2025, 10, 28),
                 "end_date": date(2026, 1, 16),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Наблюдаемость данных и моделей: логи, метрики, трассировка (магистратура)",
                 "description": "Практика observability: структура логов, корреляция событий, метрики бизнес- и системные, трассировка запросов. Мониторинг дрейфа данных, деградации качества и сбор обратной связи. Итог: дашборд и алертинг под ML-сервис.",
                 "start_date": date(2025, 10, 29),
                 "end_date": date(2026, 1, 19),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Знания агента: графы знаний, извлечение фактов и связей (магистратура)",
                 "description": "Knowledge Graph для RAG: entity linking, relation extraction, дедупликация и версии фактов. Конфликтующие источники, консистентность, запросы и интеграция в ответы агента. Итог: мини-KG и прототип компонента знаний.",
                 "start_date": date(2026, 2, 10),
                 "end_date": date(2026, 5, 22),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Синтетические данные для NLP и агентов (магистратура)",
                 "description": "Генерация синтетики: разнообразие, фильтрация, баланс классов, риски утечек, «стерильные» паттерны. Абляции и оценка влияния на downstream. Итог: пайплайн синтетики + отчёт с метриками и сравнениями.",
                 "start_date": date(2026, 2, 12),
                 "end_date": date(2026, 5, 26),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "PEFT и адаптация моделей: LoRA/адаптеры/промпт-тюнинг (магистратура)",
                 "description": "Параметро-эффективное дообучение: LoRA, адаптеры, промпт-тюнинг, выбор слоёв, ранги и регуляризация. Контроль качества, переобучение, сравнение с полным fine-tuning, хранение и версионирование адаптеров.",
                 "start_date": date(2026, 2, 13),
                 "end_date": date(2026, 5, 29),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
 
 
@@ -3216,249 +3233,252 @@ def run_seed() -> None:
                 "description": "RCT, DiD, IV, matching, контроль смещения и эндогенности. Как отвечать на «что будет, если…» и отличать корреляцию от причинности на продуктовых данных.",
                 "start_date": date(2026, 3, 2),
                 "end_date": date(2026, 5, 22),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Временные ряды и прогнозирование спроса",
                 "description": "Сезонность, тренды, окна и лаги, backtesting, прогнозные интервалы, метрики. Практика на задачах спроса, загрузки и планирования ресурсов.",
                 "start_date": date(2026, 3, 3),
                 "end_date": date(2026, 5, 23),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Рекомендательные системы: ранжирование и персонализация",
                 "description": "Collaborative filtering, implicit feedback, candidate generation и reranking, офлайн/онлайн метрики, холодный старт. Разбор ошибок и bias в рекомендациях.",
                 "start_date": date(2026, 3, 4),
                 "end_date": date(2026, 5, 24),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Обнаружение аномалий и мониторинг качества данных",
                 "description": "Аномалии в событиях, метриках и временных рядах: статистика и ML, пороги, алерты, suppression. Практика: мониторинг пайплайнов и витрин.",
                 "start_date": date(2026, 3, 5),
                 "end_date": date(2026, 5, 25),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Глубинное обучение на графовых данных: GNN и графы знаний",
                 "description": "Node/edge/graph tasks, message passing, link prediction, embeddings, построение и валидация графов знаний. Практикум на графах взаимодействий и онтологиях.",
                 "start_date": date(2026, 3, 6),
                 "end_date": date(2026, 5, 26),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Оптимизация обучения моделей: градиенты, регуляризация, устойчивость",
                 "description": "SGD/Adam, learning rate schedules, weight decay, early stopping, нормировки, стабильность обучения. Практика: быстрые baseline и диагностика сходимости.",
                 "start_date": date(2026, 3, 7),
                 "end_date": date(2026, 5, 27),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Обучение с подкреплением: основы и прикладной практикум",
                 "description": "MDP, value/policy methods, exploration, off-policy, оценка политики. Кейс-практика: оптимизация стратегии и контроль рисков в среде-симуляторе.",
                 "start_date": date(2026, 3, 8),
                 "end_date": date(2026, 5, 28),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Генеративные модели: диффузии, GAN и оценка качества",
                 "description": "Основные архитектуры генерации, устойчивость обучения, контроль артефактов, метрики и ручная оценка. Практика: генерация и редактирование изображений под кейс.",
                 "start_date": date(2026, 3, 9),
                 "end_date": date(2026, 5, 29),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Сжатие и ускорение моделей: pruning, quantization, distillation",
                 "description": "Компромисс качество/скорость/память: pruning, квантование, дистилляция, калибровка и профилирование. Практика: ускорение инференса под ограничения железа.",
                 "start_date": date(2026, 3, 10),
                 "end_date": date(2026, 5, 30),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Потоковая обработка данных: event streaming и near-real-time ETL",
                 "description": "Потоки событий, окна и watermark, дедупликация, exactly-once семантика, обработка поздних данных. Практика: сбор и расчёт метрик в режиме близком к real-time.",
                 "start_date": date(2026, 3, 11),
                 "end_date": date(2026, 5, 31),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Lakehouse-подход: витрины, версии данных и управление схемами",
                 "description": "Слои данных, контроль схем, эволюция и совместимость, контроль качества, каталоги и lineage. Практика: построение витрин и регламентов обновления.",
                 "start_date": date(2026, 3, 12),
                 "end_date": date(2026, 6, 1),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Векторные базы данных и семантический поиск для RAG",
                 "description": "Эмбеддинги, индексы, фильтры по метаданным, hybrid retrieval, reranking и оценка retrieval. Практика: построение поискового слоя и тест-наборов релевантности.",
                 "start_date": date(2026, 3, 13),
                 "end_date": date(2026, 6, 2),
-                "teacher_id": teacher_smolin.id,
+                "teacher_id": teacher_smolin["id"],
             },
             {
                 "name": "Data Mesh и продуктовый подход к данным",
                 "description": "Домены, data products, контракты, каталогизация, ownership и ответственность. Практика: дизайн доменной модели, SLA по данным и схема взаимодействий команд.",
                 "start_date": date(2026, 3, 14),
                 "end_date": date(2026, 6, 3),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "Визуализация данных и UX дашбордов для принятия решений",
                 "description": "Информационная архитектура дашборда, выбор графиков, когнитивные ошибки, storytelling и проверка интерпретаций. Практика: дашборд под KPI и сценарии.",
                 "start_date": date(2026, 3, 15),
                 "end_date": date(2026, 6, 4),
-                "teacher_id": teacher_fedorova.id,
+                "teacher_id": teacher_fedorova["id"],
             },
             {
                 "name": "Платформа экспериментов: инфраструктура A/B и статистический контроль",
                 "description": "Сплит трафика, guardrails, SRM, sequential testing, power analysis, сегментация. Практика: настройка протоколов и отчётов эксперимента в прод-цикле.",
                 "start_date": date(2026, 3, 16),
                 "end_date": date(2026, 6, 5),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Responsible AI: fairness, интерпретация и управление рисками",
                 "description": "Справедливость и смещения, explainability, документация моделей, контроль рисков и процессы согласования. Практика: чек-листы и аудит модели по сегментам.",
                 "start_date": date(2026, 9, 7),
                 "end_date": date(2026, 12, 1),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Privacy-preserving ML: дифференциальная приватность и федеративное обучение",
                 "description": "DP-интуиция, шумовые механизмы, приватные запросы, федеративные схемы, trade-off полезность/приватность. Практика: настройка приватности и оценка потерь качества.",
                 "start_date": date(2026, 9, 8),
                 "end_date": date(2026, 12, 2),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Кибербезопасность данных: доступ, аудит, DLP и инциденты",
                 "description": "Модели доступа, минимальные привилегии, аудит, классификация данных, предотвращение утечек, реагирование на инциденты. Практика: политики и журналирование действий.",
                 "start_date": date(2026, 9, 9),
                 "end_date": date(2026, 12, 3),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Performance engineering: нагрузочное тестирование и профилирование backend",
                 "description": "Нагрузочные профили, latency percentiles, узкие места, профилирование, кэширование, оптимизация запросов. Практика: план performance-тестов и отчёты деградации.",
                 "start_date": date(2026, 9, 10),
                 "end_date": date(2026, 12, 4),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Контейнеризация и оркестрация: Docker и Kubernetes для сервисов",
                 "description": "Образы и слои, секреты, healthchecks, autoscaling, rolling updates, observability. Практика: деплой сервиса с конфигами, лимитами и мониторингом.",
                 "start_date": date(2026, 9, 11),
                 "end_date": date(2026, 12, 5),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "Event-driven архитектуры: очереди, ретраи и SAGA-паттерны",
                 "description": "Асинхронные интеграции, очереди, гарантия доставки, идемпотентность, согласованность и компенсирующие транзакции. Практика: сценарии сбоев и восстановление.",
                 "start_date": date(2026, 9, 12),
                 "end_date": date(2026, 12, 6),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Domain-Driven Design и микросервисное проектирование",
                 "description": "Bounded contexts, агрегаты, контракты, антикоррупционные слои, интеграционные события. Практика: декомпозиция монолита и карта доменов под продукт.",
                 "start_date": date(2026, 9, 13),
                 "end_date": date(2026, 12, 7),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             },
             {
                 "name": "Процессы разметки и качество датасетов: QA, adjudication, active learning",
                 "description": "Инструкции разметчикам, согласованность, gold set, разбор конфликтов, циклы активного обучения. Практика: настройка пайплайна разметки и метрик качества данных.",
                 "start_date": date(2026, 9, 14),
                 "end_date": date(2026, 12, 8),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Оценка качества LLM: тест-наборы, регрессии и human review",
                 "description": "Golden set, сценарии, автоматические метрики, judge-модели, ручная проверка и разбор ошибок. Практика: построение протокола оценки и отчёта по релизу.",
                 "start_date": date(2026, 9, 15),
                 "end_date": date(2026, 12, 9),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Prompt engineering: системные промпты, шаблоны и контроль ответов",
                 "description": "Структурирование промптов, роли и ограничения, JSON-вывод, защитные шаблоны, оценка устойчивости. Практика: библиотека промптов и тесты на инъекции.",
                 "start_date": date(2026, 9, 16),
                 "end_date": date(2026, 12, 10),
-                "teacher_id": teacher_gromov.id,
+                "teacher_id": teacher_gromov["id"],
             },
             {
                 "name": "Модели риска и финансовая аналитика на данных",
                 "description": "Риск-метрики, скоринг, стабильность, дрейф, стресс-тесты, интерпретация. Практика: построение baseline-модели и отчёта для риск-комитета.",
                 "start_date": date(2026, 9, 17),
                 "end_date": date(2026, 12, 11),
-                "teacher_id": teacher_irina.id,
+                "teacher_id": teacher_irina["id"],
             },
             {
                 "name": "Компьютерное зрение для документов: OCR, поля и валидация",
                 "description": "Распознавание текста, детекция блоков, извлечение полей, пост-валидация и обработка ошибок. Практика: пайплайн «скан → структурированный JSON».",
                 "start_date": date(2026, 9, 18),
                 "end_date": date(2026, 12, 12),
-                "teacher_id": teacher_mironova.id,
+                "teacher_id": teacher_mironova["id"],
             },
             {
                 "name": "Речевые технологии: ASR, diarization и качество распознавания",
                 "description": "ASR-пайплайны, шум и домены, диаризация, метрики (WER), пост-обработка и пользовательские словари. Практика: улучшение качества на реальных записях.",
                 "start_date": date(2026, 9, 19),
                 "end_date": date(2026, 12, 13),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Edge AI: внедрение моделей на устройствах и контроль задержек",
                 "description": "ONNX, оптимизация графа, ускорение инференса, профилирование latency, энергопотребление и обновления моделей. Практика: упаковка модели и тесты производительности.",
                 "start_date": date(2026, 9, 20),
                 "end_date": date(2026, 12, 14),
-                "teacher_id": teacher_sidorov.id,
+                "teacher_id": teacher_sidorov["id"],
             },
             {
                 "name": "LLM-агенты в корпоративных процессах: интеграции, права и комплаенс",
                 "description": "Интеграция с внутренними системами, разграничение доступа, журналирование, комплаенс и управление знаниями. Практика: дизайн агента с политиками доступа и аудитом действий.",
                 "start_date": date(2026, 9, 21),
                 "end_date": date(2026, 12, 15),
-                "teacher_id": teacher_belyaeva.id,
+                "teacher_id": teacher_belyaeva["id"],
             },
             {
                 "name": "Моделирование данных и аналитическая инженерия (dbt-подход)",
                 "description": "Слои модели данных, тесты, документация, lineage и выпуск витрин. Практика: проектирование витрин под KPI и контроль качества на уровне модели.",
                 "start_date": date(2026, 9, 22),
                 "end_date": date(2026, 12, 16),
-                "teacher_id": teacher_b.id,
+                "teacher_id": teacher_b["id"],
             },
             {
                 "name": "Инженерия метаданных: каталоги, lineage и управление изменениями",
                 "description": "Метаданные как продукт: каталогизация, владельцы, lineage, impact analysis, правила именования и миграции. Практика: регламенты и инструменты контроля изменений.",
                 "start_date": date(2026, 9, 23),
                 "end_date": date(2026, 12, 17),
-                "teacher_id": teacher_kuznetsova.id,
+                "teacher_id": teacher_kuznetsova["id"],
             },
             {
                 "name": "Системы хранения: NoSQL, поисковые движки и выбор технологий",
                 "description": "Ключ-значение, документо-ориентированные БД, поисковые индексы, транзакции и консистентность. Практика: выбор хранилища под сценарии и нагрузочные требования.",
                 "start_date": date(2026, 9, 24),
                 "end_date": date(2026, 12, 18),
-                "teacher_id": teacher_ivanov.id,
+                "teacher_id": teacher_ivanov["id"],
             }
         ]
 
+        # копии курсов идут блоками после оригиналов; демо-курсы — первые
+        # DEMO_COURSES курсов каждого блока
         courses = []
-        for c in courses_data:
-            course = Course(
-                name=c["name"],
-                description=c["description"],
-                start_date=c["start_date"],
-                end_date=c["end_date"],
-                is_active=True,
-                teacher_id=c["teacher_id"],
-            )
-            db.add(course)
-            db.flush()
-            courses.append(course)
-
-        db.commit()
+        demo_course_ids = set()
+        for k in range(scale):
+            for i, c in enumerate(courses_data):
+                course = {
+                    "id": len(courses) + 1,
+                    "name": c["name"] if k == 0 else f"{c['name']} (поток {k + 1})",
+                    "description": c["description"],
+                    "start_date": c["start_date"],
+                    "end_date": c["end_date"],
+                    "is_active": True,
+                    "teacher_id": c["teacher_id"],
+                }
+                courses.append(course)
+                if i < DEMO_COURSES:
+                    demo_course_ids.add(course["id"])
 
 
         ''' План уроков lessons_plan (темы/даты/аудитории) '''
@@ -3770,14 +3790,12 @@ def run_seed() -> None:
         lessons = []
         rng_lessons = random.Random(SEED_LESSONS)
 
-        demo_course_ids = {c.id for c in courses[:DEMO_COURSES]}
-
         for course in courses:
-            n_lessons = LESSONS_PER_COURSE if course.id in demo_course_ids else 2
-            base_date = course.start_date
+            n_lessons = LESSONS_PER_COURSE if course["id"] in demo_course_ids else 2
+            base_date = course["start_date"]
 
             for n in range(n_lessons):
-                topic, _, room = lessons_plan[(course.id + n) % len(lessons_plan)]
+                topic, _, room = lessons_plan[(course["id"] + n) % len(lessons_plan)]
                 d = base_date + timedelta(days=7 * n)
 
                 slot = rng_lessons.randrange(3)
@@ -3788,36 +3806,33 @@ def run_seed() -> None:
                 else:
                     st, et = time(11, 0), time(12, 30)
 
-                l = Lesson(
-                    course_id=course.id,
-                    topic=topic,
-                    date=d,
-                    room=room,
-                    start_time=st,
-                    end_time=et,
+                lessons.append(
+                    {
+                        "id": len(lessons) + 1,
+                        "course_id": course["id"],
+                        "topic": topic,
+                        "date": d,
+                        "room": room,
+                        "start_time": st,
+                        "end_time": et,
+                    }
                 )
-                db.add(l)
-                db.flush()
-                lessons.append(l)
-
-        db.commit()
 
         ''' Посещаемость (Attendance): выбор студентов, статусы, генерация отметок '''
         rng_att = random.Random(SEED_ATTENDANCE)
 
         all_students = sorted(
-            [u for u in users.values() if u.role == ROLE_STUDENT],
-            key=lambda u: u.id,
+            [u for u in users.values() if u["role"] == ROLE_STUDENT],
+            key=lambda u: u["id"],
         )
 
-        demo_courses = courses[:DEMO_COURSES]
-        demo_course_ids = {c.id for c in demo_courses}
+        demo_courses = [c for c in courses if c["id"] in demo_course_ids]
 
         students_by_course = {}
 
         k_students = min(STUDENTS_PER_COURSE, len(all_students))
         for c in demo_courses:
-            students_by_course[c.id] = rng_att.sample(all_students, k=k_students)
+            students_by_course[c["id"]] = rng_att.sample(all_students, k=k_students)
 
         students = all_students[:k_students]
 
@@ -3850,8 +3865,8 @@ def run_seed() -> None:
 
         lessons_by_course = {}
         for lesson in lessons:
-            if lesson.course_id in demo_course_ids:
-                lessons_by_course.setdefault(lesson.course_id, []).append(lesson)
+            if lesson["course_id"] in demo_course_ids:
+                lessons_by_course.setdefault(lesson["course_id"], []).append(lesson)
 
         comments_by_status = {}
         for st, comment in status_matrix:
@@ -3863,11 +3878,11 @@ def run_seed() -> None:
         for s in all_students:
             r = rng_status.random()
             if r < 0.10:
-                profile[s.id] = (0.55, 0.10, 0.25, 0.10)
+                profile[s["id"]] = (0.55, 0.10, 0.25, 0.10)
             elif r < 0.35:
-                profile[s.id] = (0.78, 0.10, 0.08, 0.04)
+                profile[s["id"]] = (0.78, 0.10, 0.08, 0.04)
             else:
-                profile[s.id] = (0.90, 0.06, 0.03, 0.01)
+                profile[s["id"]] = (0.90, 0.06, 0.03, 0.01)
 
         def pick_status(student_id, is_event, last_status, streak_absent, streak_late):
             p_present, p_late, p_absent, p_excused = profile[student_id]
@@ -3911,48 +3926,38 @@ def run_seed() -> None:
 
             return status, comment
 
-        BATCH = 5000
-        rows = []
-
-        for course_id, course_lessons in lessons_by_course.items():
-            course_lessons = sorted(course_lessons, key=lambda x: x.date)
-            course_students = students_by_course.get(course_id, [])
-            for student in course_students:
-                last_status = None
-                streak_absent = 0
-                streak_late = 0
-                for lesson in course_lessons:
-                    # Determine if lesson is an event (check if topic contains event-related keywords)
-                    is_event = "событие" in lesson.topic.lower() or "event" in lesson.topic.lower() or "мероприятие" in lesson.topic.lower()
-                    
-                    st, comment = pick_status(student.id, is_event, last_status, streak_absent, streak_late)
-                    
-                    # Update streaks and last_status
-                    if st == AttendanceStatus.absent:
-                        streak_absent += 1
-                        streak_late = 0
-                    elif st == AttendanceStatus.late:
-                        streak_late += 1
-                        streak_absent = 0
-                    else:
-                        streak_absent = 0
-                        streak_late = 0
-                    last_status = st
-                    rows.append(
-                        {
-                            "lesson_id": lesson.id,
-                            "student_id": student.id,
+        def attendance_rows():
+            for course_id, course_lessons in lessons_by_course.items():
+                course_lessons = sorted(course_lessons, key=lambda x: x["date"])
+                course_students = students_by_course.get(course_id, [])
+                for student in course_students:
+                    last_status = None
+                    streak_absent = 0
+                    streak_late = 0
+                    for lesson in course_lessons:
+                        # Determine if lesson is an event (check if topic contains event-related keywords)
+                        topic = lesson["topic"].lower()
+                        is_event = "событие" in topic or "event" in topic or "мероприятие" in topic
+
+                        st, comment = pick_status(student["id"], is_event, last_status, streak_absent, streak_late)
+
+                        # Update streaks and last_status
+                        if st == AttendanceStatus.absent:
+                            streak_absent += 1
+                            streak_late = 0
+                        elif st == AttendanceStatus.late:
+                            streak_late += 1
+                            streak_absent = 0
+                        else:
+                            streak_absent = 0
+                            streak_late = 0
+                        last_status = st
+                        yield {
+                            "lesson_id": lesson["id"],
+                            "student_id": student["id"],
                             "status": st,
                             "comment": comment,
                         }
-                    )
-                    if len(rows) >= BATCH:
-                        db.bulk_insert_mappings(Attendance, rows)
-                        rows.clear()
-
-        if rows:
-            db.bulk_insert_mappings(Attendance, rows)
-        db.commit()
 
         ''' Фидбек (Feedback): шаблоны, рейтинги, комменты, генерация записей '''
         feedback_samples = [
@@ -3984,16 +3989,14 @@ def run_seed() -> None:
 
         rng_fb = random.Random(SEED_FEEDBACK)
 
-        demo_course_ids = {c.id for c in courses[:DEMO_COURSES]}
-
-        demo_lessons = [l for l in lessons if l.course_id in demo_course_ids]
-        demo_lessons = sorted(demo_lessons, key=lambda x: (x.course_id, x.date, x.id))
+        demo_lessons = [l for l in lessons if l["course_id"] in demo_course_ids]
+        demo_lessons = sorted(demo_lessons, key=lambda x: (x["course_id"], x["date"], x["id"]))
 
         demo_students_map = {}
         for cid, lst in students_by_course.items():
             for s in lst:
-                demo_students_map[s.id] = s
-        demo_students = sorted(demo_students_map.values(), key=lambda u: u.id)
+                demo_students_map[s["id"]] = s
+        demo_students = sorted(demo_students_map.values(), key=lambda u: u["id"])
 
         students_for_feedback = demo_students[: min(FEEDBACK_STUDENTS, len(demo_students))]
         lessons_for_feedback = demo_lessons
@@ -4026,16 +4029,14 @@ def run_seed() -> None:
             suf = rng_fb.choice(suffixes) if rng_fb.random() < 0.35 else ""
             return (pre + base + suf).strip()
 
-        created_fb = 0
-        k = 0
+        feedback_target = FEEDBACK_TARGET * scale
 
-        BATCH = 5000
-        rows = []
-        if lessons_for_feedback and students_for_feedback:
+        def feedback_rows():
+            created_fb = 0
             for lesson in lessons_for_feedback:
                 for student in students_for_feedback:
-                    if created_fb >= FEEDBACK_TARGET:
-                        break
+                    if created_fb >= feedback_target:
+                        return
                     if rng_fb.random() < 0.15:
                         continue
 
@@ -4047,29 +4048,28 @@ def run_seed() -> None:
                     if r > 5.0:
                         r = 5.0
 
-                    rows.append(
-                        {
-                            "lesson_id": lesson.id,
-                            "student_id": student.id,
-                            "rating": round(r, 1),
-                            "comment": text_,
-                        }
-                    )
+                    yield {
+                        "lesson_id": lesson["id"],
+                        "student_id": student["id"],
+                        "rating": round(r, 1),
+                        "comment": text_,
+                    }
                     created_fb += 1
 
-                    if len(rows) >= BATCH:
-                        db.bulk_insert_mappings(Feedback, rows)
-                        rows.clear()
-
-                if created_fb >= FEEDBACK_TARGET:
-                    break
-
-            if rows:
-                db.bulk_insert_mappings(Feedback, rows)
+        ''' Загрузка: одна транзакция, индексы перестраиваются после вставки '''
+        started = timer.perf_counter()
+        tables = [User.__table__, Course.__table__, Lesson.__table__, Attendance.__table__, Feedback.__table__]
+        with BulkLoader(db, tables) as loader:
+            loader.load(User.__table__, users.values())
+            loader.load(Course.__table__, courses)
+            loader.load(Lesson.__table__, lessons)
+            loader.load(Attendance.__table__, attendance_rows())
+            loader.load(Feedback.__table__, feedback_rows())
+            loader.finish()
+            rebuild_attendance_rollup(db)
+            rebuild_feedback_rollup(db)
             db.commit()
-
-
-        db.commit()
+        print(f"seeded in {timer.perf_counter() - started:.1f}s: {loader.counts}")
 
 
     except Exception:
@@ -4080,5 +4080,12 @@ def run_seed() -> None:
 
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="10/100 for 10x/100x data")
+    args = parser.parse_args()
+    run_seed(args.scale)
+
+
 if __name__ == "__main__":
-    run_seed()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import csv
+import enum
+import io
+from datetime import date, datetime, time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import Index, Table, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.services.cache_service import note_table_writes
+
+# rows per executemany / COPY chunk
+BATCH_SIZE = 20000
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_value(value) -> str:
+    # text for COPY ... (FORMAT csv, NULL '\N'); enums are stored by name
+    # like SQLAlchemy's Enum type does
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+
+class BulkLoader:
+    # Streams generated rows into freshly created tables inside the session's
+    # transaction: COPY ... FROM STDIN on PostgreSQL, batched DBAPI executemany
+    # with relaxed durability on SQLite. Secondary indexes of `tables` are dropped
+    # up front and rebuilt by finish(), once all rows are in. Rows are dicts;
+    # columns missing from the first row of a load get their Python default
+    # evaluated once for the whole load. Use it as a context manager and
+    # commit after finish(); leaving the block restores the SQLite pragma.
+    # Committing in between is fine (e.g. to let other connections write
+    # into the tables before finish()).
+
+    def __init__(self, db: Session, tables: Sequence[Table], batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.tables = list(tables)
+        self.batch_size = batch_size
+        self.dialect = db.get_bind().dialect.name
+        self._indexes: List[Index] = []
+        self._relaxed_connection = None
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def conn(self):
+        return self.db.connection()
+
+    @property
+    def _dbapi_connection(self):
+        return self.conn.connection.dbapi_connection
+
+    def __enter__(self) -> "BulkLoader":
+        if self.dialect == "sqlite":
+            # the data is regenerated on failure anyway, so skip the fsyncs
+            self.conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            self._relaxed_connection = self._dbapi_connection
+        elif self.dialect == "postgresql":
+            self.conn.exec_driver_sql("SET LOCAL synchronous_commit = off")
+        for table in self.tables:
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                index.drop(self.conn, checkfirst=True)
+                self._indexes.append(index)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.db.rollback()
+        if self._relaxed_connection is not None:
+            # synchronous cannot change inside a transaction, hence after commit
+            cursor = self._relaxed_connection.cursor()
+            cursor.execute(f"PRAGMA synchronous={get_settings().sqlite_synchronous}")
+            cursor.close()
+
+    def _defaults(self, table: Table, present: Iterable[str]) -> dict:
+        present = set(present)
+        out = {}
+        for column in table.columns:
+            if column.name in present or column.default is None or column.primary_key:
+                continue
+            arg = column.default.arg
+            out[column.name] = arg(None) if callable(arg) else arg
+        return out
+
+    def load(self, table: Table, rows: Iterable[dict]) -> int:
+        total = 0
+        columns = defaults = None
+        for batch in _batches(rows, self.batch_size):
+            if columns is None:
+                defaults = self._defaults(table, batch[0])
+                columns = list(batch[0])
+            if self.dialect == "postgresql":
+                self._copy(table, columns, defaults, batch)
+            elif self.dialect == "sqlite":
+                self._executemany(table, columns, defaults, batch)
+            else:
+                self.db.execute(insert(table), [{**row, **defaults} for row in batch])
+            total += len(batch)
+        # COPY and the raw executemany bypass the ORM, so mark the table here
+        note_table_writes(self.db, [table.name])
+        self.counts[table.name] = self.counts.get(table.name, 0) + total
+        return total
+
+    def _executemany(self, table: Table, columns: List[str], defaults: dict, batch: List[dict]) -> None:
+        # plain DBAPI executemany with the column types' bind processors,
+        # the constant defaults are processed once per batch
+        dialect = self.conn.dialect
+        processors = [table.c[name].type._cached_bind_processor(dialect) for name in columns]
+        tail = []
+        for name, value in defaults.items():
+            process = table.c[name].type._cached_bind_processor(dialect)
+            tail.append(process(value) if process and value is not None else value)
+        tail = tuple(tail)
+        names = [*columns, *defaults]
+        sql = f"INSERT INTO {table.name} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        params = [
+            tuple(
+                process(row[name]) if process and row[name] is not None else row[name]
+                for name, process in zip(columns, processors)
+            )
+            + tail
+            for row in batch
+        ]
+        cursor = self._dbapi_connection.cursor()
+        try:
+            cursor.executemany(sql, params)
+        finally:
+            cursor.close()
+
+    def _copy(self, table: Table, columns: List[str], defaults: dict, batch: List[dict]) -> None:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        tail = [_copy_value(value) for value in defaults.values()]
+        for row in batch:
+            writer.writerow([*(_copy_value(row[name]) for name in columns), *tail])
+        sql = f"COPY {table.name} ({', '.join([*columns, *defaults])}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        cursor = self._dbapi_connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2
+                buf.seek(0)
+                cursor.copy_expert(sql, buf)
+            else:
+                # psycopg 3, SQLAlchemy's default postgresql:// driver
+                with cursor.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+        finally:
+            cursor.close()
+
+    def finish(self) -> None:
+        for index in self._indexes:
+            index.create(self.conn)
+        self._indexes.clear()
+        if self.dialect == "postgresql":
+            # explicit ids leave the serial sequences behind (MAX of an empty
+            # table is NULL, which setval ignores)
+            for table in self.tables:
+                self.conn.execute(
+                    text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), MAX(id)) FROM {table.name}")
+                )
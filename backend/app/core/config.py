@@ -13,8 +13,58 @@ class Settings:
         self.algorithm = os.getenv("JWT_ALGORITHM", "HS256")
         self.access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+        # serve the dashboard read endpoints through an async engine (aiosqlite / asyncpg)
+        self.database_async = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+        # connection pool (QueuePool); statement timeout applies to PostgreSQL only, 0 = none
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout_seconds = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+        self.db_pool_recycle_seconds = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+        self.db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+        self.db_statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+        # SQLite connection pragmas
+        self.sqlite_journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+        self.sqlite_busy_timeout_ms = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.sqlite_cache_size_kb = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+        self.sqlite_mmap_size_mb = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
         origins = os.getenv("BACKEND_CORS_ORIGINS", "")
         self.backend_cors_origins = [o.strip() for o in origins.split(",") if o.strip()]
+        self.risk_model_dir = os.getenv("RISK_MODEL_DIR", "./risk_models")
+        self.risk_model_max_age_seconds = int(os.getenv("RISK_MODEL_MAX_AGE_SECONDS", "3600"))
+        self.risk_retrain_after_writes = int(os.getenv("RISK_RETRAIN_AFTER_WRITES", "200"))
+        self.risk_model_cache_size = int(os.getenv("RISK_MODEL_CACHE_SIZE", "64"))
+        self.export_dir = os.getenv("EXPORT_DIR", "./exports")
+        self.export_job_ttl_seconds = int(os.getenv("EXPORT_JOB_TTL_SECONDS", "86400"))
+        self.export_workers = int(os.getenv("EXPORT_WORKERS", "2"))
+        # how often expired export jobs and their files are purged
+        self.export_purge_interval_seconds = int(os.getenv("EXPORT_PURGE_INTERVAL_SECONDS", "300"))
+        # list endpoints: page size when ?limit= is omitted (unset = whole result) and its upper bound
+        default_page_size = os.getenv("DEFAULT_PAGE_SIZE", "")
+        self.default_page_size = int(default_page_size) if default_page_size else None
+        self.max_page_size = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+        # number of uvicorn worker processes (uvicorn reads the same variable as its --workers default)
+        self.web_concurrency = int(os.getenv("WEB_CONCURRENCY", "1"))
+        # analytics response cache: memory (per process), sqlite (shared by the workers on a host) or none;
+        # it also keeps the change versions behind ETags, which with several workers must be sqlite
+        self.analytics_cache_backend = os.getenv("ANALYTICS_CACHE_BACKEND", "memory").lower()
+        self.analytics_cache_path = os.getenv("ANALYTICS_CACHE_PATH", "./analytics_cache.db")
+        self.analytics_cache_ttl_seconds = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "60"))
+        self.analytics_cache_max_entries = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1024"))
+        self.analytics_cache_max_bytes = int(os.getenv("ANALYTICS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        # authenticated users (role, is_active, owned courses); 0 disables the cache
+        self.principal_cache_ttl_seconds = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+        self.principal_cache_max_entries = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "4096"))
+        # per-request SQL count/time: Server-Timing header and GET /system/queries (last N requests)
+        self.query_stats_enabled = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+        self.query_stats_history = int(os.getenv("QUERY_STATS_HISTORY", "200"))
+        # Prometheus text metrics at GET /metrics, off unless enabled (METRICS_TOKEN =
+        # required bearer token); with several uvicorn workers set METRICS_DIR so
+        # each scrape covers all of them
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+        self.metrics_token = os.getenv("METRICS_TOKEN", "")
+        self.metrics_dir = os.getenv("METRICS_DIR", "")
+        self.metrics_flush_seconds = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,20 +1,100 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import get_settings
+from app.core.pool import TimedAsyncQueuePool, TimedQueuePool
+from app.core.querystats import instrument_engine
 
 settings = get_settings()
 
-connect_args = {}
-if settings.database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+# async counterpart of DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
 
-engine = create_engine(settings.database_url, connect_args=connect_args)
+
+def async_database_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "postgres":
+        dialect = "postgresql"
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"no async driver for {scheme}")
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    # pool and driver settings for create_engine / create_async_engine
+    parsed = make_url(url)
+    options = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle_seconds}
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        if parsed.database in (None, "", ":memory:"):
+            # in-memory databases keep SQLAlchemy's single-connection pools
+            options["connect_args"] = connect_args
+            return options
+    elif parsed.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms > 0:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    options.update(
+        connect_args=connect_args,
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    # negative cache_size is in KiB
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_pragmas)
+if settings.query_stats_enabled:
+    instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_url = async_database_url(settings.database_url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+    if settings.query_stats_enabled:
+        instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_status() -> list:
+    # checkout/overflow gauges and the checkout wait histogram of each engine
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    out = []
+    for e in engines:
+        metrics = getattr(type(e.pool), "metrics", None)
+        if metrics is not None:
+            out.append(metrics.snapshot(e.pool))
+    return out
+
 
 def get_db() -> Generator:
     db = SessionLocal()
@@ -22,3 +102,8 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
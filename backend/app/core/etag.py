@@ -0,0 +1,79 @@
+import hashlib
+from typing import Callable, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.core.security import get_current_user
+from app.models.user import User
+from app.services.cache_service import EPOCH_VERSION, analytics_cache, table_version, versions_shared
+
+ETAG_HEADER = "ETag"
+# the browser may keep the body but has to revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etags_enabled() -> bool:
+    # With the memory backend and several workers (WEB_CONCURRENCY > 1) each
+    # worker has its own change versions, and one that never saw a write would
+    # confirm stale data with 304 indefinitely. A single worker, or the sqlite
+    # backend shared by all of them, is safe.
+    return versions_shared
+
+
+def compute_etag(request: Request, user: User, keys: Sequence[str]) -> str:
+    # Derived from the request and the change versions of everything the
+    # response is read from; the body itself is never built or hashed.
+    versions = analytics_cache.versions([EPOCH_VERSION, *keys])
+    parts = [
+        request.url.path,
+        "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items())),
+        f"user={user.id}",
+        f"role={user.role}",
+        *(f"{k}={v}" for k, v in zip([EPOCH_VERSION, *keys], versions)),
+    ]
+    return '"' + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest() + '"'
+
+
+def conditional_get(*tables: str, keys: Sequence[str] = (), auth: Callable = get_current_user) -> Callable:
+    # Route dependency: answers If-None-Match with 304 before the endpoint
+    # queries anything, otherwise sets ETag on the response. `tables` (and the
+    # extra version `keys`) must cover every table the response is read from,
+    # since any committed write to them changes the ETag. `auth` is the
+    # route's own user dependency, so the user is resolved once per request.
+    # Without a shared version store (etags_enabled) it sets no headers and
+    # returns None.
+    version_keys = [*map(table_version, tables), *keys]
+
+    # no DB access: runs on the event loop instead of taking a threadpool slot
+    async def dependency(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(auth),
+    ) -> Optional[str]:
+        if not etags_enabled():
+            return None
+        etag = compute_etag(request, current_user, version_keys)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL},
+            )
+        response.headers[ETAG_HEADER] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return etag
+
+    return dependency
@@ -0,0 +1,311 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.querystats import route_template
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# upper bounds (seconds) of the request latency histogram buckets, the last one is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# How the samples of one family are combined across the running worker
+# processes: "sum" adds them up, "max" takes the largest value (state shared
+# by the workers, e.g. the sqlite cache backend). The counters of a worker
+# that exited go with it, which Prometheus reads as a counter reset.
+AGGREGATIONS = ("sum", "max")
+
+
+class Family:
+    # One metric name and its samples by label values. inc/observe take no
+    # lock unless `threadsafe`: the request families are only touched from
+    # the event loop thread, which keeps the per-request cost to a few dict
+    # operations.
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+        aggregate: str = "sum",
+        threadsafe: bool = False,
+    ):
+        assert kind in ("counter", "gauge", "histogram") and aggregate in AGGREGATIONS
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) if buckets is not None else None
+        self.aggregate = aggregate
+        self.samples: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock() if threadsafe else None
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        if self._lock is None:
+            self.samples[labels] = self.samples.get(labels, 0) + amount
+            return
+        with self._lock:
+            self.samples[labels] = self.samples.get(labels, 0) + amount
+
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        self.samples[labels] = value
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        # histogram samples are [count per bucket..., +Inf count, sum]
+        if self._lock is None:
+            self._observe(labels, value)
+            return
+        with self._lock:
+            self._observe(labels, value)
+
+    def _observe(self, labels: Tuple[str, ...], value: float) -> None:
+        sample = self.samples.get(labels)
+        if sample is None:
+            sample = self.samples[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        sample[bisect.bisect_left(self.buckets, value)] += 1
+        sample[-1] += value
+
+    def snapshot(self) -> dict:
+        items = list(self.samples.items())
+        return {
+            "kind": self.kind,
+            "help": self.help,
+            "labels": self.labels,
+            "buckets": self.buckets,
+            "aggregate": self.aggregate,
+            "samples": [[list(key), list(value) if isinstance(value, list) else value] for key, value in items],
+        }
+
+
+class MetricsRegistry:
+    # The metric families of this process. Collectors run before every
+    # snapshot to copy state kept elsewhere (pool, caches) into gauges.
+
+    def __init__(self):
+        self.families: Dict[str, Family] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def family(self, name: str, kind: str, help: str, **kwargs) -> Family:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = Family(name, kind, help, **kwargs)
+        return family
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("metrics collector failed")
+        return {name: family.snapshot() for name, family in list(self.families.items())}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SnapshotStore:
+    # One JSON snapshot per worker process in `directory`, rewritten every
+    # `interval` seconds by a daemon thread and on each scrape served by the
+    # process. Any worker can answer GET /metrics by merging all of them;
+    # the snapshot of a process that is no longer running is deleted.
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def write(self, snapshot: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def ensure_flusher(self, registry: MetricsRegistry) -> None:
+        # started lazily: uvicorn imports the app in each worker, and a
+        # forked worker does not inherit the parent's threads
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._flush_loop, args=(registry,), name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self, registry: MetricsRegistry) -> None:
+        while True:
+            try:
+                self.write(registry.snapshot())
+            except Exception:
+                logger.exception("metrics snapshot write failed")
+            time.sleep(self.interval)
+
+    def others(self) -> Iterable[dict]:
+        # snapshots of the other running workers
+        own = os.getpid()
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                pid = int(os.path.basename(path)[: -len(".json")])
+            except ValueError:
+                continue
+            if pid == own:
+                continue
+            if not _pid_alive(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            yield snapshot
+
+
+def merge(snapshots: Iterable[dict]) -> Dict[str, dict]:
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            samples = target["samples"]
+            for key, value in family["samples"]:
+                key = tuple(key)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    samples[key] = [a + b for a, b in zip(current, value)]
+                elif family["aggregate"] == "max":
+                    samples[key] = max(current, value)
+                else:
+                    samples[key] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def render(families: Dict[str, dict]) -> str:
+    # Prometheus text exposition format 0.0.4
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for key in sorted(family["samples"]):
+            value = family["samples"][key]
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_labels(family['labels'], key)} {_number(value)}")
+                continue
+            total = 0
+            for bound, count in zip((*map(_number, family["buckets"]), "+Inf"), value[:-1]):
+                total += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(family['labels'], key, le)} {total}")
+            lines.append(f"{name}_sum{_labels(family['labels'], key)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(family['labels'], key)} {total}")
+    return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+_settings = get_settings()
+snapshot_store = SnapshotStore(_settings.metrics_dir, _settings.metrics_flush_seconds) if _settings.metrics_dir else None
+
+http_requests = metrics_registry.family(
+    "http_requests_total", "counter", "HTTP requests by route template and status.", labels=("method", "route", "status")
+)
+http_duration = metrics_registry.family(
+    "http_request_duration_seconds",
+    "histogram",
+    "HTTP request latency until the response is fully sent.",
+    labels=("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+http_in_flight = metrics_registry.family(
+    "http_requests_in_flight", "gauge", "HTTP requests being served.", labels=("method",)
+)
+
+
+def collect() -> str:
+    # this process, plus the snapshots of the other workers with METRICS_DIR
+    snapshot = metrics_registry.snapshot()
+    if snapshot_store is None:
+        return render(merge([snapshot]))
+    try:
+        snapshot_store.write(snapshot)
+    except OSError:
+        logger.exception("metrics snapshot write failed")
+    return render(merge([snapshot, *snapshot_store.others()]))
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware recording per-route request counts and latency
+    # histograms and the number of requests in flight. Everything runs on
+    # the event loop thread, so the counters need no locks.
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if snapshot_store is not None:
+            snapshot_store.ensure_flusher(metrics_registry)
+        method = (scope["method"],)
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.inc(method, -1)
+            route = route_template(scope)
+            http_duration.observe((scope["method"], route), time.perf_counter() - started)
+            http_requests.inc((scope["method"], route, str(status_code)))
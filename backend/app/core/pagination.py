@@ -0,0 +1,159 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query as OrmQuery
+
+from app.core.config import get_settings
+
+# response headers: cursor of the next page (absent on the last page) and, when
+# asked for, the total number of rows matching the filters
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATE_HEADER = "X-Total-Count-Estimate"
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, TOTAL_ESTIMATE_HEADER]
+
+_settings = get_settings()
+MAX_PAGE_SIZE = _settings.max_page_size
+# bound parameters beyond a signed 64-bit integer overflow the drivers
+_INT_MIN, _INT_MAX = -(2**63), 2**63 - 1
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("unknown cursor value")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _matches(value: Any, expected: Optional[type]) -> bool:
+    if expected is None:
+        return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+    if expected is int:
+        return type(value) is int and _INT_MIN <= value <= _INT_MAX
+    if expected is date:
+        return type(value) is date
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, types: Sequence[Optional[type]]) -> List[Any]:
+    # `types` holds the Python type each key value must have (None: any scalar);
+    # a hand-made cursor must not reach the database with the wrong types
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        values = [_decode_value(v) for v in values] if isinstance(values, list) else None
+    except (ValueError, TypeError):
+        values = None
+    if (
+        values is None
+        or len(values) != len(types)
+        or not all(_matches(v, t) for v, t in zip(values, types))
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def _key_type(key) -> Optional[type]:
+    try:
+        return key.type.python_type
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+class PageParams:
+    # Query parameters shared by list endpoints: ?limit=&cursor=&total=exact|estimate
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        total: Optional[str] = Query(None, regex="^(exact|estimate)$"),
+    ):
+        self.limit = limit if limit is not None else _settings.default_page_size
+        self.cursor = cursor
+        self.total = total
+
+
+def keyset_page(
+    query: OrmQuery,
+    keys: Sequence,
+    cursor: Optional[str],
+    limit: Optional[int],
+    descending: bool = False,
+    cursor_of: Optional[Callable[[Any], Sequence[Any]]] = None,
+):
+    # Orders `query` by `keys` (all ascending or all descending; the last key must
+    # be unique and none may be NULL) and returns (rows, next_cursor). Without a
+    # limit every row is returned. cursor_of extracts the key values from a row
+    # when the keys are expressions rather than plain columns.
+    if cursor is not None:
+        after = decode_cursor(cursor, [_key_type(k) for k in keys])
+        row_key, cursor_key = tuple_(*keys), tuple_(*after)
+        query = query.filter(row_key < cursor_key if descending else row_key > cursor_key)
+
+    query = query.order_by(*[k.desc() if descending else k.asc() for k in keys])
+    if limit is None:
+        return query.all(), None
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    values = cursor_of(last) if cursor_of is not None else [getattr(last, k.key) for k in keys]
+    return rows, encode_cursor(values)
+
+
+def _estimate_total(query: OrmQuery) -> Optional[int]:
+    # planner row estimate; only PostgreSQL exposes one cheaply
+    conn = query.session.connection()
+    if conn.dialect.name != "postgresql":
+        return None
+    compiled = query.statement.compile(dialect=conn.dialect)
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(
+    query: OrmQuery,
+    keys: Sequence,
+    page: PageParams,
+    response: Response,
+    descending: bool = False,
+    cursor_of: Optional[Callable[[Any], Sequence[Any]]] = None,
+) -> list:
+    # keyset_page plus response headers; the total is only computed when asked for
+    if page.total == "estimate":
+        estimate = _estimate_total(query)
+        if estimate is not None:
+            response.headers[TOTAL_ESTIMATE_HEADER] = str(estimate)
+        else:
+            response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+    elif page.total == "exact":
+        response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+
+    rows, next_cursor = keyset_page(query, keys, page.cursor, page.limit, descending, cursor_of)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
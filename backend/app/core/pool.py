@@ -0,0 +1,83 @@
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# upper bounds (ms) of the checkout wait histogram buckets, the last one is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    # Checkout wait times of one engine's pool: a cumulative histogram in the
+    # Prometheus layout plus the number of checkouts that hit pool_timeout.
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._sum_ms = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+            self._sum_ms += ms
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            sum_ms = self._sum_ms
+            timeouts = self.timeouts
+        cumulative = []
+        total = 0
+        for bound, count in zip((*map(str, WAIT_BUCKETS_MS), "+Inf"), counts):
+            total += count
+            cumulative.append((bound, total))
+        out = {
+            "pool": self.name,
+            "class": type(pool).__name__,
+            "checkouts": total,
+            "timeouts": timeouts,
+            "wait_ms_sum": round(sum_ms, 3),
+            "wait_ms_buckets": dict(cumulative),
+        }
+        if isinstance(pool, QueuePool):
+            out.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return out
+
+
+class _TimedCheckout:
+    # the wait includes opening a new connection when the pool grows into overflow
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_timeout()
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - started)
+
+
+# one class per engine, so Pool.recreate() (engine.dispose()) keeps the metrics
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics = PoolMetrics("sync")
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics("async")
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import get_settings
+
+SERVER_TIMING_HEADER = "Server-Timing"
+# longest statement text kept for the slowest query of a request
+MAX_STATEMENT_CHARS = 1000
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+# open capture_queries() blocks of the running context, innermost last
+_captures: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_captures", default=())
+
+
+class QueryStats:
+    # SQL statements run on behalf of one request (or one capture_queries block)
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if ms >= self.slowest_ms:
+                self.slowest_ms = ms
+                self.slowest_statement = statement
+            if self.statements is not None:
+                self.statements.append(statement)
+
+    def server_timing(self, total_ms: float) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries", app;dur={total_ms:.1f}'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    captures = _captures.get()
+    if stats is None and not captures:
+        return
+    ms = (time.perf_counter() - started) * 1000
+    if stats is not None:
+        stats.record(statement, ms)
+    for capture in captures:
+        capture.record(statement, ms)
+
+
+def _handle_error(context) -> None:
+    # a failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def instrument_engine(sync_engine) -> None:
+    # attributes every statement of the engine to the request being served
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    # Statements run on behalf of the block's own context: TestClient requests
+    # and the threadpool copy it, the export janitor and risk training
+    # threads start from an empty one and are left out.
+    stats = QueryStats(keep_statements=True)
+    token = _captures.set((*_captures.get(), stats))
+    try:
+        yield stats
+    finally:
+        _captures.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block") -> Iterator[QueryStats]:
+    # N+1 guard for checks and benchmarks:
+    #     with assert_max_queries(6, "GET /api/v1/courses/"):
+    #         client.get("/api/v1/courses/", headers=...)
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i}. {s.strip()[:200]}" for i, s in enumerate(stats.statements, start=1))
+        raise AssertionError(f"{label} ran {stats.count} queries, expected at most {limit}:\n{listing}")
+
+
+def route_template(scope) -> str:
+    # "/api/v1/courses/{course_id}" for a matched request, after the app ran;
+    # nested routers keep only their own part of the path on the route
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    try:
+        concrete = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return getattr(route, "path", path)
+    prefix = path[: len(path) - len(concrete)] if path.endswith(concrete) else ""
+    return prefix + route.path
+
+
+class QueryHistory:
+    # the last `size` requests' query statistics, for GET /system/queries
+
+    def __init__(self, size: int):
+        self._entries = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> List[dict]:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryStatsMiddleware:
+    # Plain ASGI middleware: collects the statements of each HTTP request,
+    # adds a Server-Timing header (db time and query count, app time) and
+    # keeps the request in `history`. Streaming responses send their headers
+    # before the body is produced, so queries made while streaming are only
+    # in the history, not in the header.
+
+    def __init__(self, app, history: QueryHistory):
+        self.app = app
+        self.history = history
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(SERVER_TIMING_HEADER, stats.server_timing((time.perf_counter() - started) * 1000))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            statement = stats.slowest_statement
+            self.history.add(
+                {
+                    "at": datetime.utcnow().isoformat(timespec="seconds"),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "status": status_code,
+                    "queries": stats.count,
+                    "db_ms": round(stats.total_ms, 2),
+                    "total_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "slowest_ms": round(stats.slowest_ms, 2),
+                    "slowest_statement": statement[:MAX_STATEMENT_CHARS] if statement else None,
+                }
+            )
+
+
+query_history = QueryHistory(get_settings().query_stats_history)
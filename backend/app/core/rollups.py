@@ -0,0 +1,51 @@
+'''Пересборка и проверка агрегатов посещаемости и фидбека
+
+python -m app.core.rollups rebuild [--course-id N ...]
+python -m app.core.rollups check [--course-id N ...]
+'''
+import argparse
+import sys
+
+from app.core.db import Base, SessionLocal, engine
+from app.services.attendance_service import check_attendance_rollup, rebuild_attendance_rollup
+from app.services.feedback_service import check_feedback_rollup, rebuild_feedback_rollup
+
+ROLLUPS = [
+    ("attendance_daily_rollup", rebuild_attendance_rollup, check_attendance_rollup),
+    ("feedback_rating_rollup", rebuild_feedback_rollup, check_feedback_rollup),
+]
+
+
+def run(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.core.rollups")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--course-id", type=int, action="append", dest="course_ids")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            for name, rebuild, _ in ROLLUPS:
+                rows = rebuild(db, args.course_ids)
+                print(f"{name}: {rows} rows rebuilt")
+            db.commit()
+            return 0
+
+        failed = False
+        for name, _, check in ROLLUPS:
+            mismatches = check(db, args.course_ids)
+            for key, expected, actual in mismatches[:50]:
+                print(f"{name} {key}: expected={expected} actual={actual}")
+            print(f"{name}: {len(mismatches)} mismatches")
+            failed = failed or bool(mismatches)
+        return 1 if failed else 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -5,11 +5,14 @@ import hashlib
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.core.config import get_settings
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.models.course import Course
 from app.models.user import User
+from app.services.cache_service import principal_cache
 
 ROLE_ADMIN = "admin"
 ROLE_TEACHER = "teacher"
@@ -17,6 +20,9 @@ ROLE_STUDENT = "student"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
+# what principal_cache keeps of a user; the password hash is always read fresh
+PRINCIPAL_COLUMNS = tuple(c.key for c in User.__table__.columns if c.key != "hashed_password")
+
 
 def hash_password_raw(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
@@ -44,27 +50,67 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    settings = get_settings()
-    credentials_exception = HTTPException(
+def load_principal(db: Session, user_id: int) -> Optional[User]:
+    # get_user_by_id through principal_cache: a hit attaches the cached user to
+    # the session without a query (merge with load=False), so routes can still
+    # modify and commit it; columns outside PRINCIPAL_COLUMNS load on access
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        user = User(**cached[0])
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    stamp = principal_cache.stamp()
+    user = get_user_by_id(db, user_id)
+    if user is None:
+        return None
+    owned = []
+    if get_role(user) == ROLE_TEACHER:
+        owned = [r[0] for r in db.query(Course.id).filter(Course.teacher_id == user.id)]
+    columns = {key: getattr(user, key) for key in PRINCIPAL_COLUMNS}
+    principal_cache.set(user.id, stamp, columns, owned)
+    return user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_user_id(token: str) -> int:
+    settings = get_settings()
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         subject = payload.get("sub")
         if subject is None:
-            raise credentials_exception
-        user_id = int(subject)
+            raise _credentials_exception()
+        return int(subject)
     except (JWTError, ValueError):
-        raise credentials_exception
-    user = get_user_by_id(db, user_id)
+        raise _credentials_exception()
+
+
+# sync, so FastAPI runs the lookup in the threadpool rather than on the event loop
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    user = load_principal(db, _token_user_id(token))
+    if user is None or not user.is_active:
+        raise _credentials_exception()
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    # the same lookup on the async session (DATABASE_ASYNC routes)
+    user = await db.run_sync(load_principal, _token_user_id(token))
     if user is None or not user.is_active:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
@@ -101,7 +147,9 @@ def check_course_owner(user: User, course_id: int, db: Session) -> bool:
         return True
     if get_role(user) != ROLE_TEACHER:
         return False
-    from app.models.course import Course
+    owned = principal_cache.owned_course_ids(user.id)
+    if owned is not None:
+        return course_id in owned
     course = db.get(Course, course_id)
     if course is None:
         return False
@@ -10,6 +10,8 @@ from app.models.course import Course
 from app.models.feedback import Feedback
 from app.models.lesson import Lesson
 from app.models.user import User
+from app.services.attendance_service import rebuild_attendance_rollup
+from app.services.feedback_service import rebuild_feedback_rollup
 
 DEMO_COURSES = 5
 LESSONS_PER_COURSE = 10
@@ -1999,6 +2001,9 @@ def run_seed() -> None:
 
         db.commit()
 
+        rebuild_attendance_rollup(db)
+        db.commit()
+
         ''' Фидбек (Feedback): шаблоны, рейтинги, комменты, генерация записей '''
         feedback_samples = [
             (4.9, "Очень структурная подача: цели, метрики и ограничения обозначены заранее. Хороший акцент на воспроизводимость."),
@@ -2120,6 +2125,9 @@ def run_seed() -> None:
 
         db.commit()
 
+        rebuild_feedback_rollup(db)
+        db.commit()
+
 
     except Exception:
         db.rollback()
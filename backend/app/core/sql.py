@@ -0,0 +1,59 @@
+from sqlalchemy import Integer, case, func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement, FunctionElement
+
+
+class count_where(FunctionElement):
+    # Number of rows in the group matching `condition`:
+    #   COUNT(*) FILTER (WHERE condition)          PostgreSQL, SQLite >= 3.30
+    #   COALESCE(SUM(CASE WHEN condition ...), 0)  anything else
+    # Compare enum columns with their members (Attendance.status == AttendanceStatus.absent),
+    # not through CAST(... AS VARCHAR), so the comparison stays on the stored value.
+    type = Integer()
+    name = "count_where"
+    inherit_cache = True
+
+    def __init__(self, condition: ColumnElement):
+        super().__init__(condition)
+
+    @property
+    def condition(self) -> ColumnElement:
+        return self.clauses.clauses[0]
+
+
+def _count_filter(element: count_where, compiler, **kw) -> str:
+    return compiler.process(func.count(literal_column("*")).filter(element.condition), **kw)
+
+
+def _count_case(element: count_where, compiler, **kw) -> str:
+    return compiler.process(func.coalesce(func.sum(case((element.condition, 1), else_=0)), 0), **kw)
+
+
+@compiles(count_where)
+def _compile_default(element, compiler, **kw):
+    return _count_case(element, compiler, **kw)
+
+
+@compiles(count_where, "postgresql")
+def _compile_postgresql(element, compiler, **kw):
+    return _count_filter(element, compiler, **kw)
+
+
+@compiles(count_where, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    # aggregate FILTER clauses arrived in SQLite 3.30
+    dbapi = compiler.dialect.dbapi
+    if dbapi is not None and dbapi.sqlite_version_info >= (3, 30):
+        return _count_filter(element, compiler, **kw)
+    return _count_case(element, compiler, **kw)
+
+
+def upsert(dialect_name: str, entity):
+    # INSERT construct with .on_conflict_do_update / .on_conflict_do_nothing
+    # (PostgreSQL, SQLite >= 3.24) for the session's dialect
+    if dialect_name == "postgresql":
+        return postgresql.insert(entity)
+    if dialect_name == "sqlite":
+        return sqlite.insert(entity)
+    raise NotImplementedError(f"upsert is not supported on {dialect_name}")
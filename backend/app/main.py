@@ -3,11 +3,18 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.db import Base, engine
+from app.core.etag import ETAG_HEADER
+from app.core.metrics import MetricsMiddleware
+from app.core.pagination import PAGINATION_HEADERS
+from app.core.querystats import SERVER_TIMING_HEADER, QueryStatsMiddleware, query_history
 from app.api.v1 import router as api_v1_router
+from app.services.export_job_service import export_jobs
+from app.api.metrics import router as metrics_router
 
 settings = get_settings()
 
 Base.metadata.create_all(bind=engine)
+export_jobs.start()
 
 app = FastAPI(title=settings.app_name, debug=settings.debug)
 
@@ -19,6 +26,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[*PAGINATION_HEADERS, ETAG_HEADER, SERVER_TIMING_HEADER],
 )
 
+if settings.query_stats_enabled:
+    # added last, so it wraps CORS and sees the whole request
+    app.add_middleware(QueryStatsMiddleware, history=query_history)
+
+if settings.metrics_enabled:
+    # outermost, so the latency covers the other middleware too
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
 app.include_router(api_v1_router, prefix="/api/v1")
\ No newline at end of file
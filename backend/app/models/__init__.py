@@ -3,4 +3,7 @@ from app.models.user import User
 from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.attendance import Attendance, AttendanceStatus
-from app.models.feedback import Feedback
\ No newline at end of file
+from app.models.feedback import Feedback
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.feedback_rollup import FeedbackRatingRollup
+from app.models.export_job import ExportJob, ExportJobStatus
\ No newline at end of file
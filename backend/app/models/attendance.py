@@ -4,7 +4,7 @@ import enum
 from datetime import datetime, date
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, Enum as SAEnum, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Column, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -31,7 +31,13 @@ class Attendance(Base):
     lesson = relationship("Lesson", back_populates="attendances")
     student = relationship("User", back_populates="attendances")
 
-    __table_args__ = (UniqueConstraint("lesson_id", "student_id", name="uq_attendance_lesson_student"),)
+    __table_args__ = (
+        UniqueConstraint("lesson_id", "student_id", name="uq_attendance_lesson_student"),
+        # covers the risk series load: join by lesson, read status and student
+        Index("ix_attendance_lesson_id_status_student_id", "lesson_id", "status", "student_id"),
+        # the same for a single student's series
+        Index("ix_attendance_student_id_lesson_id_status", "student_id", "lesson_id", "status"),
+    )
 
     @property
     def student_name(self) -> Optional[str]:
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, text
+
+from app.core.db import Base
+
+
+class AttendanceDailyRollup(Base):
+    __tablename__ = "attendance_daily_rollup"
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    # NULL student_id holds the whole-course total for the day
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    total = Column(Integer, default=0, nullable=False)
+    present = Column(Integer, default=0, nullable=False)
+    late = Column(Integer, default=0, nullable=False)
+    excused = Column(Integer, default=0, nullable=False)
+    absent = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("uq_att_rollup_course_date_student", "course_id", "date", "student_id", unique=True),
+        Index(
+            "uq_att_rollup_course_date_total",
+            "course_id",
+            "date",
+            unique=True,
+            sqlite_where=text("student_id IS NULL"),
+            postgresql_where=text("student_id IS NULL"),
+        ),
+    )
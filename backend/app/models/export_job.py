@@ -0,0 +1,36 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum as SAEnum, ForeignKey, Integer, String, Text
+
+from app.core.db import Base
+
+
+class ExportJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id = Column(String(32), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    dataset = Column(String(32), nullable=False)
+    response_format = Column(String(16), nullable=False)
+    # JSON-encoded filters the job was created with
+    params = Column(Text, nullable=False, default="{}")
+    status = Column(SAEnum(ExportJobStatus), default=ExportJobStatus.pending, nullable=False)
+    rows_total = Column(Integer, nullable=True)
+    rows_written = Column(Integer, default=0, nullable=False)
+    bytes_written = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    file_path = Column(String(512), nullable=True)
+    # "<host>:<pid>" of the process running the job, see ExportJobRunner.recover_orphans
+    worker = Column(String(64), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
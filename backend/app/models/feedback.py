@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, Text, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -23,6 +23,10 @@ class Feedback(Base):
 
     __table_args__ = (
         UniqueConstraint("lesson_id", "student_id", name="uq_feedback_lesson_student"),
+        # newest-first keyset pagination of GET /feedback/
+        Index("ix_feedback_created_at_id", "created_at", "id"),
+        # per-lesson rating aggregates over visible feedback
+        Index("ix_feedback_lesson_id_is_hidden_rating", "lesson_id", "is_hidden", "rating"),
     )
 
     @property
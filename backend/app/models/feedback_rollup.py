@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, text
+
+from app.core.db import Base
+
+
+class FeedbackRatingRollup(Base):
+    __tablename__ = "feedback_rating_rollup"
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    # NULL lesson_id holds the whole-course total
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True, index=True)
+    count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Float, default=0.0, nullable=False)
+    r1 = Column(Integer, default=0, nullable=False)
+    r2 = Column(Integer, default=0, nullable=False)
+    r3 = Column(Integer, default=0, nullable=False)
+    r4 = Column(Integer, default=0, nullable=False)
+    r5 = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("uq_fb_rollup_course_lesson", "course_id", "lesson_id", unique=True),
+        Index(
+            "uq_fb_rollup_course_total",
+            "course_id",
+            unique=True,
+            sqlite_where=text("lesson_id IS NULL"),
+            postgresql_where=text("lesson_id IS NULL"),
+        ),
+    )
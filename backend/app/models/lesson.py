@@ -1,6 +1,6 @@
 from datetime import datetime, date, time
 
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, Time
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String, Time
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -20,4 +20,6 @@ class Lesson(Base):
 
     course = relationship("Course", back_populates="lessons")
     attendances = relationship("Attendance", back_populates="lesson", cascade="all, delete-orphan")
-    feedbacks = relationship("Feedback", back_populates="lesson", cascade="all, delete-orphan")
\ No newline at end of file
+    feedbacks = relationship("Feedback", back_populates="lesson", cascade="all, delete-orphan")
+
+    __table_args__ = (Index("ix_lessons_course_id_date", "course_id", "date"),)
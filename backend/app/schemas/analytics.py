@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -84,3 +85,5 @@ class AnalyticsRiskResponse(BaseModel):
     training_samples: int = Field(ge=0)
     features: List[str]
     rows: List[AnalyticsRiskRow]
+    model_version: Optional[int] = None
+    trained_at: Optional[datetime] = None
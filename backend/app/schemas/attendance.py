@@ -1,7 +1,7 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.models.attendance import AttendanceStatus
 
@@ -32,3 +32,37 @@ class AttendanceRead(AttendanceBase):
 
     class Config:
         from_attributes = True
+
+
+# upper bound of records in one bulk request
+MAX_BULK_ATTENDANCE = 1000
+
+
+class AttendanceBulkItem(BaseModel):
+    student_id: int
+    status: AttendanceStatus = AttendanceStatus.present
+    # None keeps the comment of an existing record
+    comment: Optional[str] = None
+
+
+class AttendanceBulkRequest(BaseModel):
+    lesson_id: int
+    records: List[AttendanceBulkItem] = Field(..., min_length=1, max_length=MAX_BULK_ATTENDANCE)
+
+
+class AttendanceBulkResult(BaseModel):
+    student_id: int
+    # created | updated | unchanged | error
+    result: str
+    id: Optional[int] = None
+    status: Optional[AttendanceStatus] = None
+    detail: Optional[str] = None
+
+
+class AttendanceBulkResponse(BaseModel):
+    lesson_id: int
+    created: int
+    updated: int
+    unchanged: int
+    errors: int
+    results: List[AttendanceBulkResult]
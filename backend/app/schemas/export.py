@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ExportJobCreate(BaseModel):
+    dataset: Literal["attendance", "feedback"] = "attendance"
+    response_format: str
+    course_id: Optional[int] = None
+    student_id: Optional[int] = None
+    lesson_id: Optional[int] = None
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    include_hidden: bool = False
+
+
+class ExportJobRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    dataset: str
+    response_format: str
+    status: str
+    rows_total: Optional[int] = None
+    rows_written: int
+    bytes_written: int
+    progress: Optional[float] = Field(default=None, ge=0, le=1)
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: datetime
+    download_url: Optional[str] = None
@@ -1,7 +1,7 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, confloat
+from pydantic import BaseModel, Field, confloat
 
 
 class FeedbackBase(BaseModel):
@@ -32,3 +32,60 @@ class FeedbackRead(FeedbackBase):
 
     class Config:
         from_attributes = True
+
+
+# upper bounds of ids / records in one bulk request
+MAX_BULK_FEEDBACK_IDS = 10000
+MAX_BULK_FEEDBACK_IMPORT = 5000
+
+
+class FeedbackSelection(BaseModel):
+    # criteria are combined with AND; at least one has to be given
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=MAX_BULK_FEEDBACK_IDS)
+    lesson_id: Optional[int] = None
+    course_id: Optional[int] = None
+    student_id: Optional[int] = None
+    min_rating: Optional[confloat(ge=0, le=5)] = None
+    max_rating: Optional[confloat(ge=0, le=5)] = None
+    # lesson dates, inclusive
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+
+
+class FeedbackModerationRequest(FeedbackSelection):
+    action: Literal["hide", "unhide", "delete"]
+
+
+class FeedbackModerationResult(BaseModel):
+    action: str
+    # rows hidden, unhidden or deleted; rows already in the target state are not counted
+    changed: int
+
+
+class FeedbackImportItem(FeedbackBase):
+    # the time the feedback was collected, defaults to the import time
+    created_at: Optional[datetime] = None
+
+
+class FeedbackImportRequest(BaseModel):
+    records: List[FeedbackImportItem] = Field(..., min_length=1, max_length=MAX_BULK_FEEDBACK_IMPORT)
+    # what to do with feedback that already exists for the lesson and student
+    on_conflict: Literal["skip", "update"] = "skip"
+
+
+class FeedbackImportResult(BaseModel):
+    lesson_id: int
+    student_id: int
+    # created | updated | unchanged | skipped | error
+    result: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class FeedbackImportResponse(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    skipped: int
+    errors: int
+    results: List[FeedbackImportResult]
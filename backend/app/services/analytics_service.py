@@ -0,0 +1,307 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal
+from sqlalchemy.orm import Query, Session
+
+from app.core.sql import count_where
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.course import Course
+from app.models.feedback import Feedback
+from app.models.feedback_rollup import FeedbackRatingRollup
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.schemas.analytics import (
+    AnalyticsCourseOption,
+    AnalyticsCourseSummaryRow,
+    AnalyticsOverview,
+    AnalyticsRatingBucket,
+    AnalyticsSummary,
+    AnalyticsTimeseriesPoint,
+    AnalyticsTopAbsentStudent,
+)
+from app.services.feedback_service import BUCKET_COLUMNS, rating_bucket_expr
+
+TOP_ABSENT_LIMIT = 10
+
+
+def _filter_lessons(
+    q: Query,
+    role: str,
+    user_id: int,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> Query:
+    if role == "teacher":
+        q = q.filter(Course.teacher_id == user_id)
+    if course_id is not None:
+        q = q.filter(Lesson.course_id == course_id)
+    if from_date is not None:
+        q = q.filter(Lesson.date >= from_date)
+    if to_date is not None:
+        q = q.filter(Lesson.date <= to_date)
+    return q
+
+
+def _lessons_by_course(
+    db: Session,
+    role: str,
+    user_id: int,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> Dict[int, Tuple[str, int]]:
+    q = (
+        db.query(
+            Course.id.label("cid"),
+            Course.name.label("cname"),
+            func.count(Lesson.id).label("lessons"),
+        )
+        .outerjoin(Lesson, Lesson.course_id == Course.id)
+    )
+    if role == "teacher":
+        q = q.filter(Course.teacher_id == user_id)
+    if course_id is not None:
+        q = q.filter(Course.id == course_id)
+    if from_date is not None:
+        q = q.filter((Lesson.date.is_(None)) | (Lesson.date >= from_date))
+    if to_date is not None:
+        q = q.filter((Lesson.date.is_(None)) | (Lesson.date <= to_date))
+    q = q.group_by(Course.id, Course.name)
+
+    return {int(r.cid): (str(r.cname), int(r.lessons or 0)) for r in q.all()}
+
+
+def _filter_rollup(
+    q: Query,
+    role: str,
+    user_id: int,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> Query:
+    if role == "teacher":
+        q = q.join(Course, AttendanceDailyRollup.course_id == Course.id).filter(Course.teacher_id == user_id)
+    if course_id is not None:
+        q = q.filter(AttendanceDailyRollup.course_id == course_id)
+    if from_date is not None:
+        q = q.filter(AttendanceDailyRollup.date >= from_date)
+    if to_date is not None:
+        q = q.filter(AttendanceDailyRollup.date <= to_date)
+    return q.filter(AttendanceDailyRollup.total > 0)
+
+
+def _attendance_scan(
+    db: Session,
+    role: str,
+    user_id: int,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    personal: bool,
+    with_top_absent: bool,
+) -> Tuple[List[Tuple[int, date, int, int]], List[Tuple[int, Optional[str], int, int]]]:
+    # Reads attendance_daily_rollup: whole-course rows for (course, date) cells,
+    # per-student rows for personal scope and for the absence ranking.
+    q = db.query(
+        AttendanceDailyRollup.course_id.label("cid"),
+        AttendanceDailyRollup.date.label("d"),
+        AttendanceDailyRollup.total.label("total"),
+        AttendanceDailyRollup.absent.label("absent"),
+    )
+    q = _filter_rollup(q, role, user_id, course_id, from_date, to_date)
+    if personal:
+        q = q.filter(AttendanceDailyRollup.student_id == user_id)
+    else:
+        q = q.filter(AttendanceDailyRollup.student_id.is_(None))
+    cells = [(int(r.cid), r.d, int(r.total), int(r.total) - int(r.absent)) for r in q.all()]
+
+    students: List[Tuple[int, Optional[str], int, int]] = []
+    if with_top_absent:
+        absent_sum = func.coalesce(func.sum(AttendanceDailyRollup.absent), 0)
+        top_q = db.query(
+            User.id.label("sid"),
+            User.full_name.label("name"),
+            absent_sum.label("absent"),
+            func.coalesce(func.sum(AttendanceDailyRollup.total), 0).label("total"),
+        ).join(AttendanceDailyRollup, AttendanceDailyRollup.student_id == User.id)
+        top_q = _filter_rollup(top_q, role, user_id, course_id, from_date, to_date)
+        top_q = (
+            top_q.group_by(User.id, User.full_name)
+            .order_by(absent_sum.desc(), User.id.asc())
+            .limit(TOP_ABSENT_LIMIT)
+        )
+        students = [(int(r.sid), r.name, int(r.absent or 0), int(r.total or 0)) for r in top_q.all()]
+
+    return cells, students
+
+
+def _feedback_scan(
+    db: Session,
+    role: str,
+    user_id: int,
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    personal: bool,
+) -> Dict[int, Tuple[int, float, List[int]]]:
+    # course_id -> (count, rating sum, [r1..r5]) over visible feedback. Overall
+    # scope reads feedback_rating_rollup (course rows, or lesson rows when a date
+    # range is set); personal scope aggregates the student's own feedback.
+    if personal:
+        bucket = rating_bucket_expr()
+        cols = [
+            Lesson.course_id.label("cid"),
+            func.count(Feedback.id).label("cnt"),
+            func.coalesce(func.sum(Feedback.rating), literal(0.0)).label("total"),
+        ] + [
+            count_where(bucket == i).label(name)
+            for i, name in enumerate(BUCKET_COLUMNS, start=1)
+        ]
+        q = (
+            db.query(*cols)
+            .join(Lesson, Feedback.lesson_id == Lesson.id)
+            .join(Course, Lesson.course_id == Course.id)
+            .filter(Feedback.is_hidden.is_(False))
+            .filter(Feedback.student_id == user_id)
+        )
+        q = _filter_lessons(q, role, user_id, course_id, from_date, to_date).group_by(Lesson.course_id)
+    else:
+        R = FeedbackRatingRollup
+        cols = [
+            R.course_id.label("cid"),
+            func.coalesce(func.sum(R.count), 0).label("cnt"),
+            func.coalesce(func.sum(R.rating_sum), literal(0.0)).label("total"),
+        ] + [func.coalesce(func.sum(getattr(R, name)), 0).label(name) for name in BUCKET_COLUMNS]
+        q = db.query(*cols)
+        if role == "teacher":
+            q = q.join(Course, R.course_id == Course.id).filter(Course.teacher_id == user_id)
+        if course_id is not None:
+            q = q.filter(R.course_id == course_id)
+        if from_date is None and to_date is None:
+            q = q.filter(R.lesson_id.is_(None))
+        else:
+            q = q.join(Lesson, R.lesson_id == Lesson.id)
+            if from_date is not None:
+                q = q.filter(Lesson.date >= from_date)
+            if to_date is not None:
+                q = q.filter(Lesson.date <= to_date)
+        q = q.group_by(R.course_id)
+
+    out: Dict[int, Tuple[int, float, List[int]]] = {}
+    for r in q.all():
+        cnt = int(r.cnt or 0)
+        if cnt > 0:
+            out[int(r.cid)] = (cnt, float(r.total or 0.0), [int(getattr(r, name) or 0) for name in BUCKET_COLUMNS])
+    return out
+
+
+def build_overview(
+    db: Session,
+    role: str,
+    current_user: User,
+    scope: str,
+    courses: List[AnalyticsCourseOption],
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> AnalyticsOverview:
+    personal = scope == "personal"
+    with_top_absent = role in {"admin", "teacher"} and scope == "overall"
+
+    lessons_map = _lessons_by_course(db, role, current_user.id, course_id, from_date, to_date)
+    cells, top_rows = _attendance_scan(
+        db, role, current_user.id, course_id, from_date, to_date, personal, with_top_absent
+    )
+    fb_map = _feedback_scan(db, role, current_user.id, course_id, from_date, to_date, personal)
+
+    attendance_total = 0
+    attendance_attended = 0
+    by_date: Dict[date, List[int]] = {}
+    att_map: Dict[int, List[int]] = {}
+    for cid, d, total, attended in cells:
+        attendance_total += total
+        attendance_attended += attended
+        day = by_date.setdefault(d, [0, 0])
+        day[0] += total
+        day[1] += attended
+        per_course = att_map.setdefault(cid, [0, 0])
+        per_course[0] += total
+        per_course[1] += attended
+    attendance_rate = (attendance_attended / attendance_total) if attendance_total > 0 else 0.0
+
+    timeseries: List[AnalyticsTimeseriesPoint] = []
+    for d in sorted(by_date):
+        total, attended = by_date[d]
+        rate = (attended / total) if total > 0 else 0.0
+        timeseries.append(
+            AnalyticsTimeseriesPoint(
+                date=d.isoformat() if d else "",
+                total=total,
+                attended=attended,
+                attendance_rate=rate,
+            )
+        )
+
+    feedback_count = 0
+    feedback_sum = 0.0
+    buckets: Dict[int, int] = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    for cnt, total, course_buckets in fb_map.values():
+        feedback_count += cnt
+        feedback_sum += total
+        for k, c in enumerate(course_buckets, start=1):
+            buckets[k] += c
+    feedback_avg = (feedback_sum / feedback_count) if feedback_count > 0 else None
+
+    rating_distribution = [AnalyticsRatingBucket(rating=k, count=buckets[k]) for k in [1, 2, 3, 4, 5]]
+
+    top_absent_students: List[AnalyticsTopAbsentStudent] = []
+    for sid, name, absent, total in top_rows:
+        rate = (absent / total) if total > 0 else 0.0
+        top_absent_students.append(
+            AnalyticsTopAbsentStudent(
+                student_id=sid,
+                student_name=str(name or f"ID {sid}"),
+                absent=absent,
+                total=total,
+                absent_rate=rate,
+            )
+        )
+
+    course_summary: List[AnalyticsCourseSummaryRow] = []
+    for cid, (cname, lcnt) in sorted(lessons_map.items(), key=lambda x: x[1][0].lower()):
+        total, attended = att_map.get(cid, (0, 0))
+        rate = (attended / total) if total > 0 else 0.0
+        fcnt, fsum, _ = fb_map.get(cid, (0, 0.0, []))
+        course_summary.append(
+            AnalyticsCourseSummaryRow(
+                course_id=cid,
+                course_name=cname,
+                lessons=lcnt,
+                attendance_rate=rate,
+                feedback_avg=(fsum / fcnt) if fcnt > 0 else None,
+                feedback_count=int(fcnt),
+            )
+        )
+
+    summary = AnalyticsSummary(
+        courses=len(courses),
+        lessons=sum(lcnt for _, lcnt in lessons_map.values()),
+        attendance_total=attendance_total,
+        attendance_attended=attendance_attended,
+        attendance_rate=float(attendance_rate),
+        feedback_count=feedback_count,
+        feedback_avg=feedback_avg,
+    )
+
+    return AnalyticsOverview(
+        role=role,
+        scope=scope,
+        courses=courses,
+        summary=summary,
+        timeseries=timeseries,
+        rating_distribution=rating_distribution,
+        top_absent_students=top_absent_students,
+        course_summary=course_summary,
+    )
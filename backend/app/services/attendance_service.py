@@ -0,0 +1,337 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, and_, bindparam, func, insert, literal, null, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.security import ROLE_TEACHER
+from app.core.sql import count_where, upsert
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.schemas.attendance import AttendanceBulkItem, AttendanceBulkResult
+from app.services.cache_service import invalidate_analytics
+from app.services.risk_service import record_attendance_writes
+
+STATUS_COLUMNS = ("present", "late", "excused", "absent")
+
+RollupKey = Tuple[int, date, Optional[int]]
+RollupCounts = Tuple[int, int, int, int, int]
+
+
+def _status_name(status) -> str:
+    if isinstance(status, AttendanceStatus):
+        return status.value
+    return str(status)
+
+
+ROLLUP_COUNTS = ("total", *STATUS_COLUMNS)
+
+
+def _apply_rollup_deltas(
+    db: Session, course_id: int, day: date, deltas: Dict[Optional[int], Dict[str, int]], now: datetime
+) -> None:
+    # Adds per-row count deltas to the day's rollup rows (student_id None is the
+    # course total). Rows gaining attendance go through INSERT .. ON CONFLICT DO
+    # UPDATE, so two transactions writing the first attendance of a day cannot
+    # both insert the row and fail on the unique index. Deltas that add no
+    # attendance only move counts between statuses or remove them; their row
+    # already exists and gets a plain UPDATE.
+    table = AttendanceDailyRollup.__table__
+    added = [
+        {"course_id": course_id, "date": day, "student_id": sid, "updated_at": now, **counts}
+        for sid, counts in deltas.items()
+        if counts["total"] > 0
+    ]
+    for per_student in (True, False):
+        rows = [row for row in added if (row["student_id"] is not None) == per_student]
+        if not rows:
+            continue
+        stmt = upsert(db.get_bind().dialect.name, table)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in ROLLUP_COUNTS}
+        set_["updated_at"] = stmt.excluded.updated_at
+        if per_student:
+            stmt = stmt.on_conflict_do_update(index_elements=["course_id", "date", "student_id"], set_=set_)
+        else:
+            # the partial unique index on (course_id, date) WHERE student_id IS NULL
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["course_id", "date"], index_where=table.c.student_id.is_(None), set_=set_
+            )
+        db.execute(stmt, rows)
+
+    changed = [
+        {"sid": sid, **{f"d_{name}": value for name, value in counts.items()}}
+        for sid, counts in deltas.items()
+        if counts["total"] <= 0 and any(counts.values())
+    ]
+    if not changed:
+        return
+    stmt = update(table).values(
+        {**{name: table.c[name] + bindparam(f"d_{name}") for name in ROLLUP_COUNTS}, "updated_at": now}
+    )
+    stmt = stmt.where(table.c.course_id == course_id, table.c.date == day)
+    per_student = [row for row in changed if row["sid"] is not None]
+    if per_student:
+        db.execute(stmt.where(table.c.student_id == bindparam("sid")), per_student)
+    total = [row for row in changed if row["sid"] is None]
+    if total:
+        db.execute(stmt.where(table.c.student_id.is_(None)), total)
+
+
+def record_attendance_change(
+    db: Session,
+    course_id: int,
+    lesson_date: date,
+    student_id: int,
+    old_status=None,
+    new_status=None,
+) -> None:
+    # Keeps attendance_daily_rollup in step with one attendance row; call it
+    # inside the same transaction as the insert/update/delete it mirrors.
+    record_attendance_changes(db, course_id, lesson_date, [(student_id, old_status, new_status)])
+
+
+def record_attendance_changes(
+    db: Session,
+    course_id: int,
+    lesson_date: date,
+    changes: Iterable[Tuple[int, Optional[AttendanceStatus], Optional[AttendanceStatus]]],
+) -> None:
+    # record_attendance_change for many (student_id, old_status, new_status)
+    # rows of one lesson, summed per rollup row: at most two upserts and two
+    # executemany UPDATEs whatever the number of rows.
+    deltas: Dict[Optional[int], Dict[str, int]] = {}
+    written = 0
+    for student_id, old_status, new_status in changes:
+        old_name = _status_name(old_status) if old_status is not None else None
+        new_name = _status_name(new_status) if new_status is not None else None
+        if old_name == new_name:
+            continue
+        written += 1
+        for sid in (student_id, None):
+            counts = deltas.setdefault(sid, dict.fromkeys(ROLLUP_COUNTS, 0))
+            if old_name is not None:
+                counts["total"] -= 1
+                counts[old_name] -= 1
+            if new_name is not None:
+                counts["total"] += 1
+                counts[new_name] += 1
+    if not written:
+        return
+    record_attendance_writes(db, course_id, written)
+    invalidate_analytics(db, [course_id])
+    _apply_rollup_deltas(db, course_id, lesson_date, deltas, datetime.utcnow())
+
+
+def upsert_lesson_attendance(db: Session, lesson: Lesson, items: Sequence[AttendanceBulkItem]) -> List[AttendanceBulkResult]:
+    # Writes the attendance of one lesson in a single INSERT .. ON CONFLICT
+    # (lesson_id, student_id) DO UPDATE; rows whose status and comment already
+    # match are left untouched. Returns one result per item, in order. The
+    # caller checks permissions and commits.
+    results: List[Optional[AttendanceBulkResult]] = [None] * len(items)
+    seen = set()
+    for i, item in enumerate(items):
+        if item.student_id in seen:
+            results[i] = AttendanceBulkResult(student_id=item.student_id, result="error", detail="Duplicate student")
+        seen.add(item.student_id)
+
+    known = {r[0] for r in db.execute(select(User.id).where(User.id.in_(seen)))}
+    todo = {}
+    for i, item in enumerate(items):
+        if results[i] is not None:
+            continue
+        if item.student_id not in known:
+            results[i] = AttendanceBulkResult(student_id=item.student_id, result="error", detail="Student not found")
+        else:
+            todo[item.student_id] = i
+    if not todo:
+        return results
+
+    # previous statuses feed the rollup deltas; locked on PostgreSQL until commit
+    previous = {
+        r.student_id: (r.id, r.status)
+        for r in db.execute(
+            select(Attendance.id, Attendance.student_id, Attendance.status)
+            .where(Attendance.lesson_id == lesson.id, Attendance.student_id.in_(todo))
+            .with_for_update()
+        )
+    }
+
+    # fixed statement + parameter list: compiled once (statement cache) and
+    # sent as batched multi-row VALUES by insertmanyvalues
+    table = Attendance.__table__
+    stmt = upsert(db.get_bind().dialect.name, table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.lesson_id, table.c.student_id],
+        set_={
+            "status": excluded.status,
+            "comment": func.coalesce(excluded.comment, table.c.comment),
+            "updated_at": excluded.updated_at,
+        },
+        where=or_(
+            table.c.status != excluded.status,
+            and_(excluded.comment.isnot(None), table.c.comment.is_distinct_from(excluded.comment)),
+        ),
+    ).returning(table.c.id, table.c.student_id, table.c.status)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "lesson_id": lesson.id,
+            "student_id": student_id,
+            "status": items[i].status,
+            "comment": items[i].comment,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for student_id, i in todo.items()
+    ]
+    written = {r.student_id: (r.id, r.status) for r in db.execute(stmt, rows)}
+
+    changes = []
+    for student_id, i in todo.items():
+        old = previous.get(student_id)
+        if student_id in written:
+            record_id, new_status = written[student_id]
+            results[i] = AttendanceBulkResult(
+                student_id=student_id, result="updated" if old else "created", id=record_id, status=new_status
+            )
+            changes.append((student_id, old[1] if old else None, new_status))
+        else:
+            # old is None only if a concurrent request inserted the row first
+            results[i] = AttendanceBulkResult(
+                student_id=student_id, result="unchanged", id=old[0] if old else None, status=old[1] if old else None
+            )
+    record_attendance_changes(db, lesson.course_id, lesson.date, changes)
+    return results
+
+
+def _status_sum(status: AttendanceStatus):
+    return count_where(Attendance.status == status)
+
+
+def _raw_rollup_select(per_student: bool, course_ids: Optional[List[int]]):
+    student_col = Attendance.student_id if per_student else null()
+    cols = [
+        Lesson.course_id.label("course_id"),
+        Lesson.date.label("date"),
+        student_col.label("student_id"),
+        func.count(Attendance.id).label("total"),
+        _status_sum(AttendanceStatus.present).label("present"),
+        _status_sum(AttendanceStatus.late).label("late"),
+        _status_sum(AttendanceStatus.excused).label("excused"),
+        _status_sum(AttendanceStatus.absent).label("absent"),
+        literal(datetime.utcnow(), DateTime).label("updated_at"),
+    ]
+    q = select(*cols).select_from(Attendance).join(Lesson, Attendance.lesson_id == Lesson.id)
+    if course_ids is not None:
+        q = q.where(Lesson.course_id.in_(course_ids))
+    group_cols = [Lesson.course_id, Lesson.date]
+    if per_student:
+        group_cols.append(Attendance.student_id)
+    return q.group_by(*group_cols)
+
+
+def rebuild_attendance_rollup(db: Session, course_ids: Optional[Iterable[int]] = None) -> int:
+    ids = sorted(set(course_ids)) if course_ids is not None else None
+    delete_q = db.query(AttendanceDailyRollup)
+    if ids is not None:
+        if not ids:
+            return 0
+        delete_q = delete_q.filter(AttendanceDailyRollup.course_id.in_(ids))
+    delete_q.delete(synchronize_session=False)
+    invalidate_analytics(db, ids)
+
+    target_cols = ["course_id", "date", "student_id", "total", *STATUS_COLUMNS, "updated_at"]
+    inserted = 0
+    for per_student in (False, True):
+        stmt = insert(AttendanceDailyRollup).from_select(target_cols, _raw_rollup_select(per_student, ids))
+        inserted += db.execute(stmt).rowcount or 0
+    return inserted
+
+
+def check_attendance_rollup(
+    db: Session, course_ids: Optional[Iterable[int]] = None
+) -> List[Tuple[RollupKey, Optional[RollupCounts], Optional[RollupCounts]]]:
+    ids = sorted(set(course_ids)) if course_ids is not None else None
+
+    expected = {}
+    for per_student in (False, True):
+        for r in db.execute(_raw_rollup_select(per_student, ids)):
+            key = (int(r.course_id), r.date, int(r.student_id) if r.student_id is not None else None)
+            expected[key] = (int(r.total), int(r.present), int(r.late), int(r.excused), int(r.absent))
+
+    actual_q = db.query(AttendanceDailyRollup).filter(AttendanceDailyRollup.total != 0)
+    if ids is not None:
+        actual_q = actual_q.filter(AttendanceDailyRollup.course_id.in_(ids))
+    actual = {}
+    for r in actual_q.all():
+        key = (r.course_id, r.date, r.student_id)
+        actual[key] = (r.total, r.present, r.late, r.excused, r.absent)
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], k[1], k[2] or 0)):
+        if expected.get(key) != actual.get(key):
+            mismatches.append((key, expected.get(key), actual.get(key)))
+    return mismatches
+
+
+def course_ids_for_student(db: Session, student_id: int) -> List[int]:
+    rows = (
+        db.query(Lesson.course_id)
+        .join(Attendance, Attendance.lesson_id == Lesson.id)
+        .filter(Attendance.student_id == student_id)
+        .distinct()
+        .all()
+    )
+    return [int(r[0]) for r in rows]
+
+
+def attendance_list_query(
+    db: Session,
+    current_user: User,
+    lesson_id: Optional[int],
+    student_id: Optional[int],
+    course_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+):
+    # Column-only read path for GET /attendance/ (AttendanceRead fields); paginate by id.
+    query = (
+        db.query(
+            Attendance.id.label("id"),
+            Attendance.lesson_id.label("lesson_id"),
+            Attendance.student_id.label("student_id"),
+            Attendance.status.label("status"),
+            Attendance.comment.label("comment"),
+            Attendance.created_at.label("created_at"),
+            Attendance.updated_at.label("updated_at"),
+            User.full_name.label("student_name"),
+            Course.name.label("course_name"),
+            Lesson.date.label("lesson_date"),
+        )
+        .select_from(Attendance)
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .join(Course, Lesson.course_id == Course.id)
+        .outerjoin(User, Attendance.student_id == User.id)
+    )
+
+    if current_user.role == ROLE_TEACHER:
+        query = query.filter(Course.teacher_id == current_user.id)
+
+    if lesson_id is not None:
+        query = query.filter(Attendance.lesson_id == lesson_id)
+    if student_id is not None:
+        query = query.filter(Attendance.student_id == student_id)
+    if course_id is not None:
+        query = query.filter(Lesson.course_id == course_id)
+    if from_date is not None:
+        query = query.filter(Lesson.date >= from_date)
+    if to_date is not None:
+        query = query.filter(Lesson.date <= to_date)
+    return query
+
+
+ATTENDANCE_LIST_KEYS = (Attendance.id,)
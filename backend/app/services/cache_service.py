@@ -0,0 +1,430 @@
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Change versions are counters under string keys:
+#   "epoch"        random per backend start, so counters restarting from zero
+#                  (or writes made while the app was down) never reuse a stamp
+#   "analytics"    bumped by writes that can change every cached analytics
+#                  response (course list, course names/teachers, user names)
+#   "course:<id>"  analytics inputs of one course
+#   "table:<name>" any committed write to the table (ETags of read endpoints)
+#   "risk_models"  a retrained risk model replaced the previous one
+EPOCH_VERSION = "epoch"
+GLOBAL_VERSION = "analytics"
+RISK_MODELS_VERSION = "risk_models"
+
+_PENDING_KEY = "change_versions_pending"
+
+
+def course_version(course_id: int) -> str:
+    return f"course:{int(course_id)}"
+
+
+def table_version(table: str) -> str:
+    return f"table:{table}"
+
+
+class CacheEntry:
+    def __init__(self, course_ids: Sequence[int], stamp: Sequence[int], body: bytes):
+        # course_ids the response was computed from and their versions at that time
+        self.course_ids = tuple(course_ids)
+        self.stamp = tuple(stamp)
+        self.body = body
+
+
+class MemoryCacheBackend:
+    # Per-process LRU with a TTL and caps on entry count and body bytes.
+
+    name = "memory"
+    # versions live in this process only
+    shared = False
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._bytes = 0
+        self._versions: Dict[str, int] = {EPOCH_VERSION: secrets.randbits(62)}
+        self.evictions = 0
+
+    def _drop(self, key: str) -> None:
+        _, entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, ttl_seconds: int) -> None:
+        if len(entry.body) > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, entry)
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def versions(self, keys: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(k, 0) for k in keys]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for k in keys:
+                self._versions[k] = self._versions.get(k, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class SQLiteCacheBackend:
+    # Entries and versions in a local SQLite file, so every uvicorn worker on
+    # the host shares them (a write handled by one worker invalidates the
+    # responses cached by the others). One connection per thread.
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.evictions = 0
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, course_ids TEXT NOT NULL, stamp TEXT NOT NULL, "
+                "body BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS change_versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            # every worker start rotates the epoch for all of them
+            conn.execute(
+                "INSERT OR REPLACE INTO change_versions (key, version) VALUES (?, ?)",
+                (EPOCH_VERSION, secrets.randbits(62)),
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT course_ids, stamp, body FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(json.loads(row[0]), json.loads(row[1]), bytes(row[2]))
+
+    def set(self, key: str, entry: CacheEntry, ttl_seconds: int) -> None:
+        if len(entry.body) > self.max_bytes or self.max_entries <= 0:
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, course_ids, stamp, body, size, expires_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.course_ids), json.dumps(entry.stamp), entry.body, len(entry.body), now + ttl_seconds, now),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            count, size = conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM entries").fetchone()
+            while count > self.max_entries or size > self.max_bytes:
+                victim = conn.execute("SELECT key, size FROM entries ORDER BY used_at LIMIT 1").fetchone()
+                conn.execute("DELETE FROM entries WHERE key = ?", (victim[0],))
+                count, size = count - 1, size - victim[1]
+                self.evictions += 1
+
+    def versions(self, keys: Sequence[str]) -> List[int]:
+        if not keys:
+            return []
+        rows = self._conn().execute(
+            f"SELECT key, version FROM change_versions WHERE key IN ({','.join('?' * len(keys))})", list(keys)
+        ).fetchall()
+        found = dict(rows)
+        return [found.get(k, 0) for k in keys]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO change_versions (key, version) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1",
+                [(k,) for k in keys],
+            )
+
+    def clear(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        count, size = self._conn().execute("SELECT count(*), coalesce(sum(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "evictions": self.evictions}
+
+
+class AnalyticsCache:
+    # Caches rendered analytics responses (JSON bytes). An entry stays valid
+    # until its TTL runs out or one of the courses it was computed from (or
+    # GLOBAL_VERSION) gets a new version; writes bump versions on commit via
+    # invalidate_analytics below. The backend also holds the table versions
+    # used for ETags, so it exists even when caching is disabled.
+
+    def __init__(self, backend, ttl_seconds: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def key(endpoint: str, role: str, user_id: Optional[int], **params) -> str:
+        parts = [endpoint, f"role={role}", f"user={user_id if user_id is not None else '*'}"]
+        parts += [f"{name}={'' if value is None else value}" for name, value in sorted(params.items())]
+        return "|".join(parts)
+
+    def _stamp(self, course_ids: Sequence[int]) -> Tuple[int, ...]:
+        return tuple(self.backend.versions([EPOCH_VERSION, GLOBAL_VERSION, *map(course_version, course_ids)]))
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        try:
+            entry = self.backend.get(key)
+            if entry is not None and entry.stamp != self._stamp(entry.course_ids):
+                self._count("stale")
+                entry = None
+        except Exception:
+            logger.exception("analytics cache read failed")
+            entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry.body
+
+    def stamp(self, course_ids: Sequence[int]) -> Optional[Tuple[int, ...]]:
+        # take the stamp before computing the response: a write that commits
+        # while it is being computed leaves the entry already stale
+        if not self.enabled:
+            return None
+        try:
+            return self._stamp(course_ids)
+        except Exception:
+            logger.exception("analytics cache read failed")
+            return None
+
+    def set(self, key: str, course_ids: Sequence[int], stamp: Optional[Tuple[int, ...]], body: bytes) -> None:
+        if not self.enabled or stamp is None:
+            return
+        try:
+            self.backend.set(key, CacheEntry(course_ids, stamp, body), self.ttl_seconds)
+        except Exception:
+            logger.exception("analytics cache write failed")
+
+    def versions(self, keys: Sequence[str]) -> List[int]:
+        return self.backend.versions(keys)
+
+    def bump(self, keys: Iterable[str]) -> None:
+        try:
+            self.backend.bump(sorted(set(keys)))
+        except Exception:
+            logger.exception("change version bump failed")
+
+    def bump_courses(self, course_ids: Iterable[int]) -> None:
+        self.bump(map(course_version, course_ids))
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {
+                "backend": self.backend.name if self.enabled else "none",
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+            }
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        if self.enabled:
+            out.update(self.backend.stats())
+        return out
+
+
+class PrincipalCache:
+    # Authenticated users by id: their column values (never the password hash)
+    # and, for teachers, the ids of the courses they own. An entry is dropped
+    # when its TTL runs out or on any committed write to users or courses
+    # (their table versions), so it is only enabled when versions are shared.
+
+    def __init__(self, versions: AnalyticsCache, ttl_seconds: int, max_entries: int):
+        self.versions = versions
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Tuple[int, ...], dict, frozenset]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stamp(self) -> Tuple[int, ...]:
+        # taken before the user is loaded, like AnalyticsCache.stamp
+        return tuple(self.versions.versions([EPOCH_VERSION, table_version("users"), table_version("courses")]))
+
+    def get(self, user_id: int) -> Optional[Tuple[dict, frozenset]]:
+        if self.ttl_seconds <= 0:
+            return None
+        stamp = self.stamp()
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is not None and (item[0] <= time.monotonic() or item[1] != stamp):
+                del self._entries[user_id]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return item[2], item[3]
+
+    def set(self, user_id: int, stamp: Tuple[int, ...], columns: dict, owned_course_ids: Iterable[int]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, stamp, columns, frozenset(owned_course_ids))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def owned_course_ids(self, user_id: int) -> Optional[frozenset]:
+        cached = self.get(user_id)
+        return cached[1] if cached is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ttl_seconds": self.ttl_seconds, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def invalidate_analytics(db: Session, course_ids: Optional[Iterable[int]] = None) -> None:
+    # Marks cached analytics of these courses (None = all of them) stale once
+    # the session's transaction commits; a rollback discards the mark.
+    pending = db.info.setdefault(_PENDING_KEY, set())
+    if course_ids is None:
+        pending.add(GLOBAL_VERSION)
+    else:
+        pending.update(course_version(c) for c in course_ids)
+
+
+def note_table_writes(session: Session, tables: Iterable[str]) -> None:
+    # for writes the session events below cannot see (raw COPY and the like)
+    session.info.setdefault(_PENDING_KEY, set()).update(table_version(t) for t in tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(session: Session, flush_context) -> None:
+    note_table_writes(
+        session,
+        {obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted) if hasattr(obj, "__table__")},
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(state: ORMExecuteState) -> None:
+    # query.update()/delete() and insert().from_select() bypass the flush
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            note_table_writes(state.session, [table.name])
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        analytics_cache.bump(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _make_backend(settings):
+    kind = settings.analytics_cache_backend
+    if kind == "sqlite":
+        return SQLiteCacheBackend(
+            settings.analytics_cache_path, settings.analytics_cache_max_entries, settings.analytics_cache_max_bytes
+        )
+    return MemoryCacheBackend(settings.analytics_cache_max_entries, settings.analytics_cache_max_bytes)
+
+
+_settings = get_settings()
+
+analytics_cache = AnalyticsCache(
+    _make_backend(_settings),
+    ttl_seconds=_settings.analytics_cache_ttl_seconds,
+    enabled=_settings.analytics_cache_backend != "none",
+)
+# Every process serving requests sees every version bump: the backend is
+# shared, or there is a single worker. Otherwise a write handled by one worker
+# never reaches the versions of the others.
+versions_shared = analytics_cache.backend.shared or _settings.web_concurrency <= 1
+
+principal_cache = PrincipalCache(
+    analytics_cache,
+    # without shared versions a deactivated user would stay signed in on the
+    # other workers until the TTL ran out
+    ttl_seconds=_settings.principal_cache_ttl_seconds if versions_shared else 0,
+    max_entries=_settings.principal_cache_max_entries,
+)
@@ -0,0 +1,331 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.db import SessionLocal
+from app.models.export_job import ExportJob, ExportJobStatus
+from app.models.user import User
+from app.services.export_service import (
+    ATTENDANCE_COLUMNS,
+    EXPORT_FORMATS,
+    FEEDBACK_COLUMNS,
+    attendance_export_select,
+    attendance_values,
+    feedback_export_select,
+    feedback_values,
+    iter_export_chunks,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+def _attendance_stmt(user: User, params: dict):
+    return attendance_export_select(
+        user,
+        params.get("course_id"),
+        params.get("student_id"),
+        _date(params.get("from_date")),
+        _date(params.get("to_date")),
+    )
+
+
+def _feedback_stmt(user: User, params: dict):
+    return feedback_export_select(
+        user,
+        params.get("course_id"),
+        params.get("lesson_id"),
+        _date(params.get("from_date")),
+        _date(params.get("to_date")),
+        bool(params.get("include_hidden")),
+    )
+
+
+# dataset -> (statement builder, row values, columns, download file name)
+EXPORT_DATASETS = {
+    "attendance": (_attendance_stmt, attendance_values, ATTENDANCE_COLUMNS, "attendance_export"),
+    "feedback": (_feedback_stmt, feedback_values, FEEDBACK_COLUMNS, "feedback_export"),
+}
+
+
+class _JobCancelled(Exception):
+    pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportJobRunner:
+    # Renders export jobs to files under export_dir on a local thread pool.
+    # Status transitions live in the export_jobs table; rows/bytes written while
+    # a job runs are kept in memory (the worker's read cursor would block
+    # progress commits on SQLite) and stored on the row when it finishes.
+    # Jobs and files expire at expires_at and are purged by a background thread
+    # (start()), which also fails the jobs a previous run of this process left
+    # pending or running.
+
+    def __init__(self, export_dir: str, ttl_seconds: int, workers: int, purge_interval_seconds: int):
+        self.export_dir = export_dir
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self._lock = threading.Lock()
+        self._progress: Dict[str, Tuple[int, int]] = {}
+        self._cancelled: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export-job")
+        self._janitor: Optional[threading.Thread] = None
+
+    @property
+    def worker(self) -> str:
+        # read on use: a forked uvicorn worker must not inherit the parent's pid
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def file_name(self, job: ExportJob) -> str:
+        return f"{EXPORT_DATASETS[job.dataset][3]}.{EXPORT_FORMATS[job.response_format].extension}"
+
+    def create(self, db: Session, owner: User, dataset: str, response_format: str, params: dict) -> ExportJob:
+        now = datetime.utcnow()
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            owner_id=owner.id,
+            dataset=dataset,
+            response_format=response_format,
+            params=json.dumps(params, default=str),
+            status=ExportJobStatus.pending,
+            rows_written=0,
+            bytes_written=0,
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.ttl_seconds),
+            worker=self.worker,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def _update(self, db: Session, job_id: str, values: dict) -> None:
+        updated = db.query(ExportJob).filter(ExportJob.id == job_id).update(values, synchronize_session=False)
+        db.commit()
+        if not updated:
+            raise _JobCancelled()
+
+    def _render(self, db: Session, job: ExportJob, owner: User, path: str) -> Tuple[int, int]:
+        build_stmt, values, columns, _ = EXPORT_DATASETS[job.dataset]
+        fmt = EXPORT_FORMATS[job.response_format]
+        stmt = build_stmt(owner, json.loads(job.params or "{}"))
+
+        rows_total = db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar() or 0
+        self._update(db, job.id, {ExportJob.rows_total: int(rows_total)})
+
+        rows = 0
+        written = 0
+
+        def counted(chunks: Iterator[List[list]]) -> Iterator[List[list]]:
+            nonlocal rows
+            for chunk in chunks:
+                if job.id in self._cancelled:
+                    raise _JobCancelled()
+                rows += len(chunk)
+                yield chunk
+
+        with open(path, "wb") as fh:
+            for piece in fmt.writer(counted(iter_export_chunks(stmt, values, fmt.chunk_rows)), columns):
+                data = piece.encode("utf-8") if isinstance(piece, str) else piece
+                fh.write(data)
+                written += len(data)
+                with self._lock:
+                    self._progress[job.id] = (rows, written)
+        return rows, written
+
+    def progress(self, job: ExportJob) -> Tuple[int, int]:
+        with self._lock:
+            return self._progress.get(job.id, (job.rows_written or 0, job.bytes_written or 0))
+
+    def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        part_path = None
+        try:
+            job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+            if job is None:
+                return
+            owner = db.query(User).filter(User.id == job.owner_id).first()
+            if owner is None:
+                return
+            self._update(db, job_id, {ExportJob.status: ExportJobStatus.running, ExportJob.started_at: datetime.utcnow()})
+
+            os.makedirs(self.export_dir, exist_ok=True)
+            final_path = os.path.join(self.export_dir, f"{job.id}.{EXPORT_FORMATS[job.response_format].extension}")
+            part_path = f"{final_path}.part"
+            rows, written = self._render(db, job, owner, part_path)
+            os.replace(part_path, final_path)
+            part_path = None
+            try:
+                self._update(
+                    db,
+                    job_id,
+                    {
+                        ExportJob.status: ExportJobStatus.done,
+                        ExportJob.rows_written: rows,
+                        ExportJob.bytes_written: written,
+                        ExportJob.file_path: final_path,
+                        ExportJob.finished_at: datetime.utcnow(),
+                    },
+                )
+            except _JobCancelled:
+                self._remove_file(final_path)
+        except _JobCancelled:
+            pass
+        except Exception as exc:
+            logger.exception("export job %s failed", job_id)
+            db.rollback()
+            try:
+                self._update(
+                    db,
+                    job_id,
+                    {
+                        ExportJob.status: ExportJobStatus.failed,
+                        ExportJob.error: str(exc) or exc.__class__.__name__,
+                        ExportJob.finished_at: datetime.utcnow(),
+                    },
+                )
+            except _JobCancelled:
+                pass
+        finally:
+            if part_path is not None:
+                self._remove_file(part_path)
+            with self._lock:
+                self._progress.pop(job_id, None)
+                self._cancelled.discard(job_id)
+            db.close()
+
+    def _remove_file(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        for p in (path, f"{path}.part"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("failed to remove export file %s", p)
+
+    def delete(self, db: Session, job: ExportJob) -> None:
+        # a running worker stops at its next chunk (or when it tries to finish)
+        path = job.file_path
+        if job.status in (ExportJobStatus.pending, ExportJobStatus.running):
+            with self._lock:
+                self._cancelled.add(job.id)
+        db.delete(job)
+        db.commit()
+        self._remove_file(path)
+
+    def purge_expired(self, db: Session) -> int:
+        # the progress lock is only held to flag jobs still running, not
+        # around the queries and file deletes
+        expired = (
+            db.query(ExportJob.id, ExportJob.status, ExportJob.file_path)
+            .filter(ExportJob.expires_at <= datetime.utcnow())
+            .all()
+        )
+        if not expired:
+            return 0
+        with self._lock:
+            # jobs this process is rendering stop at their next chunk
+            self._cancelled.update(job.id for job in expired if job.id in self._progress)
+        # bulk delete: a concurrent purge in another worker may have removed some already
+        db.query(ExportJob).filter(ExportJob.id.in_([job.id for job in expired])).delete(synchronize_session=False)
+        db.commit()
+        for job in expired:
+            self._remove_file(job.file_path)
+        return len(expired)
+
+    def recover_orphans(self, db: Session) -> int:
+        # Pending/running jobs of a process on this host that no longer runs
+        # (a restart, a crashed uvicorn worker) will never finish: fail them so
+        # clients stop polling. Jobs of live processes (the other workers) and
+        # of other hosts are left alone; jobs from before the worker column
+        # existed are treated as orphaned.
+        host = socket.gethostname()
+        orphaned = []
+        active = [ExportJobStatus.pending, ExportJobStatus.running]
+        candidates = db.query(ExportJob.id, ExportJob.worker, ExportJob.response_format).filter(
+            ExportJob.status.in_(active)
+        )
+        for job in candidates:
+            if job.worker is not None:
+                job_host, _, pid = job.worker.rpartition(":")
+                if job_host != host or not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                    continue
+            orphaned.append(job)
+        if orphaned:
+            ids = [job.id for job in orphaned]
+            db.query(ExportJob).filter(ExportJob.id.in_(ids), ExportJob.status.in_(active)).update(
+                {
+                    ExportJob.status: ExportJobStatus.failed,
+                    ExportJob.error: "Interrupted by a server restart",
+                    ExportJob.finished_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            for job in orphaned:
+                # the unfinished .part file
+                extension = EXPORT_FORMATS[job.response_format].extension
+                self._remove_file(os.path.join(self.export_dir, f"{job.id}.{extension}"))
+        return len(orphaned)
+
+    def _housekeeping(self) -> None:
+        db = SessionLocal()
+        try:
+            failed = self.recover_orphans(db)
+            if failed:
+                logger.warning("marked %d interrupted export jobs as failed", failed)
+            self.purge_expired(db)
+        except Exception:
+            logger.exception("export job housekeeping failed")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _janitor_loop(self) -> None:
+        while True:
+            self._housekeeping()
+            time.sleep(self.purge_interval_seconds)
+
+    def start(self) -> None:
+        # called once the tables exist (app startup)
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+        self._janitor = threading.Thread(target=self._janitor_loop, name="export-janitor", daemon=True)
+        self._janitor.start()
+
+
+_settings = get_settings()
+
+export_jobs = ExportJobRunner(
+    export_dir=_settings.export_dir,
+    ttl_seconds=_settings.export_job_ttl_seconds,
+    workers=_settings.export_workers,
+    purge_interval_seconds=_settings.export_purge_interval_seconds,
+)
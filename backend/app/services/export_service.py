@@ -0,0 +1,338 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, select
+
+from app.core.db import SessionLocal
+from app.core.security import ROLE_ADMIN, ROLE_TEACHER
+from app.models.attendance import Attendance
+from app.models.course import Course
+from app.models.feedback import Feedback
+from app.models.lesson import Lesson
+from app.models.user import User
+
+# (header, arrow type name) per output column
+ExportColumns = Sequence[Tuple[str, str]]
+
+ATTENDANCE_COLUMNS: ExportColumns = [
+    ("ФИО студента", "string"),
+    ("Курс", "string"),
+    ("Дата занятия", "date"),
+    ("Статус", "string"),
+]
+
+FEEDBACK_COLUMNS: ExportColumns = [
+    ("ФИО студента", "string"),
+    ("Курс", "string"),
+    ("Дата занятия", "date"),
+    ("Тема занятия", "string"),
+    ("Оценка", "float"),
+    ("Комментарий", "string"),
+    ("Скрыт", "bool"),
+    ("Дата отзыва", "timestamp"),
+]
+
+# rows fetched per round trip and written per chunk
+EXPORT_CHUNK_ROWS = 1000
+# columnar formats write one row group / record batch per chunk, so they use bigger ones
+COLUMNAR_CHUNK_ROWS = 65536
+
+
+def attendance_export_select(
+    current_user: User,
+    course_id: Optional[int],
+    student_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+) -> Select:
+    stmt = (
+        select(User.full_name, User.email, Course.name, Lesson.date, Attendance.status)
+        .select_from(Attendance)
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .join(Course, Lesson.course_id == Course.id)
+        .join(User, Attendance.student_id == User.id)
+    )
+
+    if current_user.role == ROLE_TEACHER:
+        stmt = stmt.where(Course.teacher_id == current_user.id)
+
+    if current_user.role not in (ROLE_ADMIN, ROLE_TEACHER):
+        stmt = stmt.where(Attendance.student_id == current_user.id)
+        student_id = None
+
+    if course_id is not None:
+        stmt = stmt.where(Lesson.course_id == course_id)
+    if student_id is not None:
+        stmt = stmt.where(Attendance.student_id == student_id)
+    if from_date is not None:
+        stmt = stmt.where(Lesson.date >= from_date)
+    if to_date is not None:
+        stmt = stmt.where(Lesson.date <= to_date)
+
+    # Attendance id order, so exports are reproducible and a streamed export
+    # can be compared between runs. The original export had no ORDER BY and
+    # came out in whatever order the join plan produced (for teachers, grouped
+    # by course), so row order differs from exports made before this.
+    return stmt.order_by(Attendance.id.asc())
+
+
+def attendance_values(row) -> list:
+    full_name, email, course_name, lesson_date, status = row
+    return [full_name or email, course_name or "", lesson_date, status.value]
+
+
+def feedback_export_select(
+    current_user: User,
+    course_id: Optional[int],
+    lesson_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    include_hidden: bool,
+) -> Select:
+    # same visibility rules as GET /feedback/
+    stmt = (
+        select(
+            User.full_name,
+            User.email,
+            Course.name,
+            Lesson.date,
+            Lesson.topic,
+            Feedback.rating,
+            Feedback.comment,
+            Feedback.is_hidden,
+            Feedback.created_at,
+        )
+        .select_from(Feedback)
+        .join(Lesson, Feedback.lesson_id == Lesson.id)
+        .join(Course, Lesson.course_id == Course.id)
+        .join(User, Feedback.student_id == User.id)
+    )
+
+    if current_user.role == ROLE_TEACHER:
+        stmt = stmt.where(Course.teacher_id == current_user.id)
+
+    if include_hidden and current_user.role != ROLE_ADMIN:
+        include_hidden = False
+    if not include_hidden:
+        stmt = stmt.where(Feedback.is_hidden.is_(False))
+
+    if course_id is not None:
+        stmt = stmt.where(Lesson.course_id == course_id)
+    if lesson_id is not None:
+        stmt = stmt.where(Feedback.lesson_id == lesson_id)
+    if from_date is not None:
+        stmt = stmt.where(Lesson.date >= from_date)
+    if to_date is not None:
+        stmt = stmt.where(Lesson.date <= to_date)
+
+    return stmt.order_by(Feedback.id.asc())
+
+
+def feedback_values(row) -> list:
+    full_name, email, course_name, lesson_date, topic, rating, comment, is_hidden, created_at = row
+    return [
+        full_name or email,
+        course_name or "",
+        lesson_date,
+        topic or "",
+        float(rating),
+        comment or "",
+        bool(is_hidden),
+        created_at,
+    ]
+
+
+def iter_export_chunks(
+    stmt: Select, values: Callable[[object], list], chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> Iterator[List[list]]:
+    # Uses its own session: the response body is produced after the request's
+    # dependencies have been torn down. yield_per keeps a server-side cursor
+    # open (stream_results) so only one chunk is held in memory.
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=chunk_rows))
+        for partition in result.partitions():
+            yield [values(row) for row in partition]
+    finally:
+        db.close()
+
+
+def _text(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _headers(columns: ExportColumns) -> List[str]:
+    return [name for name, _ in columns]
+
+
+def stream_csv(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_headers(columns))
+    for chunk in chunks:
+        writer.writerows([_text(v) for v in values] for values in chunk)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_json_array(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[str]:
+    headers = _headers(columns)
+    first = True
+    yield "["
+    for chunk in chunks:
+        parts = []
+        for values in chunk:
+            item = json.dumps(dict(zip(headers, map(_text, values))), ensure_ascii=False)
+            parts.append(item if first else "," + item)
+            first = False
+        yield "".join(parts)
+    yield "]"
+
+
+def stream_ndjson(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[str]:
+    headers = _headers(columns)
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(dict(zip(headers, map(_text, values))), ensure_ascii=False) + "\n" for values in chunk
+        )
+
+
+def _compressed(text_chunks: Iterator[str], compressor) -> Iterator[bytes]:
+    for text in text_chunks:
+        data = compressor.compress(text.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_csv_gzip(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[bytes]:
+    # wbits=31: zlib stream with a gzip header
+    return _compressed(stream_csv(chunks, columns), zlib.compressobj(6, zlib.DEFLATED, 31))
+
+
+def stream_csv_zstd(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[bytes]:
+    import zstandard
+
+    return _compressed(stream_csv(chunks, columns), zstandard.ZstdCompressor(level=3).compressobj())
+
+
+class _ChunkSink(io.RawIOBase):
+    # write-only file object that hands written bytes back to the response generator
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def _arrow_schema(columns: ExportColumns):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "date": pa.date32(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _record_batch(chunk: List[list], schema):
+    import pyarrow as pa
+
+    arrays = [pa.array([values[i] for values in chunk], type=field.type) for i, field in enumerate(schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_parquet(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    for chunk in chunks:
+        writer.write_batch(_record_batch(chunk, schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def stream_arrow(chunks: Iterable[List[list]], columns: ExportColumns) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    for chunk in chunks:
+        writer.write_batch(_record_batch(chunk, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+class ExportFormat:
+    def __init__(
+        self,
+        writer: Callable[[Iterable[List[list]], ExportColumns], Iterator],
+        media_type: str,
+        extension: str,
+        chunk_rows: int = EXPORT_CHUNK_ROWS,
+        requires: Optional[str] = None,
+    ):
+        self.writer = writer
+        self.media_type = media_type
+        self.extension = extension
+        self.chunk_rows = chunk_rows
+        self.requires = requires
+
+    def missing_dependency(self) -> Optional[str]:
+        if self.requires is None:
+            return None
+        try:
+            __import__(self.requires)
+        except ImportError:
+            return self.requires
+        return None
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat(stream_csv, "text/csv", "csv"),
+    "csv_gzip": ExportFormat(stream_csv_gzip, "application/gzip", "csv.gz"),
+    "csv_zstd": ExportFormat(stream_csv_zstd, "application/zstd", "csv.zst", requires="zstandard"),
+    "json": ExportFormat(stream_json_array, "application/json", "json"),
+    "ndjson": ExportFormat(stream_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": ExportFormat(
+        stream_parquet, "application/vnd.apache.parquet", "parquet", COLUMNAR_CHUNK_ROWS, requires="pyarrow"
+    ),
+    "arrow": ExportFormat(
+        stream_arrow, "application/vnd.apache.arrow.stream", "arrow", COLUMNAR_CHUNK_ROWS, requires="pyarrow"
+    ),
+}
+
+EXPORT_FORMAT_PATTERN = "^(" + "|".join(EXPORT_FORMATS) + ")$"
@@ -0,0 +1,438 @@
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, and_, bindparam, case, delete, func, insert, literal, null, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.security import ROLE_ADMIN, ROLE_TEACHER
+from app.core.sql import count_where, upsert
+
+from app.models.feedback import Feedback
+from app.models.feedback_rollup import FeedbackRatingRollup
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.schemas.feedback import FeedbackImportItem, FeedbackImportResult, FeedbackSelection
+from app.services.cache_service import invalidate_analytics
+
+BUCKET_COLUMNS = ("r1", "r2", "r3", "r4", "r5")
+
+FeedbackRollupKey = Tuple[int, Optional[int]]
+FeedbackRollupCounts = Tuple[int, float, int, int, int, int, int]
+
+
+def rating_bucket(rating: float) -> int:
+    # round-half-up, clamped to 1..5 (same as rating_bucket_expr below)
+    k = int(math.floor(float(rating) + 0.5))
+    return min(5, max(1, k))
+
+
+def rating_bucket_expr(rating=Feedback.rating):
+    return case(
+        (rating < 1.5, 1),
+        (rating < 2.5, 2),
+        (rating < 3.5, 3),
+        (rating < 4.5, 4),
+        else_=5,
+    )
+
+
+ROLLUP_COUNTS = ("count", "rating_sum", *BUCKET_COLUMNS)
+
+
+def _apply_rollup_deltas(db: Session, deltas: Dict[FeedbackRollupKey, Dict[str, float]], now: datetime) -> None:
+    # Adds per-row deltas to the rollup rows (lesson_id None is the course
+    # total). Rows gaining feedback go through INSERT .. ON CONFLICT DO UPDATE,
+    # so concurrent first feedback for a lesson cannot insert the row twice and
+    # fail on the unique index. The other deltas only move or remove counts of
+    # rows that already exist and get a plain UPDATE.
+    table = FeedbackRatingRollup.__table__
+    added = [
+        {"course_id": course_id, "lesson_id": lesson_id, "updated_at": now, **counts}
+        for (course_id, lesson_id), counts in deltas.items()
+        if counts["count"] > 0
+    ]
+    for per_lesson in (True, False):
+        rows = [row for row in added if (row["lesson_id"] is not None) == per_lesson]
+        if not rows:
+            continue
+        stmt = upsert(db.get_bind().dialect.name, table)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in ROLLUP_COUNTS}
+        set_["updated_at"] = stmt.excluded.updated_at
+        if per_lesson:
+            stmt = stmt.on_conflict_do_update(index_elements=["course_id", "lesson_id"], set_=set_)
+        else:
+            # the partial unique index on course_id WHERE lesson_id IS NULL
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["course_id"], index_where=table.c.lesson_id.is_(None), set_=set_
+            )
+        db.execute(stmt, rows)
+
+    changed = [
+        {"cid": course_id, "lid": lesson_id, **{f"d_{name}": value for name, value in counts.items()}}
+        for (course_id, lesson_id), counts in deltas.items()
+        if counts["count"] <= 0 and any(counts.values())
+    ]
+    if not changed:
+        return
+    stmt = update(table).values(
+        {**{name: table.c[name] + bindparam(f"d_{name}") for name in ROLLUP_COUNTS}, "updated_at": now}
+    )
+    stmt = stmt.where(table.c.course_id == bindparam("cid"))
+    per_lesson = [row for row in changed if row["lid"] is not None]
+    if per_lesson:
+        db.execute(stmt.where(table.c.lesson_id == bindparam("lid")), per_lesson)
+    totals = [{k: v for k, v in row.items() if k != "lid"} for row in changed if row["lid"] is None]
+    if totals:
+        db.execute(stmt.where(table.c.lesson_id.is_(None)), totals)
+
+
+def record_feedback_change(
+    db: Session,
+    course_id: int,
+    lesson_id: int,
+    old_rating: Optional[float] = None,
+    new_rating: Optional[float] = None,
+) -> None:
+    # Ratings are passed only for visible feedback: None means "not counted"
+    # (missing or hidden). Call inside the transaction that changes the row.
+    record_feedback_changes(db, [(course_id, lesson_id, old_rating, new_rating)])
+
+
+def record_feedback_changes(
+    db: Session,
+    changes: Iterable[Tuple[int, int, Optional[float], Optional[float]]],
+) -> None:
+    # record_feedback_change for many (course_id, lesson_id, old_rating,
+    # new_rating) rows: deltas are summed per rollup row, then at most two
+    # upserts and two executemany UPDATEs.
+    deltas: Dict[FeedbackRollupKey, Dict[str, float]] = {}
+    for course_id, lesson_id, old_rating, new_rating in changes:
+        if old_rating is not None and new_rating is not None and float(old_rating) == float(new_rating):
+            continue
+        for key in ((course_id, lesson_id), (course_id, None)):
+            counts = deltas.setdefault(key, {"count": 0, "rating_sum": 0.0, **dict.fromkeys(BUCKET_COLUMNS, 0)})
+            for rating, sign in ((old_rating, -1), (new_rating, 1)):
+                if rating is not None:
+                    counts["count"] += sign
+                    counts["rating_sum"] += sign * float(rating)
+                    counts[BUCKET_COLUMNS[rating_bucket(rating) - 1]] += sign
+    if not deltas:
+        return
+    invalidate_analytics(db, sorted({course_id for course_id, _ in deltas}))
+    _apply_rollup_deltas(db, deltas, datetime.utcnow())
+
+
+def feedback_selection_clauses(selection: FeedbackSelection) -> list:
+    # WHERE clauses on feedback for a bulk selection; empty if nothing is selected
+    clauses = []
+    if selection.ids is not None:
+        clauses.append(Feedback.id.in_(selection.ids))
+    if selection.lesson_id is not None:
+        clauses.append(Feedback.lesson_id == selection.lesson_id)
+    if selection.student_id is not None:
+        clauses.append(Feedback.student_id == selection.student_id)
+    if selection.min_rating is not None:
+        clauses.append(Feedback.rating >= selection.min_rating)
+    if selection.max_rating is not None:
+        clauses.append(Feedback.rating <= selection.max_rating)
+
+    lesson_clauses = []
+    if selection.course_id is not None:
+        lesson_clauses.append(Lesson.course_id == selection.course_id)
+    if selection.from_date is not None:
+        lesson_clauses.append(Lesson.date >= selection.from_date)
+    if selection.to_date is not None:
+        lesson_clauses.append(Lesson.date <= selection.to_date)
+    if lesson_clauses:
+        clauses.append(Feedback.lesson_id.in_(select(Lesson.id).where(*lesson_clauses)))
+    return clauses
+
+
+def _lesson_courses(db: Session, lesson_ids: Iterable[int]) -> Dict[int, int]:
+    ids = set(lesson_ids)
+    if not ids:
+        return {}
+    return {r.id: r.course_id for r in db.execute(select(Lesson.id, Lesson.course_id).where(Lesson.id.in_(ids)))}
+
+
+def moderate_feedback(db: Session, clauses: Sequence, action: str) -> int:
+    # Hides, unhides or deletes every feedback row matching `clauses` with one
+    # UPDATE/DELETE .. RETURNING; the returned rows give the exact rollup
+    # deltas. Rows already in the target state are not touched. Returns the
+    # number of changed rows; the caller commits.
+    if action == "delete":
+        stmt = (
+            delete(Feedback)
+            .where(*clauses)
+            .returning(Feedback.lesson_id, Feedback.rating, Feedback.is_hidden)
+        )
+    else:
+        hide = action == "hide"
+        stmt = (
+            update(Feedback)
+            .where(*clauses, Feedback.is_hidden.is_(not hide))
+            .values(is_hidden=hide)
+            .returning(Feedback.lesson_id, Feedback.rating, Feedback.is_hidden)
+        )
+    rows = db.execute(stmt, execution_options={"synchronize_session": False}).all()
+    if not rows:
+        return 0
+
+    courses = _lesson_courses(db, (r.lesson_id for r in rows))
+    changes = []
+    for r in rows:
+        if action == "delete":
+            if not r.is_hidden:
+                changes.append((courses[r.lesson_id], r.lesson_id, r.rating, None))
+        elif r.is_hidden:
+            changes.append((courses[r.lesson_id], r.lesson_id, r.rating, None))
+        else:
+            changes.append((courses[r.lesson_id], r.lesson_id, None, r.rating))
+    record_feedback_changes(db, changes)
+    return len(rows)
+
+
+def import_feedback(
+    db: Session, items: Sequence[FeedbackImportItem], overwrite: bool = False
+) -> List[FeedbackImportResult]:
+    # Writes feedback collected offline with one INSERT .. ON CONFLICT
+    # (lesson_id, student_id): existing rows are skipped, or with `overwrite`
+    # updated when rating, comment or visibility differ. Returns one result per
+    # item, in order. The caller checks permissions and commits.
+    results: List[Optional[FeedbackImportResult]] = [None] * len(items)
+
+    def fail(i: int, detail: str) -> None:
+        results[i] = FeedbackImportResult(
+            lesson_id=items[i].lesson_id, student_id=items[i].student_id, result="error", detail=detail
+        )
+
+    seen = set()
+    for i, item in enumerate(items):
+        key = (item.lesson_id, item.student_id)
+        if key in seen:
+            fail(i, "Duplicate feedback")
+        seen.add(key)
+
+    courses = _lesson_courses(db, (item.lesson_id for item in items))
+    student_ids = {item.student_id for item in items}
+    known = {r[0] for r in db.execute(select(User.id).where(User.id.in_(student_ids)))}
+    todo: Dict[Tuple[int, int], int] = {}
+    for i, item in enumerate(items):
+        if results[i] is not None:
+            continue
+        if item.lesson_id not in courses:
+            fail(i, "Lesson not found")
+        elif item.student_id not in known:
+            fail(i, "Student not found")
+        else:
+            todo[(item.lesson_id, item.student_id)] = i
+    if not todo:
+        return results
+
+    # previous ratings feed the rollup deltas; locked on PostgreSQL until commit
+    previous = {
+        (r.lesson_id, r.student_id): (r.id, r.rating, r.is_hidden)
+        for r in db.execute(
+            select(Feedback.id, Feedback.lesson_id, Feedback.student_id, Feedback.rating, Feedback.is_hidden)
+            .where(
+                Feedback.lesson_id.in_({lesson_id for lesson_id, _ in todo}),
+                Feedback.student_id.in_({student_id for _, student_id in todo}),
+            )
+            .with_for_update()
+        )
+        if (r.lesson_id, r.student_id) in todo
+    }
+
+    # fixed statement + parameter list, as in upsert_lesson_attendance
+    table = Feedback.__table__
+    stmt = upsert(db.get_bind().dialect.name, table)
+    excluded = stmt.excluded
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.lesson_id, table.c.student_id],
+            set_={
+                "rating": excluded.rating,
+                "comment": func.coalesce(excluded.comment, table.c.comment),
+                "is_hidden": excluded.is_hidden,
+            },
+            where=or_(
+                table.c.rating != excluded.rating,
+                table.c.is_hidden != excluded.is_hidden,
+                and_(excluded.comment.isnot(None), table.c.comment.is_distinct_from(excluded.comment)),
+            ),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.lesson_id, table.c.student_id])
+    stmt = stmt.returning(table.c.id, table.c.lesson_id, table.c.student_id)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "lesson_id": lesson_id,
+            "student_id": student_id,
+            "rating": items[i].rating,
+            "comment": items[i].comment,
+            "is_hidden": items[i].is_hidden,
+            "created_at": items[i].created_at or now,
+        }
+        for (lesson_id, student_id), i in todo.items()
+    ]
+    written = {(r.lesson_id, r.student_id): r.id for r in db.execute(stmt, rows)}
+
+    changes = []
+    for key, i in todo.items():
+        old = previous.get(key)
+        if key in written:
+            item = items[i]
+            results[i] = FeedbackImportResult(
+                lesson_id=key[0], student_id=key[1], result="updated" if old else "created", id=written[key]
+            )
+            changes.append(
+                (
+                    courses[key[0]],
+                    key[0],
+                    None if old is None or old[2] else old[1],
+                    None if item.is_hidden else item.rating,
+                )
+            )
+        else:
+            # old is None only if a concurrent request inserted the row first
+            results[i] = FeedbackImportResult(
+                lesson_id=key[0],
+                student_id=key[1],
+                result="unchanged" if overwrite else "skipped",
+                id=old[0] if old else None,
+            )
+    record_feedback_changes(db, changes)
+    return results
+
+
+def _raw_rollup_select(per_lesson: bool, course_ids: Optional[List[int]]):
+    bucket = rating_bucket_expr()
+    cols = [
+        Lesson.course_id.label("course_id"),
+        (Feedback.lesson_id if per_lesson else null()).label("lesson_id"),
+        func.count(Feedback.id).label("count"),
+        func.coalesce(func.sum(Feedback.rating), 0.0).label("rating_sum"),
+    ]
+    for i, name in enumerate(BUCKET_COLUMNS, start=1):
+        cols.append(count_where(bucket == i).label(name))
+    cols.append(literal(datetime.utcnow(), DateTime).label("updated_at"))
+
+    q = (
+        select(*cols)
+        .select_from(Feedback)
+        .join(Lesson, Feedback.lesson_id == Lesson.id)
+        .where(Feedback.is_hidden.is_(False))
+    )
+    if course_ids is not None:
+        q = q.where(Lesson.course_id.in_(course_ids))
+    if per_lesson:
+        return q.group_by(Lesson.course_id, Feedback.lesson_id)
+    return q.group_by(Lesson.course_id)
+
+
+def rebuild_feedback_rollup(db: Session, course_ids: Optional[Iterable[int]] = None) -> int:
+    ids = sorted(set(course_ids)) if course_ids is not None else None
+    delete_q = db.query(FeedbackRatingRollup)
+    if ids is not None:
+        if not ids:
+            return 0
+        delete_q = delete_q.filter(FeedbackRatingRollup.course_id.in_(ids))
+    delete_q.delete(synchronize_session=False)
+    invalidate_analytics(db, ids)
+
+    target_cols = ["course_id", "lesson_id", "count", "rating_sum", *BUCKET_COLUMNS, "updated_at"]
+    inserted = 0
+    for per_lesson in (False, True):
+        stmt = insert(FeedbackRatingRollup).from_select(target_cols, _raw_rollup_select(per_lesson, ids))
+        inserted += db.execute(stmt).rowcount or 0
+    return inserted
+
+
+def check_feedback_rollup(
+    db: Session, course_ids: Optional[Iterable[int]] = None
+) -> List[Tuple[FeedbackRollupKey, Optional[FeedbackRollupCounts], Optional[FeedbackRollupCounts]]]:
+    ids = sorted(set(course_ids)) if course_ids is not None else None
+
+    expected = {}
+    for per_lesson in (False, True):
+        for r in db.execute(_raw_rollup_select(per_lesson, ids)):
+            key = (int(r.course_id), int(r.lesson_id) if r.lesson_id is not None else None)
+            expected[key] = (int(r.count), float(r.rating_sum), *(int(getattr(r, n)) for n in BUCKET_COLUMNS))
+
+    actual_q = db.query(FeedbackRatingRollup).filter(FeedbackRatingRollup.count != 0)
+    if ids is not None:
+        actual_q = actual_q.filter(FeedbackRatingRollup.course_id.in_(ids))
+    actual = {}
+    for r in actual_q.all():
+        actual[(r.course_id, r.lesson_id)] = (r.count, r.rating_sum, *(getattr(r, n) for n in BUCKET_COLUMNS))
+
+    def same(a, b) -> bool:
+        if a is None or b is None:
+            return a is b
+        return a[0] == b[0] and math.isclose(a[1], b[1], abs_tol=1e-6) and a[2:] == b[2:]
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], k[1] or 0)):
+        if not same(expected.get(key), actual.get(key)):
+            mismatches.append((key, expected.get(key), actual.get(key)))
+    return mismatches
+
+
+def course_ids_for_author(db: Session, student_id: int) -> List[int]:
+    rows = (
+        db.query(Lesson.course_id)
+        .join(Feedback, Feedback.lesson_id == Lesson.id)
+        .filter(Feedback.student_id == student_id)
+        .distinct()
+        .all()
+    )
+    return [int(r[0]) for r in rows]
+
+
+def feedback_list_query(
+    db: Session,
+    current_user: User,
+    lesson_id: Optional[int],
+    course_id: Optional[int],
+    include_hidden: bool,
+):
+    # Column-only read path for GET /feedback/: one joined select, rows carry
+    # exactly the FeedbackRead fields. Paginate with FEEDBACK_LIST_KEYS, newest first.
+    query = (
+        db.query(
+            Feedback.id.label("id"),
+            Feedback.lesson_id.label("lesson_id"),
+            Feedback.student_id.label("student_id"),
+            Feedback.rating.label("rating"),
+            Feedback.comment.label("comment"),
+            Feedback.is_hidden.label("is_hidden"),
+            Feedback.created_at.label("created_at"),
+            func.coalesce(func.nullif(User.full_name, ""), User.email).label("student_name"),
+            Course.name.label("course_name"),
+            Lesson.topic.label("lesson_topic"),
+            Lesson.date.label("lesson_date"),
+        )
+        .select_from(Feedback)
+        .join(Lesson, Feedback.lesson_id == Lesson.id)
+        .join(Course, Lesson.course_id == Course.id)
+        .join(User, Feedback.student_id == User.id)
+    )
+
+    if current_user.role == ROLE_TEACHER:
+        query = query.filter(Course.teacher_id == current_user.id)
+    if lesson_id is not None:
+        query = query.filter(Feedback.lesson_id == lesson_id)
+    if course_id is not None:
+        query = query.filter(Lesson.course_id == course_id)
+
+    if include_hidden and current_user.role != ROLE_ADMIN:
+        include_hidden = False
+    if not include_hidden:
+        query = query.filter(Feedback.is_hidden.is_(False))
+    return query
+
+
+FEEDBACK_LIST_KEYS = (Feedback.created_at, Feedback.id)
@@ -0,0 +1,544 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sqlalchemy import case, event
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.db import SessionLocal
+from app.core.metrics import metrics_registry
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.lesson import Lesson
+from app.services.cache_service import RISK_MODELS_VERSION, analytics_cache, course_version
+
+logger = logging.getLogger(__name__)
+
+FEATURES = [
+    "recent_absent_rate",
+    "recent_late_rate",
+    "recent_excused_rate",
+    "absent_streak",
+    "overall_absent_rate",
+    "overall_late_rate",
+    "overall_excused_rate",
+    "history_len",
+    "window_len",
+]
+
+MIN_TRAINING_SAMPLES = 30
+
+STATUS_PRESENT = 0
+STATUS_LATE = 1
+STATUS_EXCUSED = 2
+STATUS_ABSENT = 3
+STATUS_OTHER = 4
+
+STATUS_CODES = {
+    "present": STATUS_PRESENT,
+    "late": STATUS_LATE,
+    "excused": STATUS_EXCUSED,
+    "absent": STATUS_ABSENT,
+}
+
+Series = Dict[Tuple[int, int], np.ndarray]
+
+# training runs on the background thread, but train_now() and scoring run on request threads
+_train_seconds = metrics_registry.family(
+    "risk_model_train_seconds",
+    "histogram",
+    "Risk model (re)training time: loading the series, fitting, saving.",
+    labels=("outcome",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+    threadsafe=True,
+)
+_infer_seconds = metrics_registry.family(
+    "risk_model_infer_seconds",
+    "histogram",
+    "Risk scoring time of one request's feature matrix.",
+    labels=("model",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    threadsafe=True,
+)
+
+
+def encode_status(status) -> int:
+    return STATUS_CODES.get(str(status or "").lower().strip(), STATUS_OTHER)
+
+
+def status_code_expr():
+    # STATUS_CODES computed by the database from the stored enum value
+    return case(
+        {AttendanceStatus(name): code for name, code in STATUS_CODES.items()},
+        value=Attendance.status,
+        else_=STATUS_OTHER,
+    )
+
+
+def load_attendance_series(
+    db: Session,
+    course_ids: Sequence[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    student_id: Optional[int],
+) -> Series:
+    q = (
+        db.query(
+            Attendance.student_id.label("sid"),
+            Lesson.course_id.label("cid"),
+            status_code_expr().label("code"),
+        )
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .filter(Lesson.course_id.in_(list(course_ids)))
+    )
+    if from_date is not None:
+        q = q.filter(Lesson.date >= from_date)
+    if to_date is not None:
+        q = q.filter(Lesson.date <= to_date)
+    if student_id is not None:
+        q = q.filter(Attendance.student_id == student_id)
+
+    q = q.order_by(Attendance.student_id.asc(), Lesson.course_id.asc(), Lesson.date.asc())
+    rows = q.all()
+    if not rows:
+        return {}
+
+    sids = np.fromiter((r.sid for r in rows), dtype=np.int64, count=len(rows))
+    cids = np.fromiter((r.cid for r in rows), dtype=np.int64, count=len(rows))
+    codes = np.fromiter((r.code for r in rows), dtype=np.int8, count=len(rows))
+
+    # rows are ordered by (student, course): split at every key change
+    breaks = np.flatnonzero((np.diff(sids) != 0) | (np.diff(cids) != 0)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(rows)]))
+    return {(int(sids[a]), int(cids[a])): codes[a:b] for a, b in zip(starts, ends)}
+
+
+def _flatten(series: Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # all series back to back, plus [start, end) offsets of each one
+    parts = list(series.values())
+    lengths = np.fromiter((p.shape[0] for p in parts), dtype=np.int64, count=len(parts))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    codes = np.concatenate(parts) if parts else np.empty(0, dtype=np.int8)
+    return codes, starts, ends
+
+
+def _prefix_counts(codes: np.ndarray) -> np.ndarray:
+    # counts[c, i] = number of absent/late/excused (c = 0/1/2) among codes[:i]
+    counts = np.zeros((3, codes.shape[0] + 1), dtype=np.int64)
+    for row, code in enumerate((STATUS_ABSENT, STATUS_LATE, STATUS_EXCUSED)):
+        np.cumsum(codes == code, out=counts[row, 1:])
+    return counts
+
+
+def _absent_runs(codes: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # runs[i] = length of the absent streak ending at codes[i], never crossing a series start
+    idx = np.arange(codes.shape[0])
+    last_other = np.where(codes != STATUS_ABSENT, idx, -1)
+    last_other[starts] = np.maximum(last_other[starts], starts - 1)
+    return idx - np.maximum.accumulate(last_other)
+
+
+def build_training_set(series: Series, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # One row per position t >= k of every series: features of (codes[t-k:t], codes[:t]),
+    # label codes[t] == absent.
+    codes, starts, ends = _flatten(series)
+    lengths = ends - starts
+    pos = np.arange(codes.shape[0]) - np.repeat(starts, lengths)
+    first = np.repeat(starts, lengths)
+    i = np.flatnonzero(pos >= k)
+    if i.shape[0] == 0:
+        return np.empty((0, len(FEATURES))), np.empty(0, dtype=np.int64)
+
+    counts = _prefix_counts(codes)
+    runs = _absent_runs(codes, starts)
+    t = pos[i]
+
+    X = np.empty((i.shape[0], len(FEATURES)), dtype=np.float64)
+    X[:, 0:3] = ((counts[:, i] - counts[:, i - k]) / k).T
+    X[:, 3] = np.minimum(runs[i - 1], k)
+    X[:, 4:7] = ((counts[:, i] - counts[:, first[i]]) / t).T
+    X[:, 7] = t
+    X[:, 8] = k
+    y = (codes[i] == STATUS_ABSENT).astype(np.int64)
+    return X, y
+
+
+def latest_features(series: Series, k: int) -> np.ndarray:
+    # One row per series (in series order): features of its last min(k, n) statuses
+    # against the full history. Empty series get an all-zero row.
+    codes, starts, ends = _flatten(series)
+    lengths = ends - starts
+    wlen = np.minimum(lengths, k)
+    counts = _prefix_counts(codes)
+    runs = _absent_runs(codes, starts)
+    last = np.maximum(ends - 1, 0)
+
+    F = np.zeros((lengths.shape[0], len(FEATURES)), dtype=np.float64)
+    F[:, 0:3] = ((counts[:, ends] - counts[:, ends - wlen]) / np.maximum(wlen, 1)).T
+    if codes.shape[0]:
+        F[:, 3] = np.where(lengths > 0, np.minimum(runs[last], wlen), 0)
+    F[:, 4:7] = ((counts[:, ends] - counts[:, starts]) / np.maximum(lengths, 1)).T
+    F[:, 7] = lengths
+    F[:, 8] = wlen
+    return F
+
+
+def fit_risk_model(X: np.ndarray, y: np.ndarray):
+    if y.shape[0] < MIN_TRAINING_SAMPLES or np.unique(y).shape[0] < 2:
+        return None, None
+    try:
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        model = Pipeline(
+            steps=[
+                ("scaler", StandardScaler()),
+                ("lr", LogisticRegression(max_iter=2000, class_weight="balanced", solver="liblinear")),
+            ]
+        )
+        model.fit(X, y)
+        classes = list(model.named_steps["lr"].classes_)
+        if 1 not in classes:
+            return None, None
+        return model, classes.index(1)
+    except Exception:
+        logger.exception("risk model training failed")
+        return None, None
+
+
+def heuristic_absent_proba(F: np.ndarray) -> np.ndarray:
+    # Laplace-smoothed absent share of the recent window
+    window_size = F[:, 8]
+    window_absent = np.rint(F[:, 0] * window_size)
+    return (window_absent + 1) / (np.maximum(window_size, 1) + 2)
+
+
+def score_absent_proba(model: Optional["TrainedRiskModel"], F: np.ndarray) -> np.ndarray:
+    # One predict_proba call for the whole feature matrix; falls back to the heuristic.
+    if F.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+    started = time.perf_counter()
+    proba = None
+    if model is not None and model.trained:
+        try:
+            proba = model.pipeline.predict_proba(F)[:, model.absent_class_index].astype(np.float64)
+        except Exception:
+            logger.exception("risk model scoring failed")
+    model_name = "logistic_regression"
+    if proba is None:
+        proba = heuristic_absent_proba(F)
+        model_name = "heuristic"
+    proba = np.clip(proba, 0.005, 0.995)
+    _infer_seconds.observe((model_name,), time.perf_counter() - started)
+    return proba
+
+
+def top_risk_order(proba: np.ndarray, F: np.ndarray, limit: int) -> np.ndarray:
+    # Indices of the top `limit` rows by (proba, absent_streak, recent_absent_rate, history_len)
+    # descending, ties in input order. Only rows that can make the cut are fully sorted.
+    n = proba.shape[0]
+    candidates = np.arange(n)
+    if n > limit:
+        cutoff = np.partition(proba, n - limit)[n - limit]
+        candidates = np.flatnonzero(proba >= cutoff)
+    order = np.lexsort(
+        (
+            candidates,
+            -F[candidates, 7],
+            -F[candidates, 0],
+            -F[candidates, 3],
+            -proba[candidates],
+        )
+    )
+    return candidates[order[:limit]]
+
+
+class RiskScope:
+    def __init__(
+        self,
+        course_ids: Sequence[int],
+        from_date: Optional[date],
+        to_date: Optional[date],
+        student_id: Optional[int],
+        k: int,
+    ):
+        self.course_ids = tuple(sorted(set(int(c) for c in course_ids)))
+        self.from_date = from_date
+        self.to_date = to_date
+        self.student_id = student_id
+        self.k = k
+
+    @property
+    def key(self) -> str:
+        return "|".join(
+            [
+                "courses=" + ",".join(str(c) for c in self.course_ids),
+                f"from={self.from_date or ''}",
+                f"to={self.to_date or ''}",
+                f"student={self.student_id if self.student_id is not None else '*'}",
+                f"k={self.k}",
+            ]
+        )
+
+
+class TrainedRiskModel:
+    def __init__(
+        self,
+        key: str,
+        pipeline,
+        absent_class_index: Optional[int],
+        version: int,
+        trained_at: datetime,
+        training_samples: int,
+        write_mark: int = 0,
+    ):
+        self.key = key
+        self.pipeline = pipeline
+        self.absent_class_index = absent_class_index
+        self.version = version
+        self.trained_at = trained_at
+        self.training_samples = training_samples
+        self.write_mark = write_mark
+
+    @property
+    def trained(self) -> bool:
+        return self.pipeline is not None and self.absent_class_index is not None
+
+
+class RiskModelRegistry:
+    # In-memory LRU of trained models backed by joblib files. Requests only read
+    # from it; (re)training runs on a single background thread when a model is
+    # missing, older than max_age_seconds, or its courses saw retrain_after_writes
+    # attendance writes since it was trained.
+
+    def __init__(self, model_dir: str, max_age_seconds: int, retrain_after_writes: int, max_models: int):
+        self.model_dir = model_dir
+        self.max_age_seconds = max_age_seconds
+        self.retrain_after_writes = retrain_after_writes
+        self.max_models = max_models
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, TrainedRiskModel]" = OrderedDict()
+        self._scopes: Dict[str, RiskScope] = {}
+        self._pending: set = set()
+        self._writes: Dict[int, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-train")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.model_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".joblib")
+
+    def _write_count(self, course_ids: Sequence[int]) -> int:
+        return sum(self._writes.get(cid, 0) for cid in course_ids)
+
+    def _remember(self, scope: RiskScope, model: TrainedRiskModel) -> None:
+        self._models[model.key] = model
+        self._scopes[model.key] = scope
+        self._models.move_to_end(model.key)
+        while len(self._models) > self.max_models:
+            old_key, _ = self._models.popitem(last=False)
+            self._scopes.pop(old_key, None)
+
+    def _is_stale(self, scope: RiskScope, model: TrainedRiskModel) -> bool:
+        age = (datetime.utcnow() - model.trained_at).total_seconds()
+        if age > self.max_age_seconds:
+            return True
+        return self._write_count(scope.course_ids) - model.write_mark >= self.retrain_after_writes
+
+    def _load(self, scope: RiskScope) -> Optional[TrainedRiskModel]:
+        path = self._path(scope.key)
+        if not os.path.exists(path):
+            return None
+        try:
+            payload = joblib.load(path)
+        except Exception:
+            logger.exception("failed to load risk model %s", path)
+            return None
+        if payload.get("key") != scope.key:
+            return None
+        return TrainedRiskModel(
+            key=scope.key,
+            pipeline=payload.get("pipeline"),
+            absent_class_index=payload.get("absent_class_index"),
+            version=int(payload.get("version", 1)),
+            trained_at=payload.get("trained_at") or datetime.utcnow(),
+            training_samples=int(payload.get("training_samples", 0)),
+            write_mark=self._write_count(scope.course_ids),
+        )
+
+    def _save(self, model: TrainedRiskModel) -> None:
+        os.makedirs(self.model_dir, exist_ok=True)
+        path = self._path(model.key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(
+            {
+                "key": model.key,
+                "pipeline": model.pipeline,
+                "absent_class_index": model.absent_class_index,
+                "version": model.version,
+                "trained_at": model.trained_at,
+                "training_samples": model.training_samples,
+            },
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+
+    def _sweep_files(self) -> None:
+        # Scopes carry arbitrary date ranges, so files would pile up: drop the
+        # ones older than max_age_seconds (they get retrained on load anyway,
+        # leftover .tmp files included) and the least recently written beyond
+        # max_models, like the in-memory LRU.
+        try:
+            names = os.listdir(self.model_dir)
+        except OSError:
+            return
+        files = []
+        for name in names:
+            if not name.endswith((".joblib", ".tmp")):
+                continue
+            path = os.path.join(self.model_dir, name)
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        cutoff = time.time() - self.max_age_seconds
+        models = sorted((f for f in files if f[1].endswith(".joblib") and f[0] >= cutoff), reverse=True)
+        doomed = [path for mtime, path in files if mtime < cutoff] + [path for _, path in models[self.max_models :]]
+        for path in doomed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("failed to remove risk model file %s", path)
+
+    def _schedule(self, scope: RiskScope) -> None:
+        with self._lock:
+            if scope.key in self._pending:
+                return
+            self._pending.add(scope.key)
+        self._executor.submit(self._train, scope)
+
+    def _train(self, scope: RiskScope) -> None:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with self._lock:
+                write_mark = self._write_count(scope.course_ids)
+                previous = self._models.get(scope.key)
+            db = SessionLocal()
+            try:
+                series = load_attendance_series(db, scope.course_ids, scope.from_date, scope.to_date, scope.student_id)
+            finally:
+                db.close()
+            X, y = build_training_set(series, scope.k)
+            pipeline, absent_class_index = fit_risk_model(X, y)
+            model = TrainedRiskModel(
+                key=scope.key,
+                pipeline=pipeline,
+                absent_class_index=absent_class_index,
+                version=(previous.version + 1) if previous is not None else 1,
+                trained_at=datetime.utcnow(),
+                training_samples=int(y.shape[0]),
+                write_mark=write_mark,
+            )
+            try:
+                self._save(model)
+            except Exception:
+                logger.exception("failed to persist risk model %s", scope.key)
+            self._sweep_files()
+            with self._lock:
+                self._remember(scope, model)
+            # cached risk responses (and their ETags) were scored by the previous model
+            analytics_cache.bump([RISK_MODELS_VERSION, *map(course_version, scope.course_ids)])
+            # too few samples or a single class leaves the heuristic in place
+            outcome = "trained" if model.trained else "untrainable"
+        except Exception:
+            logger.exception("risk model retraining failed for %s", scope.key)
+        finally:
+            _train_seconds.observe((outcome,), time.perf_counter() - started)
+            with self._lock:
+                self._pending.discard(scope.key)
+
+    def train_now(self, scope: RiskScope) -> Optional[TrainedRiskModel]:
+        with self._lock:
+            self._pending.add(scope.key)
+        self._train(scope)
+        with self._lock:
+            return self._models.get(scope.key)
+
+    def get(self, scope: RiskScope) -> Optional[TrainedRiskModel]:
+        with self._lock:
+            model = self._models.get(scope.key)
+            if model is not None:
+                self._models.move_to_end(scope.key)
+
+        if model is None:
+            model = self._load(scope)
+            if model is not None:
+                with self._lock:
+                    self._remember(scope, model)
+
+        if model is None or self._is_stale(scope, model):
+            self._schedule(scope)
+        return model
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"models": len(self._models), "pending": len(self._pending)}
+
+    def note_attendance_write(self, course_id: int, count: int = 1) -> None:
+        # committed writes only, see record_attendance_writes
+        stale: List[RiskScope] = []
+        with self._lock:
+            self._writes[course_id] = self._writes.get(course_id, 0) + count
+            for key, model in self._models.items():
+                scope = self._scopes[key]
+                if course_id not in scope.course_ids or key in self._pending:
+                    continue
+                if self._write_count(scope.course_ids) - model.write_mark >= self.retrain_after_writes:
+                    stale.append(scope)
+        for scope in stale:
+            self._schedule(scope)
+
+
+_settings = get_settings()
+
+risk_models = RiskModelRegistry(
+    model_dir=_settings.risk_model_dir,
+    max_age_seconds=_settings.risk_model_max_age_seconds,
+    retrain_after_writes=_settings.risk_retrain_after_writes,
+    max_models=_settings.risk_model_cache_size,
+)
+
+_PENDING_WRITES_KEY = "risk_attendance_writes_pending"
+
+
+def record_attendance_writes(db: Session, course_id: int, count: int = 1) -> None:
+    # Counted towards retraining once the session's transaction commits: a
+    # retrain starting before that still reads the old rows, so its write mark
+    # must not include these writes. A rollback discards them.
+    pending = db.info.setdefault(_PENDING_WRITES_KEY, {})
+    pending[course_id] = pending.get(course_id, 0) + count
+
+
+@event.listens_for(Session, "after_commit")
+def _count_writes_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_WRITES_KEY, None)
+    for course_id, count in (pending or {}).items():
+        risk_models.note_attendance_write(course_id, count)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_writes_after_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_WRITES_KEY, None)
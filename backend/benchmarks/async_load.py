@@ -0,0 +1,143 @@
+'''Нагрузочный тест: синхронный стек против DATABASE_ASYNC=true.
+
+Для каждого режима запускает uvicorn (один воркер) в отдельном процессе с той
+же DATABASE_URL, затем --concurrency клиентов в течение --duration секунд по
+кругу опрашивают эндпоинты дашборда (списки, /users/me, аналитика) без
+If-None-Match. Печатает для каждого режима запросы в секунду, перцентили
+латентности и ошибки (эндпоинт и статус). Кэш аналитики по умолчанию выключен
+(ANALYTICS_CACHE_BACKEND=none), чтобы запросы доходили до базы; --keep-cache
+оставляет настройку окружения.
+Запуск (после python -m app.core.bigseed):
+    python -m benchmarks.async_load --concurrency 200 --duration 20
+'''
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+PATHS = [
+    ("a@a.com", "/api/v1/courses/?limit=50"),
+    ("a@a.com", "/api/v1/lessons/?course_id=1&limit=50"),
+    ("a@a.com", "/api/v1/attendance/?course_id=1&limit=100"),
+    ("a@a.com", "/api/v1/feedback/?limit=100"),
+    ("a@a.com", "/api/v1/users/me"),
+    ("a@a.com", "/api/v1/analytics/overview?course_id=1"),
+    ("b@b.com", "/api/v1/courses/?limit=50"),
+    ("b@b.com", "/api/v1/analytics/overview"),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, async_db: bool, keep_cache: bool) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_ASYNC="true" if async_db else "false")
+    if not keep_cache:
+        env["ANALYTICS_CACHE_BACKEND"] = "none"
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def wait_ready(base: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base + "/docs", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+async def load(base: str, password: str, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60.0) as client:
+        tokens = {}
+        for email in {email for email, _ in PATHS}:
+            r = await client.post("/api/v1/login", json={"email": email, "password": password})
+            r.raise_for_status()
+            tokens[email] = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        timings = []
+        errors = {}
+        deadline = time.monotonic() + duration
+
+        async def worker(n: int) -> None:
+            i = n
+            while time.monotonic() < deadline:
+                email, path = PATHS[i % len(PATHS)]
+                i += 1
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path, headers=tokens[email])
+                    outcome = r.status_code
+                except httpx.HTTPError as exc:
+                    outcome = type(exc).__name__
+                if outcome == 200:
+                    timings.append((time.perf_counter() - t0) * 1000)
+                else:
+                    errors[f"{path} {outcome}"] = errors.get(f"{path} {outcome}", 0) + 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": round(len(timings) / elapsed, 1),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+    }
+
+
+def run_mode(async_db: bool, args) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = start_server(port, async_db, args.keep_cache)
+    try:
+        wait_ready(base)
+        asyncio.run(load(base, args.password, args.concurrency, args.warmup))
+        return asyncio.run(load(base, args.password, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--password", default="123")
+    parser.add_argument("--keep-cache", action="store_true")
+    args = parser.parse_args()
+    out = {
+        "concurrency": args.concurrency,
+        "sync": run_mode(False, args),
+        "async": run_mode(True, args),
+    }
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
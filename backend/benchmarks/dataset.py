@@ -0,0 +1,376 @@
+'''Синтетический датасет для нагрузочных тестов всех эндпоинтов.
+
+Параметры: число курсов, уроков на курс, студентов (общий пул и на курс),
+распределение статусов посещаемости и плотность фидбека. Каждый курс
+генерируется своим ГСЧ из (--seed, course_id), а id строк вычисляются из
+номера курса, поэтому данные не зависят от числа процессов. Посещаемость и
+фидбек генерируются параллельно по шардам курсов (--workers процессов): на
+PostgreSQL каждый процесс пишет свой шард через COPY, на SQLite — во
+временный файл, который затем вливается INSERT ... SELECT. Индексы и роллапы
+строятся один раз в конце. Пересоздаёт все таблицы DATABASE_URL.
+
+Учётные записи для входа (пароль 123): a@a.com (admin), b@b.com (teacher,
+ведёт каждый --teachers-й курс), c@c.com (student).
+Запуск (20 млн отметок посещаемости):
+    python -m benchmarks.dataset --courses 2000 --lessons-per-course 40 \\
+        --students 50000 --students-per-course 250 --workers 8
+'''
+import argparse
+import bisect
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time as timer
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.bulkload import BulkLoader
+from app.core.db import Base, SessionLocal, engine
+from app.core.security import ROLE_ADMIN, ROLE_STUDENT, ROLE_TEACHER, get_password_hash
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.course import Course
+from app.models.feedback import Feedback
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.services.attendance_service import rebuild_attendance_rollup
+from app.services.feedback_service import rebuild_feedback_rollup
+
+DEFAULT_ATTENDANCE = {"present": 0.80, "late": 0.08, "absent": 0.08, "excused": 0.04}
+# for "at risk" students the absent weight is multiplied by this
+AT_RISK_ABSENT_FACTOR = 4.0
+SLOTS = [(time(9, 0), time(10, 30)), (time(10, 45), time(12, 15)), (time(13, 0), time(14, 30))]
+COMMENTS = [
+    "Понятно и по делу.",
+    "Хотелось бы больше практики.",
+    "Темп высокий.",
+    "Полезные примеры.",
+    None,
+]
+
+
+class DatasetSpec:
+    def __init__(
+        self,
+        courses: int = 100,
+        lessons_per_course: int = 20,
+        students: int = 5000,
+        students_per_course: int = 200,
+        teachers: int = 20,
+        attendance: Optional[Dict[str, float]] = None,
+        at_risk_share: float = 0.1,
+        feedback_density: float = 0.3,
+        seed: int = 42,
+        start_date: date = date(2025, 9, 1),
+    ):
+        self.courses = courses
+        self.lessons_per_course = lessons_per_course
+        self.students = students
+        self.students_per_course = min(students_per_course, students)
+        self.teachers = max(1, teachers)
+        self.attendance = dict(attendance or DEFAULT_ATTENDANCE)
+        self.at_risk_share = at_risk_share
+        self.feedback_density = feedback_density
+        self.seed = seed
+        self.start_date = start_date
+
+    # ids: admin, teachers, students; lessons and rows are numbered per course
+    @property
+    def first_student_id(self) -> int:
+        return self.teachers + 2
+
+    def teacher_id(self, course_id: int) -> int:
+        return 2 + (course_id - 1) % self.teachers
+
+    def lesson_id(self, course_id: int, n: int) -> int:
+        return (course_id - 1) * self.lessons_per_course + n + 1
+
+    def row_id_base(self, course_id: int) -> int:
+        # attendance has exactly lessons x students rows per course, feedback
+        # at most that many, so both use the same gap-free id blocks
+        return (course_id - 1) * self.lessons_per_course * self.students_per_course
+
+    def course_rng(self, course_id: int) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + course_id)
+
+    def to_dict(self) -> dict:
+        out = dict(vars(self))
+        out["start_date"] = self.start_date.isoformat()
+        return out
+
+
+def user_rows(spec: DatasetSpec) -> Iterator[dict]:
+    password = get_password_hash("123")
+
+    def row(user_id: int, email: str, full_name: str, role: str) -> dict:
+        return {
+            "id": user_id,
+            "email": email,
+            "full_name": full_name,
+            "hashed_password": password,
+            "is_active": True,
+            "role": role,
+        }
+
+    yield row(1, "a@a.com", "Администратор", ROLE_ADMIN)
+    for n in range(spec.teachers):
+        email = "b@b.com" if n == 0 else f"teacher{n + 1}@bench.local"
+        yield row(2 + n, email, f"Преподаватель {n + 1}", ROLE_TEACHER)
+    for n in range(spec.students):
+        email = "c@c.com" if n == 0 else f"student{n + 1}@bench.local"
+        yield row(spec.first_student_id + n, email, f"Студент {n + 1}", ROLE_STUDENT)
+
+
+def _course_start(spec: DatasetSpec, course_id: int) -> date:
+    return spec.start_date + timedelta(days=(course_id - 1) % 7)
+
+
+def course_rows(spec: DatasetSpec) -> Iterator[dict]:
+    for course_id in range(1, spec.courses + 1):
+        start = _course_start(spec, course_id)
+        yield {
+            "id": course_id,
+            "name": f"Курс {course_id}",
+            "description": None,
+            "start_date": start,
+            "end_date": start + timedelta(days=7 * spec.lessons_per_course),
+            "is_active": True,
+            "teacher_id": spec.teacher_id(course_id),
+        }
+
+
+def _lesson(spec: DatasetSpec, course_id: int, n: int) -> Tuple[int, date, time, time]:
+    start, end = SLOTS[(course_id + n) % len(SLOTS)]
+    return spec.lesson_id(course_id, n), _course_start(spec, course_id) + timedelta(days=7 * n), start, end
+
+
+def lesson_rows(spec: DatasetSpec) -> Iterator[dict]:
+    for course_id in range(1, spec.courses + 1):
+        for n in range(spec.lessons_per_course):
+            lesson_id, day, start, end = _lesson(spec, course_id, n)
+            yield {
+                "id": lesson_id,
+                "course_id": course_id,
+                "topic": f"Занятие {n + 1}",
+                "date": day,
+                "room": f"Аудитория {100 + course_id % 300}",
+                "start_time": start,
+                "end_time": end,
+            }
+
+
+def course_activity(spec: DatasetSpec, course_id: int) -> Tuple[List[dict], List[dict]]:
+    # attendance and feedback rows of one course, from the course's own RNG
+    rng = spec.course_rng(course_id)
+    statuses = [AttendanceStatus(name) for name in spec.attendance]
+    weights = list(spec.attendance.values())
+    risky_weights = [w * AT_RISK_ABSENT_FACTOR if s == AttendanceStatus.absent else w for s, w in zip(statuses, weights)]
+
+    def cumulative(ws: List[float]) -> List[float]:
+        total = sum(ws)
+        acc, out = 0.0, []
+        for w in ws:
+            acc += w / total
+            out.append(acc)
+        return out
+
+    normal, risky = cumulative(weights), cumulative(risky_weights)
+    last = len(statuses) - 1
+    attended = {AttendanceStatus.present, AttendanceStatus.late}
+    students = sorted(
+        rng.sample(range(spec.first_student_id, spec.first_student_id + spec.students), spec.students_per_course)
+    )
+    lessons = [_lesson(spec, course_id, n) for n in range(spec.lessons_per_course)]
+
+    base = spec.row_id_base(course_id)
+    attendance, feedback = [], []
+    for student_id in students:
+        cdf = risky if rng.random() < spec.at_risk_share else normal
+        for lesson_id, day, start, end in lessons:
+            status = statuses[min(bisect.bisect_left(cdf, rng.random()), last)]
+            marked = datetime.combine(day, start)
+            attendance.append(
+                {
+                    "id": base + len(attendance) + 1,
+                    "lesson_id": lesson_id,
+                    "student_id": student_id,
+                    "status": status,
+                    "comment": None,
+                    "created_at": marked,
+                    "updated_at": marked,
+                }
+            )
+            if status in attended and rng.random() < spec.feedback_density:
+                rating = min(5.0, max(1.0, rng.gauss(4.2, 0.6)))
+                feedback.append(
+                    {
+                        "id": base + len(feedback) + 1,
+                        "lesson_id": lesson_id,
+                        "student_id": student_id,
+                        "rating": round(rating, 1),
+                        "comment": rng.choice(COMMENTS),
+                        "is_hidden": False,
+                        "created_at": datetime.combine(day, end) + timedelta(minutes=rng.randrange(1440)),
+                    }
+                )
+    return attendance, feedback
+
+
+def _load_shard(db: Session, spec: DatasetSpec, course_ids: range, tables: list) -> Tuple[int, int]:
+    counts = [0, 0]
+    with BulkLoader(db, tables) as loader:
+        for course_id in course_ids:
+            attendance, feedback = course_activity(spec, course_id)
+            counts[0] += loader.load(Attendance.__table__, attendance)
+            counts[1] += loader.load(Feedback.__table__, feedback)
+        db.commit()
+    return counts[0], counts[1]
+
+
+def _init_worker() -> None:
+    # forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def _run_shard(job: Tuple[dict, int, int, Optional[str]]) -> Tuple[int, int, Optional[str], int, int]:
+    spec_args, first, last, shard_dir = job
+    spec = DatasetSpec(**{**spec_args, "start_date": date.fromisoformat(spec_args["start_date"])})
+    course_ids = range(first, last + 1)
+    if shard_dir is None:
+        # PostgreSQL: COPY straight into the shared tables
+        with SessionLocal() as db:
+            return (first, last, None, *_load_shard(db, spec, course_ids, []))
+
+    # SQLite has one writer, so each shard goes to its own file first
+    path = os.path.join(shard_dir, f"shard_{first}.db")
+    shard_engine = create_engine(f"sqlite:///{path}")
+    tables = [Attendance.__table__, Feedback.__table__]
+    Base.metadata.create_all(shard_engine, tables=tables)
+    try:
+        with Session(shard_engine) as db:
+            counts = _load_shard(db, spec, course_ids, tables)
+    finally:
+        shard_engine.dispose()
+    return (first, last, path, *counts)
+
+
+def _merge_shard(path: str) -> None:
+    # on a connection of its own: ATTACH/DETACH are not allowed inside a transaction
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("ATTACH DATABASE ? AS shard", (path,))
+        for table in (Attendance.__table__, Feedback.__table__):
+            cols = ", ".join(c.name for c in table.columns)
+            cursor.execute(f"INSERT INTO {table.name} ({cols}) SELECT {cols} FROM shard.{table.name}")
+        raw.commit()
+        cursor.execute("DETACH DATABASE shard")
+        cursor.close()
+    finally:
+        raw.close()
+    os.remove(path)
+
+
+def generate(spec: DatasetSpec, workers: int = 1, shard_courses: int = 25) -> dict:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    started = timer.perf_counter()
+    timings = {}
+    tables = [User.__table__, Course.__table__, Lesson.__table__, Attendance.__table__, Feedback.__table__]
+    counts = {"attendance": 0, "feedback": 0}
+    with SessionLocal() as db, BulkLoader(db, tables) as loader:
+        loader.load(User.__table__, user_rows(spec))
+        loader.load(Course.__table__, course_rows(spec))
+        loader.load(Lesson.__table__, lesson_rows(spec))
+        # committed so that the shard writers see the lessons and dropped indexes
+        db.commit()
+        timings["base_s"] = timer.perf_counter() - started
+
+        is_sqlite = engine.dialect.name == "sqlite"
+        jobs = []
+        with tempfile.TemporaryDirectory(prefix="dataset-") as shard_dir:
+            for first in range(1, spec.courses + 1, shard_courses):
+                last = min(first + shard_courses - 1, spec.courses)
+                jobs.append((spec.to_dict(), first, last, shard_dir if is_sqlite else None))
+            t0 = timer.perf_counter()
+            with multiprocessing.Pool(max(1, workers), initializer=_init_worker) as pool:
+                # SQLite shards are merged while the other workers keep generating
+                for first, last, path, n_attendance, n_feedback in pool.imap_unordered(_run_shard, jobs):
+                    if path is not None:
+                        _merge_shard(path)
+                    counts["attendance"] += n_attendance
+                    counts["feedback"] += n_feedback
+            timings["activity_s"] = timer.perf_counter() - t0
+
+        t0 = timer.perf_counter()
+        loader.finish()
+        db.commit()
+        timings["indexes_s"] = timer.perf_counter() - t0
+        t0 = timer.perf_counter()
+        rebuild_attendance_rollup(db)
+        rebuild_feedback_rollup(db)
+        db.commit()
+        timings["rollups_s"] = timer.perf_counter() - t0
+
+    return {
+        "database": engine.dialect.name,
+        "spec": spec.to_dict(),
+        "users": spec.teachers + spec.students + 1,
+        "courses": spec.courses,
+        "lessons": spec.courses * spec.lessons_per_course,
+        **counts,
+        "seconds": round(timer.perf_counter() - started, 1),
+        **{k: round(v, 1) for k, v in timings.items()},
+    }
+
+
+def parse_distribution(text: str) -> Dict[str, float]:
+    # "present=0.8,late=0.1,absent=0.05,excused=0.05"
+    out = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        out[AttendanceStatus(name.strip()).value] = float(weight)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=100)
+    parser.add_argument("--lessons-per-course", type=int, default=20)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--students-per-course", type=int, default=200)
+    parser.add_argument("--teachers", type=int, default=20)
+    parser.add_argument(
+        "--attendance",
+        type=parse_distribution,
+        default=DEFAULT_ATTENDANCE,
+        help="status weights, e.g. present=0.8,late=0.08,absent=0.08,excused=0.04",
+    )
+    parser.add_argument("--at-risk-share", type=float, default=0.1)
+    parser.add_argument("--feedback-density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-courses", type=int, default=25)
+    args = parser.parse_args()
+    spec = DatasetSpec(
+        courses=args.courses,
+        lessons_per_course=args.lessons_per_course,
+        students=args.students,
+        students_per_course=args.students_per_course,
+        teachers=args.teachers,
+        attendance=args.attendance,
+        at_risk_share=args.at_risk_share,
+        feedback_density=args.feedback_density,
+        seed=args.seed,
+    )
+    print(json.dumps(generate(spec, args.workers, args.shard_courses), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
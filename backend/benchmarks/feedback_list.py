@@ -0,0 +1,187 @@
+'''Бенчмарк GET /feedback/: прежний путь через ORM + joinedload против выборки колонок.
+
+Создаёт отдельную SQLite-базу с синтетическими отзывами (по умолчанию 100k),
+меряет латентность (включая сериализацию FeedbackRead) и пик памяти (tracemalloc).
+Запуск:
+    python -m benchmarks.feedback_list --rows 100000 --repeat 3
+'''
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.api.v1.feedback import list_feedback
+from app.core.db import Base
+from app.core.pagination import NEXT_CURSOR_HEADER, PageParams
+from app.models.course import Course
+from app.models.feedback import Feedback
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.schemas.feedback import FeedbackRead
+
+LESSONS = 500
+COURSES = 20
+
+feedback_list = TypeAdapter(List[FeedbackRead])
+
+
+def populate(engine, rows: int) -> None:
+    students = max(1, rows // LESSONS)
+    now = datetime(2025, 9, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "email": f"user{i}@example.com",
+                    "full_name": f"Студент {i}" if i > 1 else "Преподаватель",
+                    "hashed_password": "x",
+                    "is_active": True,
+                    "role": "student" if i > 1 else "teacher",
+                    "created_at": now,
+                }
+                for i in range(1, students + 2)
+            ],
+        )
+        conn.execute(
+            insert(Course),
+            [
+                {"id": c, "name": f"Курс {c}", "is_active": True, "teacher_id": 1, "created_at": now, "updated_at": now}
+                for c in range(1, COURSES + 1)
+            ],
+        )
+        conn.execute(
+            insert(Lesson),
+            [
+                {
+                    "id": lid,
+                    "course_id": (lid - 1) % COURSES + 1,
+                    "topic": f"Занятие {lid}",
+                    "date": date(2025, 9, 1) + timedelta(days=lid // COURSES),
+                    "created_at": now,
+                }
+                for lid in range(1, LESSONS + 1)
+            ],
+        )
+        batch = []
+        n = 0
+        for lid in range(1, LESSONS + 1):
+            for sid in range(2, students + 2):
+                n += 1
+                batch.append(
+                    {
+                        "lesson_id": lid,
+                        "student_id": sid,
+                        "rating": 1 + (n * 7 % 41) / 10,
+                        "comment": f"Комментарий {n}",
+                        "is_hidden": n % 50 == 0,
+                        "created_at": now + timedelta(seconds=n // 3),
+                    }
+                )
+                if len(batch) >= 10000:
+                    conn.execute(insert(Feedback), batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(Feedback), batch)
+
+
+def legacy_list(db, user):
+    # the handler as it was: ORM entities with joinedload, properties drive serialization
+    query = db.query(Feedback).options(
+        joinedload(Feedback.student),
+        joinedload(Feedback.lesson).joinedload(Lesson.course),
+    )
+    query = query.filter(Feedback.is_hidden.is_(False))
+    return query.order_by(Feedback.created_at.desc()).all()
+
+
+def route_list(db, user, limit=None, cursor=None):
+    # the GET /feedback/ handler itself; returns (rows, next cursor header)
+    response = Response()
+    page = PageParams(limit=limit, cursor=cursor, total=None)
+    rows = list_feedback(response, None, None, False, page, db, user)
+    return rows, response.headers.get(NEXT_CURSOR_HEADER)
+
+
+def measure(Session, fn, repeat: int) -> dict:
+    timings = []
+    peak = 0
+    size = 0
+    for i in range(repeat):
+        db = Session()
+        try:
+            if i == 0:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            body = feedback_list.dump_json(feedback_list.validate_python(fn(db), from_attributes=True))
+            timings.append((time.perf_counter() - t0) * 1000)
+            if i == 0:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            size = len(body)
+        finally:
+            db.close()
+    return {
+        "p50_ms": round(statistics.median(timings), 1),
+        "peak_mb": round(peak / 2**20, 1),
+        "body_kb": round(size / 1024, 1),
+    }
+
+
+def run(rows: int, repeat: int, page: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_feedback_"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, rows)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    admin = User(id=0, email="admin@example.com", role="admin")
+
+    def lean_all(db):
+        return route_list(db, admin)[0]
+
+    def lean_page(db):
+        return route_list(db, admin, limit=page)[0]
+
+    with Session() as db:
+        cursor = None
+        for _ in range(50):
+            cursor = route_list(db, admin, limit=page, cursor=cursor)[1]
+
+    def lean_deep_page(db):
+        return route_list(db, admin, limit=page, cursor=cursor)[0]
+
+    try:
+        return {
+            "rows": rows,
+            "legacy_orm_all": measure(Session, lambda db: legacy_list(db, admin), repeat),
+            "lean_all": measure(Session, lean_all, repeat),
+            f"lean_page_{page}": measure(Session, lean_page, repeat),
+            f"lean_page_{page}_after_50_pages": measure(Session, lean_deep_page, repeat),
+        }
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat, args.page), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
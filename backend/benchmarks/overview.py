@@ -0,0 +1,82 @@
+'''Бенчмарк /analytics/overview: число SQL-запросов и латентность.
+
+Запуск (после python -m app.core.bigseed):
+    python -m benchmarks.overview --repeat 20
+'''
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.db import engine
+from app.main import app
+
+CASES = [
+    ("a@a.com", "/api/v1/analytics/overview"),
+    ("a@a.com", "/api/v1/analytics/overview?scope=personal"),
+    ("a@a.com", "/api/v1/analytics/overview?course_id=1&from_date=2025-09-01&to_date=2025-12-31"),
+    ("b@b.com", "/api/v1/analytics/overview"),
+]
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+def login(client: TestClient, email: str, password: str) -> dict:
+    r = client.post("/api/v1/login", json={"email": email, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def run(repeat: int, password: str) -> list:
+    client = TestClient(app)
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    results = []
+    try:
+        for email, path in CASES:
+            headers = login(client, email, password)
+            client.get(path, headers=headers).raise_for_status()
+
+            counter.count = 0
+            client.get(path, headers=headers)
+            queries = counter.count
+
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                client.get(path, headers=headers).raise_for_status()
+                timings.append((time.perf_counter() - t0) * 1000)
+
+            results.append(
+                {
+                    "user": email,
+                    "path": path,
+                    "queries": queries,
+                    "p50_ms": round(statistics.median(timings), 2),
+                    "max_ms": round(max(timings), 2),
+                }
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--password", default="123")
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.password), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
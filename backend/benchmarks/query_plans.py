@@ -0,0 +1,228 @@
+'''Проверка планов запросов аналитики и списков: используются ли нужные индексы.
+
+Выполняет запросы обработчиков (через TestClient, пользователь подставляется
+без логина), перехватывает их SQL и прогоняет через EXPLAIN QUERY PLAN (SQLite)
+или EXPLAIN (FORMAT JSON) (PostgreSQL, с enable_seqscan = off). Для каждого
+сценария проверяет, что ожидаемые индексы встречаются в планах, что большие
+таблицы не читаются полным сканированием и что обработчик укладывается в свой
+бюджет запросов (assert_max_queries, защита от N+1; аналитика считается с
+холодным кэшем). При нарушении завершается с кодом 1.
+Запуск (после alembic upgrade head и python -m app.core.bigseed):
+    python -m benchmarks.query_plans [--verbose]
+'''
+import argparse
+import json
+import sys
+import threading
+from typing import Dict, List, Set, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.db import SessionLocal, engine
+from app.core.querystats import assert_max_queries
+from app.core.security import get_current_user
+from app.main import app
+from app.models.attendance import Attendance
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.user import User
+
+# таблицы, полное чтение которых в отфильтрованном запросе считается регрессией
+LARGE_TABLES = {"attendance", "feedback", "lessons"}
+# фоновые потоки (обучение модели риска, задания экспорта) в замер не попадают
+BACKGROUND_THREADS = ("risk-train", "export-job")
+
+
+def pick_subjects() -> Dict[str, object]:
+    db = SessionLocal()
+    try:
+        course_id, teacher_id = (
+            db.query(Course.id, Course.teacher_id)
+            .join(Lesson, Lesson.course_id == Course.id)
+            .filter(Course.teacher_id.isnot(None))
+            .group_by(Course.id, Course.teacher_id)
+            .order_by(Course.id.asc())
+            .first()
+        )
+        student_id = (
+            db.query(Attendance.student_id)
+            .join(Lesson, Attendance.lesson_id == Lesson.id)
+            .filter(Lesson.course_id == course_id)
+            .order_by(Attendance.student_id.asc())
+            .limit(1)
+            .scalar()
+        )
+        lesson_id = db.query(Lesson.id).filter(Lesson.course_id == course_id).order_by(Lesson.id.asc()).limit(1).scalar()
+        users = {u.role: u for u in db.query(User).filter(User.id.in_([teacher_id, student_id])).all()}
+        admin = db.query(User).filter(User.role == "admin").first()
+        db.expunge_all()
+    finally:
+        db.close()
+    return {
+        "admin": admin or User(id=0, email="admin@example.com", role="admin"),
+        "teacher": users["teacher"],
+        "student": users["student"],
+        "course_id": course_id,
+        "lesson_id": lesson_id,
+    }
+
+
+def cases(s: Dict[str, object]) -> List[Tuple[str, str, str, int, Set[str]]]:
+    # (name, user, path, most queries allowed, indexes that must appear in the plans)
+    c, l, st = s["course_id"], s["lesson_id"], s["student"].id
+    period = "from_date=2025-09-01&to_date=2025-12-31"
+    return [
+        ("overview teacher", "teacher", f"/api/v1/analytics/overview?{period}", 5, {"ix_courses_teacher_id"}),
+        (
+            "overview course",
+            "admin",
+            f"/api/v1/analytics/overview?course_id={c}&{period}",
+            5,
+            {"ix_lessons_course_id_date"},
+        ),
+        (
+            "overview personal",
+            "student",
+            f"/api/v1/analytics/overview?scope=personal&{period}",
+            4,
+            {"ix_feedback_student_id"},
+        ),
+        (
+            "risk course",
+            "admin",
+            f"/api/v1/analytics/risk?course_id={c}&{period}",
+            4,
+            {"ix_lessons_course_id_date", "ix_attendance_lesson_id_status_student_id"},
+        ),
+        (
+            "risk teacher",
+            "teacher",
+            "/api/v1/analytics/risk",
+            4,
+            {"ix_courses_teacher_id", "ix_attendance_lesson_id_status_student_id"},
+        ),
+        ("risk student", "student", "/api/v1/analytics/risk", 4, {"ix_attendance_student_id_lesson_id_status"}),
+        ("lessons of course", "admin", f"/api/v1/lessons/?course_id={c}&limit=100", 1, {"ix_lessons_course_id_date"}),
+        ("courses of teacher", "teacher", "/api/v1/courses/?limit=100", 1, {"ix_courses_teacher_id"}),
+        ("attendance of lesson", "admin", f"/api/v1/attendance/?lesson_id={l}&limit=100", 1, {"ix_attendance_lesson_id"}),
+        (
+            "attendance of student",
+            "admin",
+            f"/api/v1/attendance/?student_id={st}&limit=100",
+            1,
+            {"ix_attendance_student_id"},
+        ),
+        (
+            "feedback of lesson",
+            "admin",
+            f"/api/v1/feedback/?lesson_id={l}&limit=100",
+            1,
+            {"ix_feedback_lesson_id_is_hidden_rating"},
+        ),
+        ("feedback page", "admin", "/api/v1/feedback/?limit=100", 1, {"ix_feedback_created_at_id"}),
+    ]
+
+
+def capture(client: TestClient, user: User, path: str) -> List[Tuple[str, object]]:
+    statements: List[Tuple[str, object]] = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if threading.current_thread().name.startswith(BACKGROUND_THREADS):
+            return
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        app.dependency_overrides.pop(get_current_user, None)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path}: HTTP {response.status_code} {response.text[:200]}")
+    return statements
+
+
+def _walk_pg_plan(node: dict, indexes: Set[str], scans: Set[str]) -> None:
+    if "Index Name" in node:
+        indexes.add(node["Index Name"])
+    if node.get("Node Type") == "Seq Scan":
+        scans.add(node["Relation Name"])
+    for child in node.get("Plans", []):
+        _walk_pg_plan(child, indexes, scans)
+
+
+def explain(statement: str, parameters) -> Tuple[List[str], Set[str], Set[str]]:
+    # -> (plan lines, indexes used, tables read by a full scan)
+    indexes: Set[str] = set()
+    scans: Set[str] = set()
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            _walk_pg_plan(plan[0]["Plan"], indexes, scans)
+            return json.dumps(plan[0]["Plan"], indent=1).splitlines(), indexes, scans
+
+        lines = []
+        for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall():
+            detail = row[-1]
+            lines.append(detail)
+            words = detail.split()
+            if "INDEX" in words:
+                indexes.add(words[words.index("INDEX") + 1])
+            if len(words) == 2 and words[0] == "SCAN":
+                scans.add(words[1])
+        return lines, indexes, scans
+
+
+def run(verbose: bool) -> bool:
+    subjects = pick_subjects()
+    client = TestClient(app)
+    ok = True
+    for name, role, path, budget, expected in cases(subjects):
+        used: Set[str] = set()
+        full_scans: Set[str] = set()
+        plans = []
+        over_budget = None
+        try:
+            with assert_max_queries(budget, f"GET {path}"):
+                statements = capture(client, subjects[role], path)
+        except AssertionError as exc:
+            over_budget = str(exc)
+        for statement, parameters in statements:
+            lines, indexes, scans = explain(statement, parameters)
+            used |= indexes
+            full_scans |= scans & LARGE_TABLES
+            plans.append((statement, lines))
+        missing = expected - used
+        passed = not missing and not full_scans and over_budget is None
+        ok = ok and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}: {path}")
+        if missing:
+            print(f"     missing indexes: {', '.join(sorted(missing))}")
+        if full_scans:
+            print(f"     full scans: {', '.join(sorted(full_scans))}")
+        if over_budget is not None:
+            for line in over_budget.splitlines():
+                print("     " + line)
+        if verbose or not passed:
+            for statement, lines in plans:
+                print("     " + " ".join(statement.split())[:160])
+                for line in lines:
+                    print("       " + line)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.verbose) else 1)
+
+
+if __name__ == "__main__":
+    main()
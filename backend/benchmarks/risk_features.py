@@ -0,0 +1,118 @@
+'''Бенчмарк признаков модели риска: построчная версия на списках против NumPy.
+
+Проверяет, что матрицы признаков совпадают, и печатает время обеих версий.
+Запуск (после python -m app.core.bigseed):
+    python -m benchmarks.risk_features --k 5 --repeat 5
+'''
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+import numpy as np
+
+from app.core.db import SessionLocal
+from app.models.course import Course
+from app.services.risk_service import (
+    STATUS_ABSENT,
+    STATUS_EXCUSED,
+    STATUS_LATE,
+    build_training_set,
+    latest_features,
+    load_attendance_series,
+)
+
+NAMES = {STATUS_ABSENT: "absent", STATUS_LATE: "late", STATUS_EXCUSED: "excused"}
+
+
+# эталон: прежняя реализация признаков на списках строк
+
+
+def legacy_streak_absent(statuses: List[str]) -> int:
+    streak = 0
+    for s in reversed(statuses):
+        if s == "absent":
+            streak += 1
+        else:
+            break
+    return streak
+
+
+def legacy_make_features(window: List[str], history: List[str]) -> List[float]:
+    wlen = len(window) if window else 1
+    hlen = len(history) if history else 1
+    return [
+        sum(1 for x in window if x == "absent") / wlen,
+        sum(1 for x in window if x == "late") / wlen,
+        sum(1 for x in window if x == "excused") / wlen,
+        float(legacy_streak_absent(window)),
+        sum(1 for x in history if x == "absent") / hlen,
+        sum(1 for x in history if x == "late") / hlen,
+        sum(1 for x in history if x == "excused") / hlen,
+        float(len(history)),
+        float(len(window)),
+    ]
+
+
+def legacy_training_set(series: dict, k: int):
+    X, y = [], []
+    for statuses in series.values():
+        if len(statuses) < k + 1:
+            continue
+        for t in range(k, len(statuses)):
+            X.append(legacy_make_features(statuses[t - k : t], statuses[:t]))
+            y.append(1 if statuses[t] == "absent" else 0)
+    return X, y
+
+
+def legacy_latest(series: dict, k: int):
+    return [legacy_make_features(s[-k:], s) for s in series.values() if s]
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def run(k: int, repeat: int) -> dict:
+    db = SessionLocal()
+    try:
+        course_ids = [r[0] for r in db.query(Course.id).all()]
+        series = load_attendance_series(db, course_ids, None, None, None)
+    finally:
+        db.close()
+    legacy_series = {key: [NAMES.get(int(c), "present") for c in codes] for key, codes in series.items()}
+
+    X, y = build_training_set(series, k)
+    lX, ly = legacy_training_set(legacy_series, k)
+    assert np.allclose(X, np.asarray(lX, dtype=np.float64).reshape(X.shape)), "training features differ"
+    assert np.array_equal(y, np.asarray(ly)), "training labels differ"
+
+    latest = latest_features(series, k)
+    assert np.allclose(latest, np.asarray(legacy_latest(legacy_series, k))), "latest features differ"
+
+    return {
+        "series": len(series),
+        "training_rows": int(y.shape[0]),
+        "train_legacy_ms": timed(lambda: legacy_training_set(legacy_series, k), repeat),
+        "train_numpy_ms": timed(lambda: build_training_set(series, k), repeat),
+        "latest_legacy_ms": timed(lambda: legacy_latest(legacy_series, k), repeat),
+        "latest_numpy_ms": timed(lambda: latest_features(series, k), repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.k, args.repeat), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
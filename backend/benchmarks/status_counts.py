@@ -0,0 +1,106 @@
+'''Бенчмарк подсчёта статусов посещаемости: CAST(status AS VARCHAR) против сравнения enum.
+
+Сравнивает прежние запросы (CAST + SUM(CASE), CAST + разбор строк в Python)
+с текущими (count_where -> COUNT(*) FILTER, коды статусов считает база) на:
+  - пересборке витрины attendance_daily_rollup, из которой читает overview
+    (в транзакции, которая затем откатывается);
+  - загрузке рядов для модели риска.
+Проверяет, что результаты совпадают. Запуск (после python -m app.core.bigseed):
+    python -m benchmarks.status_counts --repeat 5
+'''
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+from sqlalchemy import String, case, cast, func
+
+from app.core.db import SessionLocal
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.services import attendance_service
+from app.services.risk_service import encode_status, load_attendance_series
+
+
+def legacy_status_sum(status: AttendanceStatus):
+    # прежний вариант: каждый статус через CAST(status AS VARCHAR) в SUM(CASE)
+    return func.sum(case((cast(Attendance.status, String) == status.value, 1), else_=0))
+
+
+def rebuild(db, status_sum) -> list:
+    # пересборка витрины в откатываемой транзакции; возвращает её содержимое
+    original = attendance_service._status_sum
+    attendance_service._status_sum = status_sum
+    try:
+        attendance_service.rebuild_attendance_rollup(db)
+        R = AttendanceDailyRollup
+        cols = (R.course_id, R.date, R.student_id, R.total, R.present, R.late, R.excused, R.absent)
+        return [tuple(r) for r in db.query(*cols).order_by(R.course_id, R.date, R.student_id)]
+    finally:
+        attendance_service._status_sum = original
+        db.rollback()
+
+
+def legacy_series(db, course_ids):
+    q = (
+        db.query(
+            Attendance.student_id.label("sid"),
+            Lesson.course_id.label("cid"),
+            cast(Attendance.status, String).label("status"),
+        )
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .filter(Lesson.course_id.in_(course_ids))
+        .order_by(Attendance.student_id.asc(), Lesson.course_id.asc(), Lesson.date.asc())
+    )
+    rows = q.all()
+    sids = np.fromiter((r.sid for r in rows), dtype=np.int64, count=len(rows))
+    cids = np.fromiter((r.cid for r in rows), dtype=np.int64, count=len(rows))
+    codes = np.fromiter((encode_status(r.status) for r in rows), dtype=np.int8, count=len(rows))
+    breaks = np.flatnonzero((np.diff(sids) != 0) | (np.diff(cids) != 0)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(rows)]))
+    return {(int(sids[a]), int(cids[a])): codes[a:b] for a, b in zip(starts, ends)}
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(timings), 1)
+
+
+def run(repeat: int) -> dict:
+    db = SessionLocal()
+    try:
+        course_ids = [r[0] for r in db.query(Course.id).all()]
+        out = {"dialect": db.get_bind().dialect.name, "attendance_rows": db.query(Attendance).count()}
+
+        current = attendance_service._status_sum
+        assert rebuild(db, legacy_status_sum) == rebuild(db, current), "rollup differs"
+        out["rollup_rebuild_legacy_ms"] = timed(lambda: rebuild(db, legacy_status_sum), repeat)
+        out["rollup_rebuild_current_ms"] = timed(lambda: rebuild(db, current), repeat)
+
+        old = legacy_series(db, course_ids)
+        new = load_attendance_series(db, course_ids, None, None, None)
+        assert old.keys() == new.keys() and all(np.array_equal(old[k], new[k]) for k in old), "risk series differ"
+        out["risk_series_legacy_ms"] = timed(lambda: legacy_series(db, course_ids), repeat)
+        out["risk_series_current_ms"] = timed(lambda: load_attendance_series(db, course_ids, None, None, None), repeat)
+        return out
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
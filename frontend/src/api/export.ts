@@ -1,6 +1,13 @@
 import api from "./client";
 
-export type ExportFormat = "csv" | "json";
+export type ExportFormat =
+  | "csv"
+  | "csv_gzip"
+  | "csv_zstd"
+  | "json"
+  | "ndjson"
+  | "parquet"
+  | "arrow";
 
 export interface ExportParams {
   course_id?: number;
@@ -10,6 +17,15 @@ export interface ExportParams {
   response_format: ExportFormat;
 }
 
+export interface FeedbackExportParams {
+  course_id?: number;
+  lesson_id?: number;
+  from_date?: string;
+  to_date?: string;
+  include_hidden?: boolean;
+  response_format: ExportFormat;
+}
+
 export async function exportAttendance(params: ExportParams): Promise<Blob> {
   const response = await api.get("/export/attendance", {
     params,
@@ -17,3 +33,60 @@ export async function exportAttendance(params: ExportParams): Promise<Blob> {
   });
   return response.data as Blob;
 }
+
+export async function exportFeedback(params: FeedbackExportParams): Promise<Blob> {
+  const response = await api.get("/export/feedback", {
+    params,
+    responseType: "blob",
+  });
+  return response.data as Blob;
+}
+
+export type ExportDataset = "attendance" | "feedback";
+
+export type ExportJobStatus = "pending" | "running" | "done" | "failed";
+
+export interface ExportJobCreate {
+  dataset?: ExportDataset;
+  response_format: ExportFormat;
+  course_id?: number;
+  student_id?: number;
+  lesson_id?: number;
+  from_date?: string;
+  to_date?: string;
+  include_hidden?: boolean;
+}
+
+export interface ExportJob {
+  id: string;
+  dataset: ExportDataset;
+  response_format: ExportFormat;
+  status: ExportJobStatus;
+  rows_total: number | null;
+  rows_written: number;
+  bytes_written: number;
+  progress: number | null;
+  error: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  expires_at: string;
+  download_url: string | null;
+}
+
+export async function createExportJob(payload: ExportJobCreate): Promise<ExportJob> {
+  const response = await api.post<ExportJob>("/export/jobs", payload);
+  return response.data;
+}
+
+export async function getExportJob(id: string): Promise<ExportJob> {
+  const response = await api.get<ExportJob>(`/export/jobs/${id}`);
+  return response.data;
+}
+
+export async function downloadExportJob(id: string): Promise<Blob> {
+  const response = await api.get(`/export/jobs/${id}/download`, {
+    responseType: "blob",
+  });
+  return response.data as Blob;
+}